@@ -1,5 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import authentication  # noqa: F401
+        from .core import cards, response_cache  # noqa: F401
+        from .core.cache_utils import check_shared_cache
+        from .core.timing import install_query_observer
+        connection_created.connect(install_query_observer)
+        if settings.API_RESPONSE_CACHE_TIMEOUT or settings.API_ETAG:
+            check_shared_cache('API_RESPONSE_CACHE')
+        check_shared_cache('PANTRY_INDEX_CACHE')
+        check_shared_cache('TAG_IDS_CACHE')
+        if settings.AUTH_JWT:
+            check_shared_cache('JWT_DENY_LIST_CACHE')
+        if settings.DATABASE_REPLICAS:
+            check_shared_cache('PRIMARY_STICKINESS_CACHE')
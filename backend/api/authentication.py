@@ -0,0 +1,115 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .core.cache_utils import LRUCache
+from .core.jwt_utils import get_token_user, is_revoked
+
+_tokens = LRUCache(
+    getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    getattr(settings, 'TOKEN_CACHE_TIMEOUT', 5)
+)
+
+
+def _get_shared_cache():
+    alias = getattr(settings, 'TOKEN_SHARED_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _get_cache_key(key):
+    return 'auth:token:{}'.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_tokens(keys):
+    """Удаляет пользователей с указанными токенами из кэшей.
+
+    Кэши других процессов очищаются по истечении TOKEN_CACHE_TIMEOUT.
+
+    Args:
+        keys (Iterable[str]): Ключи токенов.
+
+    """
+    cache_keys = [_get_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        _tokens.delete(cache_key)
+    shared_cache = _get_shared_cache()
+    if shared_cache is not None and cache_keys:
+        shared_cache.delete_many(cache_keys)
+
+
+def invalidate_user_tokens(user):
+    """Удаляет из кэшей все токены пользователя."""
+    invalidate_tokens(
+        Token.objects.filter(user=user).values_list('key', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens((instance.key,))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием пользователя.
+
+    Пользователь токена ищется сначала в кэше процесса
+    (TOKEN_CACHE_SIZE записей на TOKEN_CACHE_TIMEOUT секунд), затем
+    в общем кэше TOKEN_SHARED_CACHE, если он задан, и только потом
+    в базе. Записи удаляются при удалении токена (выход из системы)
+    и при смене пароля.
+
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = _get_cache_key(key)
+        user = _tokens.get(cache_key)
+        if user is None:
+            shared_cache = _get_shared_cache()
+            if shared_cache is not None:
+                user = shared_cache.get(cache_key)
+            if user is None:
+                user, token = super().authenticate_credentials(key)
+                if shared_cache is not None:
+                    shared_cache.set(
+                        cache_key,
+                        user,
+                        getattr(settings, 'TOKEN_SHARED_CACHE_TIMEOUT', 60)
+                    )
+            _tokens.set(cache_key, user)
+        # Каждый запрос получает свою копию, чтобы изменения
+        # пользователя в одном запросе не попадали в другие.
+        user = copy.copy(user)
+        return user, self.get_model()(key=key, user=user)
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """Аутентификация по токену доступа JWT без запросов к базе.
+
+    Пользователь восстанавливается из полей токена, отозванные токены
+    проверяются по списку в кэше. Значения заголовка, не похожие на JWT,
+    пропускаются, чтобы их проверил следующий класс аутентификации.
+
+    """
+
+    def get_raw_token(self, header):
+        raw_token = super().get_raw_token(header)
+        if raw_token is None or raw_token.count(b'.') != 2:
+            return None
+        return raw_token
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise InvalidToken('Токен отозван.')
+        return token
+
+    def get_user(self, validated_token):
+        return get_token_user(validated_token)
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from threading import Lock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from .profiling import get_current_profile
+
+_executor_lock = Lock()
+
+
+@lru_cache(maxsize=None)
+def _create_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_ORM_THREADS,
+        thread_name_prefix='orm'
+    )
+
+
+def get_executor():
+    """Возвращает пул потоков для работы с ORM из асинхронного кода.
+
+    Размер пула задается настройкой ASYNC_ORM_THREADS и ограничивает
+    число одновременных соединений с базой у одного процесса. Пул
+    создается под блокировкой: lru_cache не защищает от одновременного
+    первого вызова из нескольких потоков, и лишний пул превысил бы
+    этот предел.
+
+    """
+    with _executor_lock:
+        return _create_executor()
+
+
+def _call_in_pool(func, *args, **kwargs):
+    close_old_connections()
+    profile = get_current_profile()
+    if profile is not None:
+        profile.profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if profile is not None:
+            profile.profiler.disable()
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле потоков ORM.
+
+    Соединения с базой в потоке пула закрываются по тем же правилам,
+    что и после обычного запроса (с учетом CONN_MAX_AGE).
+
+    Args:
+        func (function): Синхронная функция.
+
+    Returns:
+        Результат функции.
+
+    """
+    return await sync_to_async(
+        _call_in_pool, thread_sensitive=False, executor=get_executor()
+    )(func, *args, **kwargs)
+
+
+def offload_view(view):
+    """Превращает синхронное представление в асинхронное.
+
+    Под ASGI Django 3.2 выполняет все синхронные представления
+    процесса в одном общем потоке. Асинхронная обертка отдает работу
+    представления в ограниченный пул, и медленный запрос (выгрузка
+    списка покупок, загрузка картинки) не задерживает остальные.
+
+    Args:
+        view (function): Синхронное представление.
+
+    Returns:
+        function: Асинхронное представление с теми же атрибутами.
+
+    """
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run_in_pool(view, request, *args, **kwargs)
+    return async_view
+
+
+def offload_urlpatterns(urlpatterns):
+    """Оборачивает представления маршрутов в 'offload_view'.
+
+    Args:
+        urlpatterns (list[URLPattern]): Маршруты.
+
+    Returns:
+        list[URLPattern]: Маршруты с асинхронными представлениями.
+
+    """
+    return [
+        URLPattern(
+            pattern.pattern,
+            offload_view(pattern.callback),
+            pattern.default_args,
+            pattern.name
+        )
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+class LRUCache:
+    """Ограниченный по размеру кэш процесса с временем жизни записей.
+
+    При переполнении вытесняются записи, которые дольше всех
+    не запрашивались.
+
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self.lock:
+            self.entries[key] = (
+                value, monotonic() + (timeout or self.timeout)
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def check_shared_cache(setting):
+    """Проверяет, что настройка указывает на общий для процессов кэш.
+
+    Args:
+        setting (str): Имя настройки с алиасом кэша из CACHES.
+
+    Raises:
+        ImproperlyConfigured: Если это кэш в памяти процесса: каждый
+            воркер видел бы в нем только свои записи.
+
+    """
+    alias = getattr(settings, setting)
+    if isinstance(caches[alias], LocMemCache):
+        raise ImproperlyConfigured(
+            f'{setting}: кэш "{alias}" хранится в памяти процесса, '
+            'укажите общий для всех процессов кэш.'
+        )
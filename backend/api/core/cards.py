@@ -0,0 +1,151 @@
+import orjson
+from django.db import router, transaction
+from django.db.models import Prefetch
+from django.dispatch import receiver
+from recipes.models import (Favorite, IngredientRecipe, Recipe, RecipeCard,
+                            ShoppingCart, Tag)
+from recipes.signals import recipes_changed
+from rest_framework.utils.encoders import JSONEncoder
+from users.models import Subscribe
+
+from ..serializers import RecipeCardSerializer
+from .fieldsets import RecipeFieldset
+
+
+def _render_cards(recipes):
+    serializer = RecipeCardSerializer(
+        recipes.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredient_recipe',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
+            )
+        ),
+        many=True
+    )
+    default = JSONEncoder().default
+    return {
+        card['id']: orjson.dumps(card, default=default).decode()
+        for card in serializer.data
+    }
+
+
+def update_recipe_cards(recipe_ids=None, batch_size=500):
+    """Перестраивает карточки рецептов.
+
+    Карточки перестраиваются в одной транзакции: читатели видят либо
+    старые, либо новые документы. Вызванная внутри транзакции,
+    функция перестраивает карточки вместе с изменениями рецепта.
+    Карточку, которую между удалением и вставкой уже вставил
+    параллельный вызов, он и оставляет: она построена после тех же
+    изменений.
+
+    Args:
+        recipe_ids (Iterable[int]): id рецептов. Если не переданы,
+            перестраиваются карточки всех рецептов.
+        batch_size (int): Количество рецептов в одной выборке.
+
+    Returns:
+        dict: Документы перестроенных карточек вида {id рецепта: JSON}.
+
+    """
+    if recipe_ids is None:
+        recipe_ids = Recipe.objects.order_by('id').values_list('id', flat=True)
+    recipe_ids = list(recipe_ids)
+    documents = {}
+    with transaction.atomic(using=router.db_for_write(RecipeCard)):
+        for start in range(0, len(recipe_ids), batch_size):
+            batch = recipe_ids[start:start + batch_size]
+            batch_documents = _render_cards(
+                Recipe.objects.filter(id__in=batch)
+            )
+            RecipeCard.objects.filter(recipe_id__in=batch).delete()
+            RecipeCard.objects.bulk_create(
+                (
+                    RecipeCard(recipe_id=recipe_id, document=document)
+                    for recipe_id, document in batch_documents.items()
+                ),
+                ignore_conflicts=True
+            )
+            documents.update(batch_documents)
+    return documents
+
+
+@receiver(recipes_changed)
+def recipes_changed_handler(sender, recipe_ids, **kwargs):
+    update_recipe_cards(recipe_ids)
+
+
+def get_recipe_cards(recipes, request, fieldset=None):
+    """Собирает представления рецептов из готовых карточек.
+
+    Поля, зависящие от текущего пользователя, вычисляются
+    по одному запросу на весь список и только если их выводят.
+    Недостающие карточки строятся в памяти и не сохраняются: запрос
+    на чтение ничего не пишет в базу. Сохраняет их команда
+    rebuild_recipe_cards.
+
+    Args:
+        recipes (Iterable[Recipe]): Рецепты в порядке вывода.
+        request (HttpRequest): Объект запроса.
+        fieldset (RecipeFieldset): Выводимые поля. Если не передан,
+            выводятся все поля.
+
+    Returns:
+        list[dict]: Представления рецептов, как у 'RecipeReadSerializer'.
+
+    """
+    recipes = list(recipes)
+    recipe_ids = [recipe.id for recipe in recipes]
+    documents = dict(
+        RecipeCard.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'document')
+    )
+    missing = [
+        recipe_id for recipe_id in recipe_ids if recipe_id not in documents
+    ]
+    if missing:
+        documents.update(
+            _render_cards(Recipe.objects.filter(id__in=missing))
+        )
+    if fieldset is None:
+        fieldset = RecipeFieldset()
+    user = request.user
+    favorites = cart = subscriptions = set()
+    if user.is_authenticated and fieldset.includes('is_favorited'):
+        favorites = set(
+            Favorite.objects.filter(
+                user=user, recipe__in=recipe_ids
+            ).values_list('recipe_id', flat=True)
+        )
+    if user.is_authenticated and fieldset.includes('is_in_shopping_cart'):
+        cart = set(
+            ShoppingCart.objects.filter(
+                user=user, recipe__in=recipe_ids
+            ).values_list('recipe_id', flat=True)
+        )
+    if user.is_authenticated and fieldset.expands('author'):
+        subscriptions = set(
+            Subscribe.objects.filter(
+                user=user,
+                subscribing__in={recipe.author_id for recipe in recipes}
+            ).values_list('subscribing_id', flat=True)
+        )
+    cards = []
+    for recipe in recipes:
+        if recipe.id not in documents:
+            # Рецепт удален после выборки списка.
+            continue
+        card = orjson.loads(documents[recipe.id])
+        if card['image']:
+            card['image'] = request.build_absolute_uri(card['image'])
+        card['author']['is_subscribed'] = (
+            card['author']['id'] in subscriptions
+        )
+        card['is_favorited'] = recipe.id in favorites
+        card['is_in_shopping_cart'] = recipe.id in cart
+        cards.append(fieldset.prune(card))
+    return cards
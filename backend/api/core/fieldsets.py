@@ -0,0 +1,164 @@
+from django.db.models import Exists, OuterRef, Prefetch
+from recipes.models import Favorite, IngredientRecipe, ShoppingCart, Tag
+from rest_framework.exceptions import ValidationError
+from users.models import CustomUser, Subscribe
+
+# Связи рецепта и их свернутое представление: без параметра expand
+# связь выводится целиком, иначе - только id связанных объектов.
+RECIPE_RELATIONS = {
+    'tags': lambda tags: [tag['id'] for tag in tags],
+    'author': lambda author: author['id'],
+    'ingredients': lambda ingredients: [
+        {'id': ingredient['id'], 'amount': ingredient['amount']}
+        for ingredient in ingredients
+    ],
+}
+# Поля модели, которые не нужно читать из базы, если их не выводят.
+DEFERRABLE_FIELDS = ('name', 'text', 'image', 'cooking_time')
+
+
+def _parse_names(request, param, available):
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    names = {name.strip() for name in value.split(',')} - {''}
+    unknown = names - set(available)
+    if unknown:
+        raise ValidationError(
+            {param: f'Неизвестные поля: {", ".join(sorted(unknown))}.'}
+        )
+    return names
+
+
+class RecipeFieldset:
+    """Поля рецепта, запрошенные параметрами fields и expand.
+
+    Параметр fields перечисляет через запятую выводимые поля,
+    параметр expand - связи, которые выводятся целиком. Остальные
+    связи выводятся в виде id. Без параметров выводятся все поля
+    со всеми связями.
+
+    Атрибуты:
+        fields (set[str]): Выводимые поля или None, если выводятся все.
+        expand (set[str]): Развернутые связи или None, если все.
+
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request, available):
+        """Разбирает параметры fields и expand запроса.
+
+        Args:
+            request (Request): Объект запроса.
+            available (Iterable[str]): Поля сериализатора рецепта.
+
+        Returns:
+            RecipeFieldset: Запрошенные поля.
+
+        Raises:
+            ValidationError: Если запрошены неизвестные поля или связи.
+
+        """
+        fields = _parse_names(request, 'fields', available)
+        if 'expand' not in request.query_params:
+            return cls(fields)
+        return cls(
+            fields,
+            _parse_names(request, 'expand', RECIPE_RELATIONS) or set()
+        )
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def including(self, name):
+        """Возвращает набор полей, дополненный полем name."""
+        if self.includes(name):
+            return self
+        return type(self)(self.fields | {name}, self.expand)
+
+    def expands(self, name):
+        return self.includes(name) and (
+            self.expand is None or name in self.expand
+        )
+
+    def prepare_queryset(self, queryset, user):
+        """Добавляет к выборке рецептов только нужные выводимым полям данные.
+
+        Связи загружаются, только если их выводят, а для свернутых
+        связей не загружаются связанные объекты. Отметки избранного
+        и списка покупок загружаются одним запросом на страницу.
+
+        Args:
+            queryset (QuerySet): Выборка рецептов.
+            user (CustomUser): Текущий пользователь.
+
+        Returns:
+            QuerySet: Выборка рецептов.
+
+        """
+        deferred = [
+            name for name in DEFERRABLE_FIELDS if not self.includes(name)
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        if self.includes('tags'):
+            queryset = queryset.prefetch_related(Prefetch(
+                'tags',
+                queryset=(
+                    Tag.objects.all() if self.expands('tags')
+                    else Tag.objects.only('id')
+                )
+            ))
+        if self.includes('ingredients'):
+            ingredients = IngredientRecipe.objects.all()
+            if self.expands('ingredients'):
+                ingredients = ingredients.select_related('ingredient')
+            queryset = queryset.prefetch_related(
+                Prefetch('ingredient_recipe', queryset=ingredients)
+            )
+        if self.expands('author'):
+            authors = CustomUser.objects.all()
+            if user.is_authenticated:
+                authors = authors.annotate(is_subscribed=Exists(
+                    Subscribe.objects.filter(
+                        user=user, subscribing=OuterRef('pk')
+                    )
+                ))
+            queryset = queryset.prefetch_related(
+                Prefetch('author', queryset=authors)
+            )
+        if not user.is_authenticated:
+            return queryset
+        for name, lookup, model in (
+            ('is_favorited', 'favorite', Favorite),
+            ('is_in_shopping_cart', 'shopping_cart', ShoppingCart),
+        ):
+            if self.includes(name):
+                queryset = queryset.prefetch_related(Prefetch(
+                    lookup,
+                    queryset=model.objects.filter(user=user),
+                    to_attr=f'user_{lookup}'
+                ))
+        return queryset
+
+    def prune(self, data):
+        """Убирает из представления рецепта невыводимые поля.
+
+        Args:
+            data (dict): Полное представление рецепта.
+
+        Returns:
+            dict: Представление с запрошенными полями.
+
+        """
+        return {
+            name: (
+                value if name not in RECIPE_RELATIONS or self.expands(name)
+                else RECIPE_RELATIONS[name](value)
+            )
+            for name, value in data.items() if self.includes(name)
+        }
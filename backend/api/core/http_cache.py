@@ -0,0 +1,84 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from .response_cache import get_cache_key, get_response_cache, get_version
+
+# Политики кэширования: 'reference' - справочные данные, одинаковые
+# для всех пользователей (тэги, ингредиенты); 'public' - данные,
+# одинаковые для анонимных пользователей (рецепты), а для
+# авторизованных содержащие отметки пользователя.
+POLICIES = ('reference', 'public')
+
+
+def get_etag(request):
+    """Формирует ETag ответа по версии данных и ключу запроса.
+
+    Версия данных меняется при любом изменении рецептов, тэгов
+    и ингредиентов, поэтому ETag проверяется без вычисления ответа.
+
+    """
+    version = get_version(get_response_cache())
+    return f'W/"{version}-{get_cache_key(request)[-16:]}"'
+
+
+def _get_shared_response(method, view, request, *args, **kwargs):
+    if not settings.API_ETAG:
+        return method(view, request, *args, **kwargs)
+    etag = get_etag(request)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = method(view, request, *args, **kwargs)
+    response['ETag'] = etag
+    return response
+
+
+def http_cache_policy(policy):
+    """Декоратор действия вьюсета, задающий заголовки HTTP-кэширования.
+
+    Ответы, одинаковые для всех получателей, помечаются Cache-Control:
+    public с max-age API_REFERENCE_MAX_AGE или API_PUBLIC_MAX_AGE
+    и при API_ETAG получают ETag: запрос с совпадающим If-None-Match
+    получает ответ 304 без обращения к базе. Ответы авторизованным
+    пользователям по политике 'public' помечаются как private.
+
+    Args:
+        policy (str): Политика кэширования из POLICIES.
+
+    """
+    assert policy in POLICIES, policy
+    if policy == 'reference':
+        vary = ('Accept',)
+    else:
+        vary = ('Accept', 'Authorization')
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if policy == 'public' and request.user.is_authenticated:
+                response = method(self, request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                response = _get_shared_response(
+                    method, self, request, *args, **kwargs
+                )
+                if response.status_code not in (200, 304):
+                    del response['ETag']
+                    return response
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=(
+                        settings.API_REFERENCE_MAX_AGE
+                        if policy == 'reference'
+                        else settings.API_PUBLIC_MAX_AGE
+                    )
+                )
+            patch_vary_headers(response, vary)
+            return response
+        return wrapper
+    return decorator
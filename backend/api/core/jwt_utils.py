@@ -0,0 +1,140 @@
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from users.models import CustomUser
+
+from .cache_utils import LRUCache
+
+# Поля пользователя, которые записываются в токен доступа, чтобы
+# восстанавливать пользователя без запроса к базе.
+USER_CLAIMS = (
+    'email',
+    'username',
+    'first_name',
+    'last_name',
+    'is_staff',
+    'is_superuser',
+)
+# Время входа с точностью до долей секунды: по нему отзываются
+# все токены пользователя, выданные до смены пароля.
+AUTH_TIME_CLAIM = 'auth_time'
+
+# Токены, которые недавно проверялись и не были отозваны.
+_not_revoked = LRUCache(
+    getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+    getattr(settings, 'JWT_DENY_LIST_LOCAL_TIMEOUT', 0)
+)
+
+
+def _get_cache():
+    return caches[settings.JWT_DENY_LIST_CACHE]
+
+
+def _get_lifetime(token):
+    return max(int(token['exp'] - time()), 1)
+
+
+def get_access_token(user, auth_time=None):
+    """Выдает пользователю токен доступа.
+
+    Args:
+        user (CustomUser): Пользователь.
+        auth_time (float): Время входа. По умолчанию - текущее время.
+
+    Returns:
+        AccessToken: Токен доступа.
+
+    """
+    token = AccessToken.for_user(user)
+    token[AUTH_TIME_CLAIM] = auth_time or time()
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def get_tokens(user):
+    """Выдает пользователю токен обновления и токен доступа.
+
+    Returns:
+        tuple[RefreshToken, AccessToken]: Токены.
+
+    """
+    auth_time = time()
+    refresh = RefreshToken.for_user(user)
+    refresh[AUTH_TIME_CLAIM] = auth_time
+    return refresh, get_access_token(user, auth_time)
+
+
+def get_token_user(token):
+    """Восстанавливает пользователя из токена доступа без запроса к базе.
+
+    Args:
+        token (AccessToken): Проверенный токен доступа.
+
+    Returns:
+        CustomUser: Пользователь, которого можно использовать
+            в запросах ORM и проверках прав, но нельзя сохранять целиком.
+
+    """
+    user = CustomUser(
+        id=token[api_settings.USER_ID_CLAIM],
+        **{claim: token[claim] for claim in USER_CLAIMS}
+    )
+    user._state.adding = False
+    return user
+
+
+def revoke_token(token):
+    """Вносит токен в список отозванных до истечения его срока."""
+    _not_revoked.delete(token[api_settings.JTI_CLAIM])
+    _get_cache().set(
+        f'jwt:deny:{token[api_settings.JTI_CLAIM]}',
+        True,
+        _get_lifetime(token)
+    )
+
+
+def revoke_user_tokens(user):
+    """Отзывает все токены пользователя, выданные до этого момента."""
+    _not_revoked.clear()
+    _get_cache().set(
+        f'jwt:revoked:{user.pk}',
+        time(),
+        int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    )
+
+
+def is_revoked(token, use_local=True):
+    """Проверяет, отозван ли токен.
+
+    Токен, который не был отозван, процесс помнит
+    JWT_DENY_LIST_LOCAL_TIMEOUT секунд и в это время не обращается
+    к общему кэшу. Отзыв в этом процессе очищает запись сразу,
+    в других - по истечении этого срока.
+
+    Args:
+        token (Token): Проверенный токен.
+        use_local (bool): Можно ли использовать кэш процесса.
+
+    Returns:
+        bool: True, если токен отозван при выходе или смене пароля.
+
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    if use_local and _not_revoked.get(jti):
+        return False
+    deny_key = f'jwt:deny:{jti}'
+    revoked_key = f'jwt:revoked:{token[api_settings.USER_ID_CLAIM]}'
+    entries = _get_cache().get_many((deny_key, revoked_key))
+    revoked_at = entries.get(revoked_key)
+    if deny_key in entries or (
+        revoked_at is not None
+        and token.get(AUTH_TIME_CLAIM, 0) <= revoked_at
+    ):
+        return True
+    if settings.JWT_DENY_LIST_LOCAL_TIMEOUT:
+        _not_revoked.set(jti, True)
+    return False
@@ -0,0 +1,101 @@
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Профиль одного запроса.
+
+    Собирает SQL-запросы с их длительностью, время сериализации
+    каждого поля сериализаторов и статистику cProfile.
+
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.view_name = None
+        self.queries = []
+        self.fields = defaultdict(lambda: [0, 0.0])
+        self.profiler = cProfile.Profile()
+        self.total = 0.0
+
+    def add_query(self, sql, params, duration):
+        self.queries.append((duration, sql, params))
+
+    def add_field_timing(self, serializer, field_name, duration):
+        timing = self.fields[f'{type(serializer).__name__}.{field_name}']
+        timing[0] += 1
+        timing[1] += duration
+
+    def get_report(self, limit=40):
+        """Формирует текстовый отчет о профилировании.
+
+        Args:
+            limit (int): Количество функций в выводе cProfile.
+
+        Returns:
+            str: Отчет.
+
+        """
+        output = io.StringIO()
+        db_time = sum(duration for duration, _, _ in self.queries)
+        output.write(
+            f'{self.view_name or "-"} {self.request.method} '
+            f'{self.request.get_full_path()}\n'
+            f'Total: {self.total * 1000:.2f} ms\n\n'
+            f'SQL: {len(self.queries)} queries, {db_time * 1000:.2f} ms\n'
+        )
+        for duration, sql, params in self.queries:
+            output.write(f'{duration * 1000:9.2f} ms  {sql}  {params!r}\n')
+        output.write('\nSerializer fields (calls, total):\n')
+        fields = sorted(
+            self.fields.items(), key=lambda item: item[1][1], reverse=True
+        )
+        for name, (calls, duration) in fields:
+            output.write(f'{duration * 1000:9.2f} ms  {calls:6}  {name}\n')
+        output.write('\n')
+        stats = pstats.Stats(self.profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    def save_report(self):
+        """Сохраняет отчет в каталог PROFILING_DIR.
+
+        Returns:
+            str: Путь к файлу отчета относительно PROFILING_DIR.
+
+        """
+        directory = self.view_name or 'unresolved'
+        os.makedirs(
+            os.path.join(settings.PROFILING_DIR, directory), exist_ok=True
+        )
+        path = os.path.join(
+            directory,
+            datetime.now().strftime('%Y%m%d-%H%M%S-%f') + '.txt'
+        )
+        with open(
+            os.path.join(settings.PROFILING_DIR, path), 'w', encoding='utf-8'
+        ) as report:
+            report.write(self.get_report())
+        return path
+
+
+def get_current_profile():
+    """Возвращает профиль текущего запроса или None."""
+    return _current_profile.get()
+
+
+def set_current_profile(profile):
+    return _current_profile.set(profile)
+
+
+def reset_current_profile(token):
+    _current_profile.reset(token)
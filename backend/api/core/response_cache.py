@@ -0,0 +1,182 @@
+import hashlib
+from functools import partial, wraps
+from time import monotonic, sleep, time
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from recipes.models import Ingredient, Tag
+from recipes.signals import recipes_changed
+
+VERSION_KEY = 'api:response:version'
+# Сколько секунд держится блокировка пересчета ответа и сколько
+# ждут ответа запросы, для которых в кэше ничего нет.
+LOCK_TIMEOUT = 10
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.05
+
+
+def get_response_cache():
+    return caches[settings.API_RESPONSE_CACHE]
+
+
+def get_version(cache):
+    """Возвращает текущую версию данных для кэша ответов.
+
+    Начальная версия берется из текущего времени: если ключ версии
+    вытеснен из кэша, новая версия не совпадет со старыми записями.
+
+    """
+    version = cache.get(VERSION_KEY)
+    if version is not None:
+        return version
+    cache.add(VERSION_KEY, int(time() * 1000), None)
+    return cache.get(VERSION_KEY)
+
+
+def bump_version():
+    """Помечает все закэшированные ответы устаревшими."""
+    cache = get_response_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version(cache)
+
+
+@receiver(recipes_changed)
+def recipes_changed_handler(sender, **kwargs):
+    bump_version()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def reference_changed(sender, **kwargs):
+    bump_version()
+
+
+def get_cache_key(request):
+    """Формирует ключ ответа по адресу, параметрам и формату.
+
+    Параметры строки запроса сортируются, чтобы '?a=1&b=2' и '?b=2&a=1'
+    попадали в одну запись.
+
+    """
+    query = urlencode(sorted(
+        parse_qsl(request.META.get('QUERY_STRING', ''), True)
+    ))
+    raw = '|'.join((
+        request.build_absolute_uri(request.path),
+        query,
+        request.accepted_media_type,
+    ))
+    return f'api:response:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def _build_response(entry, state):
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    response['X-Cache'] = state
+    return response
+
+
+def _wait_for_entry(cache, key, version):
+    deadline = monotonic() + WAIT_TIMEOUT
+    while monotonic() < deadline:
+        sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry
+    return None
+
+
+def _store(cache, key, lock_key, version, response):
+    cache.set(
+        key,
+        {
+            'version': version,
+            'expires_at': time() + settings.API_RESPONSE_CACHE_TIMEOUT,
+            'content': response.content,
+            'content_type': response['Content-Type'],
+        },
+        settings.API_RESPONSE_CACHE_TIMEOUT + settings.API_RESPONSE_CACHE_STALE
+    )
+    if lock_key:
+        cache.delete(lock_key)
+
+
+def get_cached_response(request, get_response):
+    """Возвращает ответ из кэша или вычисляет и кэширует его.
+
+    Запись свежая, пока не истекло API_RESPONSE_CACHE_TIMEOUT секунд
+    и не изменилась версия данных. Устаревшую запись пересчитывает
+    только один запрос, захвативший блокировку, а остальные в это время
+    получают устаревший ответ (stale-while-revalidate), если ему не
+    больше API_RESPONSE_CACHE_STALE секунд. Если записи нет совсем,
+    остальные запросы ждут ответа первого, а не обращаются к базе.
+
+    Args:
+        request (Request): Объект запроса.
+        get_response (Callable): Вычисляет ответ.
+
+    Returns:
+        HttpResponse: Ответ с заголовком X-Cache: HIT, STALE или MISS.
+
+    """
+    cache = get_response_cache()
+    key = get_cache_key(request)
+    version = get_version(cache)
+    entry = cache.get(key)
+    if (
+        entry is not None and entry['version'] == version
+        and time() < entry['expires_at']
+    ):
+        return _build_response(entry, 'HIT')
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if entry is not None:
+            return _build_response(entry, 'STALE')
+        entry = _wait_for_entry(cache, key, version)
+        if entry is not None:
+            return _build_response(entry, 'HIT')
+        lock_key = None
+    try:
+        response = get_response()
+    except Exception:
+        if lock_key:
+            cache.delete(lock_key)
+        raise
+    if response.status_code == 200:
+        response.add_post_render_callback(
+            partial(_store, cache, key, lock_key, version)
+        )
+    elif lock_key:
+        cache.delete(lock_key)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cache_anonymous_response(method):
+    """Декоратор действия вьюсета, кэширующий ответы анонимным пользователям.
+
+    Анонимные пользователи видят одинаковые страницы при одинаковых
+    параметрах, поэтому ответ целиком берется из кэша
+    (см. 'get_cached_response'). Кэш отключается настройкой
+    API_RESPONSE_CACHE_TIMEOUT = 0.
+
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        get_response = partial(method, self, request, *args, **kwargs)
+        if (
+            request.user.is_authenticated
+            or not settings.API_RESPONSE_CACHE_TIMEOUT
+        ):
+            return get_response()
+        return get_cached_response(request, get_response)
+    return wrapper
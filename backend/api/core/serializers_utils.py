@@ -1,15 +1,120 @@
 import base64
+from collections import OrderedDict
+from time import perf_counter
+from uuid import uuid4
 
 from django.core.files.base import ContentFile
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 from rest_framework.serializers import ImageField
 
+from .profiling import get_current_profile
+from .timing import get_current_timings
+
 
 class Base64ImageField(ImageField):
-    """Сериализатор преобразования строки в изображение."""
+    """Сериализатор преобразования строки в изображение.
+
+    Файлу дается случайное имя: по одному адресу всегда отдается одна
+    и та же картинка, и nginx кэширует /media/ как неизменяемые файлы.
+
+    """
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = ContentFile(
+                base64.b64decode(imgstr), name=f'{uuid4().hex}.{ext}'
+            )
         return super().to_internal_value(data)
+
+
+class SparseFieldsetMixin:
+    """Миксин, выводящий только поля, запрошенные параметрами запроса.
+
+    Набор полей 'RecipeFieldset' передается в контексте под ключом
+    'fieldset'. Свернутые связи заменяются полями из
+    'get_collapsed_fields'.
+
+    """
+
+    def get_collapsed_fields(self):
+        return {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return fields
+        collapsed = self.get_collapsed_fields()
+        return OrderedDict(
+            (
+                name,
+                field if name not in collapsed or fieldset.expands(name)
+                else collapsed[name]
+            )
+            for name, field in fields.items() if fieldset.includes(name)
+        )
+
+
+class TimedSerializerMixin:
+    """Миксин, учитывающий время сериализации в замерах запроса.
+
+    Вложенные сериализаторы не учитываются повторно: время считается
+    только для внешнего вызова 'to_representation'. Если запрос
+    профилируется, дополнительно замеряется время каждого поля.
+
+    """
+
+    def to_representation(self, instance):
+        timings = get_current_timings()
+        if timings is None:
+            return self.represent(instance)
+        timings.serializer_depth += 1
+        started = perf_counter()
+        try:
+            return self.represent(instance)
+        finally:
+            timings.serializer_depth -= 1
+            if not timings.serializer_depth:
+                timings.serializer += perf_counter() - started
+
+    def represent(self, instance):
+        profile = get_current_profile()
+        if profile is None:
+            return super().to_representation(instance)
+        return self.profile_representation(instance, profile)
+
+    def profile_representation(self, instance, profile):
+        """Сериализует объект, замеряя время каждого поля.
+
+        Повторяет 'Serializer.to_representation' из DRF.
+
+        Args:
+            instance (Model): Сериализуемый объект.
+            profile (RequestProfile): Профиль текущего запроса.
+
+        Returns:
+            ret (OrderedDict): Данные объекта.
+
+        """
+        ret = OrderedDict()
+        for field in self._readable_fields:
+            started = perf_counter()
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = (
+                attribute.pk if isinstance(attribute, PKOnlyObject)
+                else attribute
+            )
+            if check_for_none is None:
+                ret[field.field_name] = None
+            else:
+                ret[field.field_name] = field.to_representation(attribute)
+            profile.add_field_timing(
+                self, field.field_name, perf_counter() - started
+            )
+        return ret
@@ -0,0 +1,145 @@
+import contextvars
+from time import perf_counter
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+_query_observers = contextvars.ContextVar('query_observers', default=())
+
+
+def observe_query(execute, sql, params, many, context):
+    """Передает SQL-запрос наблюдателям текущего контекста.
+
+    Подключается ко всем соединениям с базой. Наблюдатели хранятся
+    в contextvars, поэтому видят запросы и из потоков, в которых
+    асинхронные представления выполняют работу с ORM.
+
+    """
+    observers = _query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - started
+        for observer in observers:
+            observer.add_query(sql, params, duration)
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """Подключает 'observe_query' к новому соединению с базой."""
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+def add_query_observer(observer):
+    """Начинает передавать наблюдателю SQL-запросы текущего контекста.
+
+    Args:
+        observer: Объект с методом 'add_query(sql, params, duration)'.
+
+    Returns:
+        Token: Токен для 'remove_query_observer'.
+
+    """
+    return _query_observers.set(_query_observers.get() + (observer,))
+
+
+def remove_query_observer(token):
+    _query_observers.reset(token)
+
+
+def get_view_name(view_func, method):
+    """Определяет имя вьюсета и действия, обрабатывающих запрос.
+
+    Args:
+        view_func (function): Функция представления из URL-маршрута.
+        method (str): HTTP-метод запроса.
+
+    Returns:
+        str: Имя вида 'RecipeViewSet.download_shopping_cart'.
+
+    """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class RequestTimings:
+    """Замеры времени обработки одного запроса.
+
+    Как наблюдатель SQL-запросов считает их количество и общее время.
+    Время указывается в секундах.
+
+    """
+
+    def __init__(self):
+        self.view_name = None
+        self.queries = 0
+        self.db = 0.0
+        self.view = 0.0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        self.view_started = None
+        self.render_started = None
+        self.serializer_depth = 0
+
+    def add_query(self, sql, params, duration):
+        self.db += duration
+        self.queries += 1
+
+    def start_view(self, view_name):
+        self.view_name = view_name
+        self.view_started = perf_counter()
+
+    def start_render(self):
+        self.render_started = perf_counter()
+        if self.view_started is not None:
+            self.view = self.render_started - self.view_started
+
+    def finish_render(self):
+        self.render = perf_counter() - self.render_started
+
+    def finish(self, started):
+        finished = perf_counter()
+        self.total = finished - started
+        if self.view_started is not None and self.render_started is None:
+            self.view = finished - self.view_started
+
+    def as_header(self):
+        """Формирует значение заголовка Server-Timing (в миллисекундах)."""
+        return ', '.join((
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f'view;dur={self.view * 1000:.2f}',
+            f'serializer;dur={self.serializer * 1000:.2f}',
+            f'render;dur={self.render * 1000:.2f}',
+            f'total;dur={self.total * 1000:.2f}',
+        ))
+
+    def as_log(self):
+        """Формирует строку лога вида 'ключ=значение' (в миллисекундах)."""
+        return ' '.join((
+            f'view_name={self.view_name or "-"}',
+            f'queries={self.queries}',
+            f'db_ms={self.db * 1000:.2f}',
+            f'view_ms={self.view * 1000:.2f}',
+            f'serializer_ms={self.serializer * 1000:.2f}',
+            f'render_ms={self.render * 1000:.2f}',
+            f'total_ms={self.total * 1000:.2f}',
+        ))
+
+
+def get_current_timings():
+    """Возвращает замеры текущего запроса или None, если он не замеряется."""
+    return _current_timings.get()
+
+
+def set_current_timings(timings):
+    return _current_timings.set(timings)
+
+
+def reset_current_timings(token):
+    _current_timings.reset(token)
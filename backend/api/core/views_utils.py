@@ -60,12 +60,12 @@ def get_paginated_queryset(self, serializer_class, queryset, request):
         serializer = serializer_class(
             page,
             many=True,
-            context={'request': request})
+            context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
     serializer = serializer_class(
         queryset,
         many=True,
-        context={'request': request})
+        context=self.get_serializer_context())
     return response.Response(serializer.data)
 
 
@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django_filters.fields import MultipleChoiceField
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Ingredient, Recipe, TagRecipe
+from recipes.search import search_recipes
+from recipes.similarity import get_similar_recipes
+from recipes.tags import find_tag_ids, get_tags_mask
 from users.models import CustomUser
 
 STATUS_CHOICES = (
@@ -8,17 +14,26 @@ STATUS_CHOICES = (
 )
 
 
+class AnyMultipleChoiceField(MultipleChoiceField):
+    """Список значений без проверки по вариантам выбора."""
+
+    def valid_value(self, value):
+        return True
+
+
+class SlugsFilter(filters.MultipleChoiceFilter):
+    """Фильтр по нескольким слагам: неизвестные слаги не ошибка."""
+
+    field_class = AnyMultipleChoiceField
+
+
 class RecipeFilterSet(FilterSet):
     """Набор фильтров для запросов к модели Recipe."""
 
     author = filters.ModelChoiceFilter(
         queryset=CustomUser.objects.all()
     )
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug'
-    )
+    tags = SlugsFilter(method='get_tags')
     is_favorited = filters.ChoiceFilter(
         method='get_is_favorited',
         choices=STATUS_CHOICES
@@ -26,6 +41,8 @@ class RecipeFilterSet(FilterSet):
     is_in_shopping_cart = filters.ChoiceFilter(
         method='get_is_in_shopping_cart',
         choices=STATUS_CHOICES)
+    search = filters.CharFilter(method='get_search')
+    similar_to = filters.NumberFilter(method='get_similar_to')
 
     class Meta:
         model = Recipe
@@ -34,6 +51,38 @@ class RecipeFilterSet(FilterSet):
             'tags',
         )
 
+    def get_tags(self, queryset, name, value):
+        """Определяет работу фильтрации по тэгам.
+
+        Слаги переводятся в id тэгов по кэшированному словарю,
+        неизвестные слаги ничего не отбирают. Рецепт
+        отбирается, если у него есть хотя бы один из выбранных тэгов:
+        через подзапрос EXISTS к TagRecipe, без соединения таблиц
+        и дублей в выдаче, либо по маске тэгов рецепта, если
+        включена настройка RECIPE_TAGS_BITMASK.
+
+        Args:
+            queryset (list[Recipe]): Список филтруемых рецептов.
+            name (str): Имя фильтра.
+            value (list[str]): Слаги выбранных тэгов.
+
+        Returns:
+            queryset (list[Recipe]): Список рецептов с выбранными тэгами.
+
+        """
+        ids = find_tag_ids(value)
+        mask = get_tags_mask(ids) if settings.RECIPE_TAGS_BITMASK else None
+        if mask is not None:
+            return queryset.alias(
+                tags_matched=F('tags_mask').bitand(mask)
+            ).filter(tags_matched__gt=0)
+        return queryset.filter(
+            Exists(TagRecipe.objects.filter(
+                recipe=OuterRef('pk'),
+                tag_id__in=ids
+            ))
+        )
+
     def get_is_favorited(self, queryset, name, value):
         """Определяет работу фильтрации по избранному.
 
@@ -74,6 +123,43 @@ class RecipeFilterSet(FilterSet):
             return queryset.filter(shopping_cart__user=user)
         return queryset
 
+    def get_search(self, queryset, name, value):
+        """Определяет работу полнотекстового поиска.
+
+        Ищет слова запроса в названии, описании и ингредиентах рецепта.
+
+        Args:
+            queryset (list[Recipe]): Список филтруемых рецептов.
+            name (str): Имя фильтра.
+            value (str): Поисковая строка.
+
+        Returns:
+            queryset (list[Recipe]): Список найденных рецептов,
+                отсортированный по релевантности.
+
+        """
+        return search_recipes(queryset, value)
+
+    def get_similar_to(self, queryset, name, value):
+        """Определяет работу фильтрации по сходству ингредиентов.
+
+        Похожие рецепты ищутся по индексу MinHash, а не сравнением
+        со всеми рецептами.
+
+        Args:
+            queryset (list[Recipe]): Список филтруемых рецептов.
+            name (str): Имя фильтра.
+            value (Decimal): id рецепта, с которым сравниваются рецепты.
+
+        Returns:
+            queryset (list[Recipe]): Список рецептов с похожим набором
+                ингредиентов.
+
+        """
+        return queryset.filter(id__in=[
+            recipe_id for recipe_id, _ in get_similar_recipes(int(value))
+        ])
+
 
 class IngredientFilterSet(FilterSet):
     """Набор фильтров для запросов к модели Ingredient."""
@@ -0,0 +1,67 @@
+import gzip
+from time import perf_counter
+
+from api.core.fieldsets import RecipeFieldset
+from api.renderers import MessagePackRenderer, ORJSONRenderer
+from api.serializers import RecipeReadSerializer
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Recipe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+RENDERERS = (
+    ('json (stdlib)', JSONRenderer),
+    ('json (orjson)', ORJSONRenderer),
+    ('msgpack', MessagePackRenderer),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга и размер ответа /api/recipes/ '
+        'для разных рендереров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help='Количество рецептов на странице.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Количество повторов рендеринга.'
+        )
+
+    def handle(self, *args, **options):
+        # Данные собираются сериализатором, а не запросом к вьюсету:
+        # ответ из кэша ответов API уже отрендерен и не содержит data.
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        fieldset = RecipeFieldset()
+        recipes = fieldset.prepare_queryset(
+            Recipe.objects.order_by('-id'), request.user
+        )[:options['limit']]
+        data = RecipeReadSerializer(
+            recipes,
+            many=True,
+            context={'request': request, 'fieldset': fieldset}
+        ).data
+        if not data:
+            raise CommandError('В базе нет рецептов.')
+        self.stdout.write(
+            f'{len(data)} рецептов /api/recipes/, '
+            f'{options["repeat"]} повторов'
+        )
+        self.stdout.write(
+            f'{"рендерер":<15} {"мс":>8} {"байт":>9} {"gzip":>9}'
+        )
+        for name, renderer_class in RENDERERS:
+            renderer = renderer_class()
+            started = perf_counter()
+            for _ in range(options['repeat']):
+                content = renderer.render(data)
+            duration = (perf_counter() - started) / options['repeat']
+            self.stdout.write(
+                f'{name:<15} {duration * 1000:8.3f} {len(content):9} '
+                f'{len(gzip.compress(content)):9}'
+            )
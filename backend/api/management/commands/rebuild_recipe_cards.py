@@ -0,0 +1,18 @@
+from api.core.cards import update_recipe_cards
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Строит карточки рецептов для API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество рецептов в одной выборке.'
+        )
+
+    def handle(self, *args, **options):
+        documents = update_recipe_cards(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Построено карточек: {len(documents)}.')
+        )
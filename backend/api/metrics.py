@@ -0,0 +1,68 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_api_request_duration_seconds',
+    'Время обработки запроса к API.',
+    ('view', 'method'),
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5,
+        0.75, 1.0, 1.5, 2.5, 5.0, 10.0,
+    )
+)
+REQUEST_QUERIES = Histogram(
+    'foodgram_api_request_queries',
+    'Количество SQL-запросов на один запрос к API.',
+    ('view',),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233)
+)
+REQUEST_ERRORS = Counter(
+    'foodgram_api_request_errors',
+    'Количество ответов API с кодом 4xx и 5xx.',
+    ('view', 'status')
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'foodgram_api_requests_in_flight',
+    'Количество запросов к API, обрабатываемых в данный момент.',
+    ('view',),
+    multiprocess_mode='livesum'
+)
+
+
+def get_registry():
+    """Возвращает реестр метрик для выгрузки.
+
+    Под gunicorn каждый воркер пишет метрики в свои mmap-файлы
+    в каталоге PROMETHEUS_MULTIPROC_DIR, и при выгрузке они
+    собираются вместе. Без этой переменной окружения используется
+    реестр текущего процесса.
+
+    Returns:
+        CollectorRegistry: Реестр метрик.
+
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics(request):
+    """Отдает метрики в текстовом формате Prometheus.
+
+    Args:
+        request (HttpRequest): Объект запроса.
+
+    Returns:
+        HttpResponse: Ответ с метриками.
+
+    """
+    return HttpResponse(
+        generate_latest(get_registry()),
+        content_type=CONTENT_TYPE_LATEST
+    )
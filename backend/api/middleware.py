@@ -0,0 +1,357 @@
+import asyncio
+import hashlib
+import logging
+import random
+from time import perf_counter, time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from backend.db.routers import (ReplicaRouting, reset_current_routing,
+                                set_current_routing)
+
+from .core.profiling import (RequestProfile, get_current_profile,
+                             reset_current_profile, set_current_profile)
+from .core.timing import (RequestTimings, add_query_observer,
+                          get_current_timings, get_view_name,
+                          remove_query_observer, reset_current_timings,
+                          set_current_timings)
+from .metrics import (REQUEST_ERRORS, REQUEST_LATENCY, REQUEST_QUERIES,
+                      REQUESTS_IN_FLIGHT)
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:
+    # asgiref < 3.6: отметка, которую ставит Django до версии 4.2.
+    from asyncio import iscoroutinefunction
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+logger = logging.getLogger('api.timing')
+
+
+class ApiMiddleware:
+    """Базовый класс middleware для запросов к API.
+
+    Работает и под WSGI, и под ASGI, не занимая поток на время
+    асинхронного запроса. Наследники определяют методы:
+    'start' - начинает обработку и возвращает её состояние или None,
+    если запрос обрабатывать не нужно ('astart' - его асинхронная версия,
+    по умолчанию совпадает с 'start'); 'stop' - вызывается всегда после
+    получения ответа; 'finish' - дополняет или заменяет ответ.
+
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = None
+        if request.path.startswith('/api/'):
+            state = self.start(request)
+        if state is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(request, state)
+        return self.finish(request, state, response)
+
+    async def __acall__(self, request):
+        state = None
+        if request.path.startswith('/api/'):
+            state = await self.astart(request)
+        if state is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(request, state)
+        return self.finish(request, state, response)
+
+    @property
+    def is_async(self):
+        return iscoroutinefunction(self.get_response)
+
+    def start(self, request):
+        raise NotImplementedError
+
+    async def astart(self, request):
+        return self.start(request)
+
+    def stop(self, request, state):
+        pass
+
+    def finish(self, request, state, response):
+        return response
+
+
+class ServerTimingMiddleware(ApiMiddleware):
+    """Замеряет время обработки запросов к API.
+
+    Для доли запросов, заданной настройкой SERVER_TIMING_SAMPLE_RATE,
+    считает количество и время SQL-запросов, время работы представления,
+    сериализаторов и рендеринга ответа. Результат добавляется в заголовок
+    Server-Timing и пишется в лог 'api.timing' с именем вьюсета и действия.
+
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 1.0)
+
+    def start(self, request):
+        if random.random() >= self.sample_rate:
+            return None
+        timings = RequestTimings()
+        return (
+            timings,
+            add_query_observer(timings),
+            set_current_timings(timings),
+            perf_counter()
+        )
+
+    def stop(self, request, state):
+        timings, queries_token, token, started = state
+        reset_current_timings(token)
+        remove_query_observer(queries_token)
+        timings.finish(started)
+
+    def finish(self, request, state, response):
+        timings = state[0]
+        response['Server-Timing'] = timings.as_header()
+        logger.info(
+            'method=%s path=%s status=%s %s',
+            request.method,
+            request.path,
+            response.status_code,
+            timings.as_log()
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = get_current_timings()
+        if timings is not None:
+            timings.start_view(get_view_name(view_func, request.method))
+
+    def process_template_response(self, request, response):
+        timings = get_current_timings()
+        if timings is not None:
+            timings.start_render()
+            response.add_post_render_callback(
+                lambda response: timings.finish_render()
+            )
+        return response
+
+
+class QueryCounter:
+    """Считает выполненные SQL-запросы."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def add_query(self, sql, params, duration):
+        self.queries += 1
+
+
+class MetricsMiddleware(ApiMiddleware):
+    """Собирает метрики Prometheus по запросам к API.
+
+    Для каждого действия вьюсета считает гистограммы времени ответа
+    и количества SQL-запросов, ответы с ошибками и число запросов,
+    обрабатываемых в данный момент.
+
+    """
+
+    def start(self, request):
+        counter = QueryCounter()
+        return counter, add_query_observer(counter), perf_counter()
+
+    def stop(self, request, state):
+        remove_query_observer(state[1])
+        view_name = getattr(request, 'metrics_view_name', None)
+        if view_name is not None:
+            REQUESTS_IN_FLIGHT.labels(view_name).dec()
+
+    def finish(self, request, state, response):
+        counter, _, started = state
+        view_name = getattr(request, 'metrics_view_name', 'unresolved')
+        REQUEST_LATENCY.labels(view_name, request.method).observe(
+            perf_counter() - started
+        )
+        REQUEST_QUERIES.labels(view_name).observe(counter.queries)
+        if response.status_code >= 400:
+            REQUEST_ERRORS.labels(view_name, response.status_code).inc()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.path.startswith('/api/'):
+            request.metrics_view_name = get_view_name(
+                view_func, request.method
+            )
+            REQUESTS_IN_FLIGHT.labels(request.metrics_view_name).inc()
+
+
+class ProfilingMiddleware(ApiMiddleware):
+    """Профилирует запросы к API по требованию служебного персонала.
+
+    Профилирование включается заголовком 'X-Profile' или параметром
+    'profile' в строке запроса. Со значением 'return' вместо ответа
+    возвращается текстовый отчет, с любым другим значением отчет
+    сохраняется в каталог PROFILING_DIR, а путь к нему передается
+    в заголовке 'X-Profile-Report'. Под ASGI профилировщик включается
+    в потоке, где выполняется представление.
+
+    """
+
+    def start(self, request):
+        mode = self.get_mode(request)
+        if not mode or not self.is_staff(request):
+            return None
+        return self.begin(request, mode)
+
+    async def astart(self, request):
+        mode = self.get_mode(request)
+        if not mode or not await sync_to_async(self.is_staff)(request):
+            return None
+        return self.begin(request, mode)
+
+    def get_mode(self, request):
+        return request.headers.get('X-Profile') or request.GET.get('profile')
+
+    def begin(self, request, mode):
+        profile = RequestProfile(request)
+        queries_token = add_query_observer(profile)
+        token = set_current_profile(profile)
+        if not self.is_async:
+            profile.profiler.enable()
+        return profile, mode, queries_token, token, perf_counter()
+
+    def stop(self, request, state):
+        profile, _, queries_token, token, started = state
+        if not self.is_async:
+            profile.profiler.disable()
+        reset_current_profile(token)
+        remove_query_observer(queries_token)
+        profile.total = perf_counter() - started
+
+    def finish(self, request, state, response):
+        profile, mode = state[:2]
+        if mode == 'return':
+            return HttpResponse(
+                profile.get_report(), content_type='text/plain; charset=utf-8'
+            )
+        response['X-Profile-Report'] = profile.save_report()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = get_current_profile()
+        if profile is not None:
+            profile.view_name = get_view_name(view_func, request.method)
+
+    def is_staff(self, request):
+        """Проверяет, что запрос сделан служебным персоналом.
+
+        Токен проверяется теми же классами аутентификации, что и в API,
+        потому что до вызова представления DRF пользователь ещё не
+        определен.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            bool: True, если пользователь - служебный персонал.
+
+        """
+        if request.user.is_staff:
+            return True
+        drf_request = Request(
+            request,
+            authenticators=[
+                authenticator()
+                for authenticator
+                in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ]
+        )
+        try:
+            return drf_request.user.is_staff
+        except APIException:
+            return False
+
+
+class ReplicaMiddleware(ApiMiddleware):
+    """Разрешает читать из реплик базы запросам, которые ничего не меняют.
+
+    После запроса с записью клиент на PRIMARY_STICKINESS_WINDOW секунд
+    закрепляется за основной базой, чтобы сразу видеть свои изменения,
+    пока они доходят до реплик. Закрепление хранится в cookie и, для
+    клиентов без cookie, в общем кэше PRIMARY_STICKINESS_CACHE по токену
+    из заголовка Authorization.
+
+    """
+
+    cookie_name = 'primary_db_until'
+
+    def start(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        routing = ReplicaRouting(
+            request.method in SAFE_METHODS and not self.is_pinned(request)
+        )
+        return routing, set_current_routing(routing)
+
+    def stop(self, request, state):
+        reset_current_routing(state[1])
+
+    def finish(self, request, state, response):
+        if state[0].wrote:
+            self.pin(request, response)
+        return response
+
+    def get_cache(self):
+        return caches[settings.PRIMARY_STICKINESS_CACHE]
+
+    def get_cache_key(self, request):
+        authorization = request.headers.get('Authorization')
+        if not authorization:
+            return None
+        return 'db:primary:{}'.format(
+            hashlib.sha256(authorization.encode()).hexdigest()
+        )
+
+    def is_pinned(self, request):
+        try:
+            if float(request.COOKIES.get(self.cookie_name, 0)) > time():
+                return True
+        except ValueError:
+            pass
+        key = self.get_cache_key(request)
+        return key is not None and self.get_cache().get(key) is not None
+
+    def pin(self, request, response):
+        window = settings.PRIMARY_STICKINESS_WINDOW
+        response.set_cookie(
+            self.cookie_name,
+            str(time() + window),
+            max_age=window,
+            httponly=True,
+            samesite='Lax'
+        )
+        key = self.get_cache_key(request)
+        if key is not None:
+            self.get_cache().set(key, True, window)
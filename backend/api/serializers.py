@@ -1,13 +1,21 @@
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from users.models import CustomUser, Subscribe
 
-from .core.serializers_utils import Base64ImageField
+from .authentication import invalidate_user_tokens
+from .core.jwt_utils import (AUTH_TIME_CLAIM, get_access_token, is_revoked,
+                             revoke_user_tokens)
+from .core.serializers_utils import (Base64ImageField, SparseFieldsetMixin,
+                                     TimedSerializerMixin)
 
 
-class UserCreateSerializer(UserCreateSerializer):
+class UserCreateSerializer(TimedSerializerMixin, UserCreateSerializer):
     """Сериализатор для создания объекта модели CustomUser."""
 
     class Meta:
@@ -57,7 +65,7 @@ class UserCreateSerializer(UserCreateSerializer):
         return user
 
 
-class UserReadSerialzer(UserSerializer):
+class UserReadSerialzer(TimedSerializerMixin, UserSerializer):
     """Сериализатор для чтения объектов модели CustomUser."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -93,6 +101,8 @@ class UserReadSerialzer(UserSerializer):
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Subscribe.objects.filter(
             subscribing=obj, user=request.user
         ).exists()
@@ -140,11 +150,63 @@ class SetPasswordSerializer(serializers.Serializer):
 
         """
         instance.set_password(validated_data['new_password'])
-        instance.save()
+        instance.save(update_fields=('password',))
+        invalidate_user_tokens(instance)
+        revoke_user_tokens(instance)
         return instance
 
 
-class TagSerialzer(serializers.ModelSerializer):
+class JWTRefreshSerializer(serializers.Serializer):
+    """Сериализатор для обновления токена доступа JWT."""
+
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        """Проверяет токен обновления.
+
+        Args:
+            value (str): Токен обновления.
+
+        Returns:
+            RefreshToken: Проверенный токен.
+
+        Raises:
+            ValidationError: Если токен недействителен или отозван.
+
+        """
+        try:
+            token = RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError('Недействительный токен.')
+        # Токены обновления проверяются редко, поэтому всегда по общему
+        # кэшу: отозванный в другом процессе токен сразу недействителен.
+        if is_revoked(token, use_local=False):
+            raise serializers.ValidationError('Токен отозван.')
+        return token
+
+    def validate(self, data):
+        """Находит пользователя токена обновления.
+
+        Raises:
+            ValidationError: Если пользователь удален или заблокирован.
+
+        """
+        refresh = data['refresh']
+        data['user'] = CustomUser.objects.filter(
+            pk=refresh[jwt_settings.USER_ID_CLAIM], is_active=True
+        ).first()
+        if data['user'] is None:
+            raise serializers.ValidationError('Пользователь не найден.')
+        return data
+
+    def to_representation(self, data):
+        access = get_access_token(
+            data['user'], data['refresh'].get(AUTH_TIME_CLAIM)
+        )
+        return {'auth_token': str(access)}
+
+
+class TagSerialzer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для работы с моделью Tag."""
 
     class Meta:
@@ -152,7 +214,7 @@ class TagSerialzer(serializers.ModelSerializer):
         fields = ('id', 'name', 'color', 'slug')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для работы с моделью Ingredient."""
 
     class Meta:
@@ -182,7 +244,9 @@ class IngredientRcipeSerialzier(serializers.ModelSerializer):
         fields = ('recipe', 'id', 'amount')
 
 
-class IngredientRecipeReadSerializer(serializers.ModelSerializer):
+class IngredientRecipeReadSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для работы с моделью IngredientRecipe.
 
     Отображает поля ингредиентов и их количество
@@ -202,7 +266,9 @@ class IngredientRecipeReadSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeCerateSerializer(serializers.ModelSerializer):
+class RecipeCerateSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для создания или обновления объекта модели Recipe."""
 
     author = UserReadSerialzer(read_only=True)
@@ -273,6 +339,7 @@ class RecipeCerateSerializer(serializers.ModelSerializer):
             )
         return tags
 
+    @transaction.atomic
     def create(self, validated_data):
         """Создаёт  рецепт.
 
@@ -299,6 +366,7 @@ class RecipeCerateSerializer(serializers.ModelSerializer):
         )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Изменяет рецепт.
 
@@ -351,8 +419,25 @@ class RecipeCerateSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
-    """Сериализатор для чтения объектов модели Recipe."""
+class IngredientRecipeIdSerializer(serializers.ModelSerializer):
+    """Сериализатор ингредиента рецепта без названия и единиц измерения."""
+
+    id = serializers.ReadOnlyField(source='ingredient_id')
+
+    class Meta:
+        model = IngredientRecipe
+        fields = ('id', 'amount')
+
+
+class RecipeReadSerializer(
+    SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
+    """Сериализатор для чтения объектов модели Recipe.
+
+    Поддерживает выбор полей параметрами fields и expand
+    (см. 'RecipeFieldset').
+
+    """
 
     author = UserReadSerialzer(read_only=True)
     ingredients = IngredientRecipeReadSerializer(
@@ -378,6 +463,17 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart'
         )
 
+    def get_collapsed_fields(self):
+        return {
+            'tags': serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True
+            ),
+            'author': serializers.ReadOnlyField(source='author_id'),
+            'ingredients': IngredientRecipeIdSerializer(
+                many=True, source='ingredient_recipe'
+            ),
+        }
+
     def get_is_favorited(self, obj):
         """Определяет, добавлен ли рецепт в избранное текущего пользоватлея.
 
@@ -389,6 +485,10 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
         """
         request = self.context.get('request')
+        if request.user.is_anonymous:
+            return False
+        if hasattr(obj, 'user_favorite'):
+            return bool(obj.user_favorite)
         return Favorite.objects.filter(
             user=request.user.id,
             recipe=obj
@@ -405,13 +505,55 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
         """
         request = self.context.get('request')
+        if request.user.is_anonymous:
+            return False
+        if hasattr(obj, 'user_shopping_cart'):
+            return bool(obj.user_shopping_cart)
         return ShoppingCart.objects.filter(
             user=request.user.id,
             recipe=obj
         ).exists()
 
 
-class RecipeShortListSerializer(serializers.ModelSerializer):
+class CardAuthorSerializer(UserReadSerialzer):
+    """Сериализатор автора в карточке рецепта, без подписки."""
+
+    class Meta(UserReadSerialzer.Meta):
+        fields = (
+            'id',
+            'email',
+            'username',
+            'first_name',
+            'last_name',
+        )
+
+
+class RecipeCardSerializer(RecipeReadSerializer):
+    """Сериализатор карточки рецепта.
+
+    Формирует представление рецепта без полей, зависящих от текущего
+    пользователя. Картинка выводится относительной ссылкой.
+
+    """
+
+    author = CardAuthorSerializer(read_only=True)
+
+    class Meta(RecipeReadSerializer.Meta):
+        fields = (
+            'id',
+            'tags',
+            'author',
+            'ingredients',
+            'name',
+            'image',
+            'text',
+            'cooking_time',
+        )
+
+
+class RecipeShortListSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для работы моделью Recipe.
 
     Используется там, где для чтения нужно вывести
@@ -541,7 +683,7 @@ class SubscribeSerializer(UserReadSerialzer):
 
         """
         limit = self.context.get('request').GET.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=obj)
+        recipes = Recipe.objects.filter(author=obj).order_by('-id')
         if limit:
             recipes = recipes[:int(limit)]
         serializer = RecipeShortListSerializer(recipes, many=True)
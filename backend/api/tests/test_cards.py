@@ -0,0 +1,110 @@
+import json
+
+from django.test import TestCase
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, RecipeCard,
+                            Tag, TagRecipe)
+from rest_framework.test import APIClient
+from users.models import CustomUser
+
+
+class RecipeCardsTestCase(TestCase):
+    """Карточки рецептов перестраиваются после изменения рецепта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create(
+            username='cook', email='cook@example.com', first_name='Иван'
+        )
+        cls.flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        # Карточки строит обработчик recipes_changed.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.bread = cls.create_recipe('Хлеб', cls.flour)
+            cls.soup = cls.create_recipe('Суп', cls.salt)
+
+    @classmethod
+    def create_recipe(cls, name, ingredient):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Описание', cooking_time=30
+        )
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=100
+        )
+        TagRecipe.objects.create(recipe=recipe, tag=cls.tag)
+        return recipe
+
+    def get_card(self, recipe):
+        return json.loads(
+            RecipeCard.objects.get(recipe=recipe).document
+        )
+
+    def test_cards_built_on_create(self):
+        card = self.get_card(self.bread)
+        self.assertEqual(card['name'], 'Хлеб')
+        self.assertEqual(card['author']['first_name'], 'Иван')
+        self.assertEqual(
+            [(item['name'], item['amount']) for item in card['ingredients']],
+            [('мука', 100)]
+        )
+        self.assertEqual([tag['slug'] for tag in card['tags']], ['breakfast'])
+
+    def test_recipe_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bread.name = 'Батон'
+            self.bread.save()
+            IngredientRecipe.objects.filter(recipe=self.bread).update(
+                amount=250
+            )
+            IngredientRecipe.objects.create(
+                recipe=self.bread, ingredient=self.salt, amount=5
+            )
+        card = self.get_card(self.bread)
+        self.assertEqual(card['name'], 'Батон')
+        self.assertEqual(
+            [(item['name'], item['amount']) for item in card['ingredients']],
+            [('мука', 250), ('соль', 5)]
+        )
+
+    def test_ingredient_change(self):
+        soup_card = RecipeCard.objects.get(recipe=self.soup).document
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour.name = 'мука пшеничная'
+            self.flour.save()
+        self.assertEqual(
+            self.get_card(self.bread)['ingredients'][0]['name'],
+            'мука пшеничная'
+        )
+        self.assertEqual(
+            RecipeCard.objects.get(recipe=self.soup).document, soup_card
+        )
+
+    def test_tag_and_author_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = 'Ранний завтрак'
+            self.tag.save()
+            self.author.first_name = 'Пётр'
+            self.author.save()
+        for recipe in (self.bread, self.soup):
+            card = self.get_card(recipe)
+            self.assertEqual(card['tags'][0]['name'], 'Ранний завтрак')
+            self.assertEqual(card['author']['first_name'], 'Пётр')
+
+    def test_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bread.delete()
+        self.assertFalse(RecipeCard.objects.filter(recipe_id=self.bread.id))
+
+    def test_list_matches_serializer(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with self.settings(RECIPE_CARDS=False):
+            expected = client.get('/api/recipes/').data
+        with self.settings(RECIPE_CARDS=True):
+            self.assertEqual(client.get('/api/recipes/').data, expected)
@@ -0,0 +1,170 @@
+from django.test import TestCase
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+from recipes.signals import mark_recipes_changed
+from recipes.tags import TAGS_MASK_BITS
+from rest_framework.test import APIClient
+from users.models import CustomUser
+
+
+class RecipeSearchTestCase(TestCase):
+    """Полнотекстовый поиск рецептов параметром search."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        beet = Ingredient.objects.create(
+            name='свекла для борща', measurement_unit='г'
+        )
+        # Поисковый индекс обновляется обработчиком recipes_changed.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.in_name = cls.create_recipe(
+                'Борщ украинский', 'Суп на бульоне'
+            )
+            cls.in_ingredients = cls.create_recipe('Суп дня', 'Сварить')
+            IngredientRecipe.objects.create(
+                recipe=cls.in_ingredients, ingredient=beet, amount=100
+            )
+            cls.in_text = cls.create_recipe('Щи', 'Почти как борщ')
+            cls.create_recipe('Плов', 'Рис с морковью')
+
+    @classmethod
+    def create_recipe(cls, name, text):
+        return Recipe.objects.create(
+            author=cls.user, name=name, text=text, cooking_time=30
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get('/api/recipes/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_ranked_by_field_weight(self):
+        self.assertEqual(
+            self.search('борщ'),
+            [self.in_name.id, self.in_ingredients.id, self.in_text.id]
+        )
+
+    def test_words_are_prefixes(self):
+        self.assertEqual(
+            set(self.search('БОР')),
+            {self.in_name.id, self.in_ingredients.id, self.in_text.id}
+        )
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('борщ украинский'), [self.in_name.id])
+        self.assertEqual(self.search('борщ плов'), [])
+
+    def test_punctuation_only_query_is_ignored(self):
+        self.assertEqual(len(self.search('?!')), 4)
+
+    def test_index_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.filter(id=self.in_text.id).update(name='Борщ')
+            mark_recipes_changed((self.in_text.id,))
+        self.assertEqual(self.search('щи'), [])
+        self.assertEqual(self.search('борщ')[0], self.in_text.id)
+
+
+class RecipeTagsFilterTestCase(TestCase):
+    """Фильтр по тэгам: подзапрос EXISTS и маска тэгов отбирают одно и то же.
+
+    Тэг с id за пределами маски проверяет переход маски на EXISTS.
+
+    """
+
+    RECIPE_TAGS = (
+        ('breakfast',),
+        ('lunch',),
+        ('breakfast', 'lunch'),
+        ('dinner',),
+        (),
+        ('late',),
+        ('breakfast', 'late'),
+    )
+    QUERIES = (
+        ['breakfast'],
+        ['lunch'],
+        ['breakfast', 'lunch'],
+        ['dinner', 'lunch', 'breakfast'],
+        ['unknown'],
+        ['breakfast', 'unknown'],
+        ['late'],
+        ['late', 'dinner'],
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        tags = {
+            slug: Tag.objects.create(
+                name=slug, color=f'#00000{number}', slug=slug
+            )
+            for number, slug in enumerate(('breakfast', 'lunch', 'dinner'))
+        }
+        tags['late'] = Tag.objects.create(
+            id=TAGS_MASK_BITS + 7, name='late', color='#000009', slug='late'
+        )
+        cls.recipe_tags = {}
+        # Маски тэгов обновляет обработчик recipes_changed.
+        with cls.captureOnCommitCallbacks(execute=True):
+            for number, slugs in enumerate(cls.RECIPE_TAGS):
+                recipe = Recipe.objects.create(
+                    author=cls.user,
+                    name=f'Рецепт {number}',
+                    text='Описание',
+                    cooking_time=10
+                )
+                TagRecipe.objects.bulk_create(
+                    TagRecipe(recipe=recipe, tag=tags[slug]) for slug in slugs
+                )
+                cls.recipe_tags[recipe.id] = set(slugs)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def filter(self, slugs):
+        response = self.client.get(
+            '/api/recipes/', {'tags': slugs, 'limit': 100}
+        )
+        self.assertEqual(response.status_code, 200)
+        return {recipe['id'] for recipe in response.data['results']}
+
+    def expected(self, slugs):
+        return {
+            recipe_id for recipe_id, tags in self.recipe_tags.items()
+            if tags & set(slugs)
+        }
+
+    def assert_both_paths_match(self):
+        for slugs in self.QUERIES:
+            with self.subTest(tags=slugs):
+                with self.settings(RECIPE_TAGS_BITMASK=False):
+                    by_exists = self.filter(slugs)
+                with self.settings(RECIPE_TAGS_BITMASK=True):
+                    by_mask = self.filter(slugs)
+                self.assertEqual(by_exists, self.expected(slugs))
+                self.assertEqual(by_mask, by_exists)
+
+    def test_same_results(self):
+        self.assert_both_paths_match()
+
+    def test_same_results_after_tags_change(self):
+        recipe_id = next(
+            recipe_id for recipe_id, tags in self.recipe_tags.items()
+            if tags == {'breakfast', 'lunch'}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            TagRecipe.objects.filter(
+                recipe_id=recipe_id, tag__slug='lunch'
+            ).delete()
+        self.recipe_tags[recipe_id] = {'breakfast'}
+        self.assert_both_paths_match()
@@ -0,0 +1,30 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from api.renderers import ORJSONRenderer
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    """ORJSONRenderer выводит тот же JSON, что и рендерер DRF."""
+
+    def test_same_output_as_drf(self):
+        data = {
+            'name': 'Строка\u2028с разделителями\u2029',
+            'amount': Decimal('1.50'),
+            'created': datetime(2024, 1, 2, 3, 4, 5),
+            'label': gettext_lazy('Рецепт'),
+            'items': [1, None, True],
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_line_separators_are_escaped(self):
+        content = ORJSONRenderer().render({'text': '\u2028\u2029'})
+        self.assertNotIn('\u2028'.encode(), content)
+        self.assertNotIn('\u2029'.encode(), content)
+        self.assertEqual(json.loads(content), {'text': '\u2028\u2029'})
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from api.throttling import (CacheBucketStore, LocalBucketStore,
+                            get_bucket_store, take_tokens)
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from users.models import CustomUser
+
+NOW = 1000000.0
+# Две области: 2 запроса и 10 запросов с пополнением токен в секунду.
+LIMITS = {'narrow': (2, 1.0), 'wide': (10, 1.0)}
+
+
+@mock.patch('api.throttling.time', return_value=NOW)
+class TakeTokensTestCase(SimpleTestCase):
+    """Запрос забирает токены из всех своих корзин или ни из одной."""
+
+    def test_new_buckets_are_full(self, time):
+        buckets, wait = take_tokens({}, LIMITS)
+        self.assertEqual(wait, 0)
+        self.assertEqual(buckets, {'narrow': (1, NOW), 'wide': (9, NOW)})
+
+    def test_rejected_request_takes_nothing(self, time):
+        buckets = {'narrow': (0.5, NOW), 'wide': (5, NOW)}
+        updated, wait = take_tokens(buckets, LIMITS)
+        self.assertEqual(wait, 0.5)
+        self.assertEqual(updated, {'narrow': (0.5, NOW), 'wide': (5, NOW)})
+
+    def test_buckets_refill_up_to_capacity(self, time):
+        buckets = {'narrow': (0, NOW - 1.5), 'wide': (0, NOW - 100)}
+        updated, wait = take_tokens(buckets, LIMITS)
+        self.assertEqual(wait, 0)
+        self.assertEqual(updated, {'narrow': (0.5, NOW), 'wide': (9, NOW)})
+
+
+class BucketStoresTestCase(TestCase):
+    """Хранилища корзин соблюдают самый узкий лимит запроса."""
+
+    def assert_limits_respected(self, store):
+        with mock.patch('api.throttling.time', return_value=NOW):
+            waits = [store.consume(LIMITS) for _ in range(3)]
+            self.assertEqual(waits[:2], [0, 0])
+            self.assertGreater(waits[2], 0)
+            # Отклоненный запрос не расходует широкий лимит.
+            self.assertEqual(store.consume({'wide': LIMITS['wide']}), 0)
+            self.assertEqual(
+                [store.consume({'wide': LIMITS['wide']}) for _ in range(8)],
+                [0] * 7 + [1.0]
+            )
+
+    def test_local_store(self):
+        self.assert_limits_respected(LocalBucketStore())
+
+    def test_cache_store(self):
+        self.assert_limits_respected(CacheBucketStore('shared'))
+
+
+class ActionRateThrottleTestCase(TestCase):
+    """Ограничение частоты действий вьюсетов в API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            username='cook', email='cook@example.com'
+        )
+
+    def setUp(self):
+        # Корзины в базе откатываются после теста, в памяти - нет.
+        get_bucket_store.cache_clear()
+        self.addCleanup(get_bucket_store.cache_clear)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self):
+        return self.client.get('/api/recipes/download_shopping_cart/')
+
+    def test_retry_after(self):
+        # Лимит 10/min: серия из 10 запросов, затем токен раз в 6 секунд.
+        with mock.patch('api.throttling.time', return_value=NOW):
+            for _ in range(10):
+                self.assertNotEqual(self.download().status_code, 429)
+            response = self.download()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '6')
+        with mock.patch('api.throttling.time', return_value=NOW + 6):
+            self.assertNotEqual(self.download().status_code, 429)
+
+    def test_limit_is_per_user(self):
+        other = CustomUser.objects.create(
+            username='other', email='other@example.com'
+        )
+        with mock.patch('api.throttling.time', return_value=NOW):
+            for _ in range(10):
+                self.download()
+            self.assertEqual(self.download().status_code, 429)
+            self.client.force_authenticate(other)
+            self.assertNotEqual(self.download().status_code, 429)
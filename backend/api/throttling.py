@@ -0,0 +1,146 @@
+import threading
+from functools import lru_cache
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .core.cache_utils import LRUCache
+
+
+class LocalBucketStore:
+    """Хранилище корзин токенов в памяти процесса."""
+
+    def __init__(self, size=10000):
+        self.buckets = LRUCache(size, 60)
+        self.lock = threading.Lock()
+
+    def consume(self, limits):
+        with self.lock:
+            buckets, wait = take_tokens(
+                {key: self.buckets.get(key) for key in limits}, limits
+            )
+            for key, bucket in buckets.items():
+                capacity, rate = limits[key]
+                self.buckets.set(key, bucket, capacity / rate)
+        return wait
+
+
+class CacheBucketStore:
+    """Хранилище корзин токенов в общем кэше Django.
+
+    Чтение и запись корзин не атомарны, поэтому при одновременных
+    запросах одного клиента лимит соблюдается приблизительно.
+
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def consume(self, limits):
+        buckets, wait = take_tokens(self.cache.get_many(limits), limits)
+        timeout = max(capacity / rate for capacity, rate in limits.values())
+        self.cache.set_many(buckets, int(timeout) + 1)
+        return wait
+
+
+def take_tokens(buckets, limits):
+    """Забирает по токену из каждой корзины, если во всех они есть.
+
+    Если хотя бы в одной корзине токена нет, запрос отклоняется,
+    и токены не забираются ни из одной: отклоненный запрос
+    не расходует лимиты других областей.
+
+    Args:
+        buckets (dict): Корзины по ключам - количество токенов и время
+            последнего обновления. Отсутствующая корзина - новая (полная).
+        limits (dict): Емкость корзины и скорость пополнения (токенов
+            в секунду) по ключам.
+
+    Returns:
+        tuple: Обновленные корзины и время ожидания следующего токена
+            в секундах (0, если токены получены).
+
+    """
+    now = time()
+    tokens = {}
+    wait = 0
+    for key, (capacity, rate) in limits.items():
+        available, updated_at = buckets.get(key) or (capacity, now)
+        tokens[key] = min(capacity, available + (now - updated_at) * rate)
+        if tokens[key] < 1:
+            wait = max(wait, (1 - tokens[key]) / rate)
+    taken = 0 if wait else 1
+    return {key: (number - taken, now) for key, number in tokens.items()}, wait
+
+
+def parse_rate(rate):
+    """Разбирает лимит вида '10/min' на количество запросов и период.
+
+    Returns:
+        tuple[int, int]: Количество запросов и период в секундах.
+
+    """
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+@lru_cache(maxsize=None)
+def get_bucket_store():
+    """Возвращает хранилище корзин из настройки API_THROTTLE_CACHE."""
+    alias = getattr(settings, 'API_THROTTLE_CACHE', None)
+    return CacheBucketStore(alias) if alias else LocalBucketStore()
+
+
+class ActionRateThrottle(BaseThrottle):
+    """Ограничивает частоту дорогих запросов к API.
+
+    Лимиты задаются в DEFAULT_THROTTLE_RATES для действий вьюсетов
+    ('RecipeViewSet.download_shopping_cart') и для глубокой пагинации
+    ('deep_pagination', страницы дальше API_DEEP_PAGE). Лимит
+    считается отдельно для каждого пользователя, а для анонимных
+    запросов - для каждого IP-адреса. Используется алгоритм корзины
+    токенов: клиент может сделать серию запросов до размера лимита,
+    после чего запросы разрешаются с заданной средней частотой.
+    Запрос проходит, только если он укладывается во все свои лимиты.
+
+    Корзины хранятся в кэше API_THROTTLE_CACHE. Он должен быть общим
+    для всех процессов, иначе каждый воркер считает свой лимит.
+
+    """
+
+    def __init__(self):
+        self.rates = api_settings.DEFAULT_THROTTLE_RATES
+        self.wait_time = 0
+
+    def get_scopes(self, request, view):
+        action = getattr(view, 'action', None) or request.method.lower()
+        scopes = [f'{type(view).__name__}.{action}']
+        page = request.query_params.get('page', '')
+        if page.isdigit() and int(page) > settings.API_DEEP_PAGE:
+            scopes.append('deep_pagination')
+        return [scope for scope in scopes if scope in self.rates]
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{super().get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scopes = self.get_scopes(request, view)
+        if not scopes:
+            return True
+        ident = self.get_ident(request)
+        limits = {}
+        for scope in scopes:
+            num_requests, duration = parse_rate(self.rates[scope])
+            limits[f'throttle:{scope}:{ident}'] = (
+                num_requests, num_requests / duration
+            )
+        self.wait_time = get_bucket_store().consume(limits)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
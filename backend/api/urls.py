@@ -1,14 +1,31 @@
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from api.views import (IngredientViewSet, JWTLoginView, JWTLogoutView,
+                       JWTRefreshView, RecipeViewSet, TagViewSet, UserViewSet)
+from django.conf import settings
 from django.urls import include, path
+from djoser.urls import authtoken
 from rest_framework.routers import DefaultRouter
 
+from .core.async_utils import offload_urlpatterns
+
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='users')
 router.register(r'tags', TagViewSet, basename='tags')
 router.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router.register(r'recipes', RecipeViewSet, basename='recipes')
 
+router_urls = router.urls
+auth_urls = authtoken.urlpatterns
+if settings.AUTH_JWT:
+    auth_urls = [
+        path('token/login/', JWTLoginView.as_view(), name='login'),
+        path('token/refresh/', JWTRefreshView.as_view(), name='refresh'),
+        path('token/logout/', JWTLogoutView.as_view(), name='logout'),
+    ]
+if settings.ASYNC_VIEWS:
+    router_urls = offload_urlpatterns(router_urls)
+    auth_urls = offload_urlpatterns(auth_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
-    path('auth/', include('djoser.urls.authtoken')),
+    path('', include(router_urls)),
+    path('auth/', include(auth_urls)),
 ]
@@ -1,23 +1,43 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser.utils import logout_user
+from djoser.views import TokenCreateView
+from recipes.deletion import delete_recipes
 from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.pantry import pantry_index
+from recipes.popularity import WINDOWS
+from recipes.similarity import get_similar_recipes
 from reportlab.pdfgen import canvas
-from rest_framework import permissions, status, viewsets
+from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from users.models import CustomUser, Subscribe
 
+from .core.cards import get_recipe_cards
+from .core.fieldsets import RecipeFieldset
+from .core.http_cache import http_cache_policy
+from .core.jwt_utils import get_tokens, revoke_token
+from .core.response_cache import cache_anonymous_response
 from .core.views_utils import (create_and_download_file,
                                get_paginated_queryset, post_delete_object)
 from .filters import IngredientFilterSet, RecipeFilterSet
 from .pagination import MyPagination
 from .permissions import (IsAdminOrReadOnly, IsCreateOrReadOnly,
                           IsOwnerOrReadOnly)
-from .serializers import (IngredientSerializer, RecipeCerateSerializer,
-                          RecipeReadSerializer, SetPasswordSerializer,
-                          SubscribeSerializer, TagSerialzer,
-                          UserCreateSerializer, UserReadSerialzer)
+from .serializers import (IngredientSerializer, JWTRefreshSerializer,
+                          RecipeCerateSerializer, RecipeReadSerializer,
+                          SetPasswordSerializer, SubscribeSerializer,
+                          TagSerialzer, UserCreateSerializer,
+                          UserReadSerialzer)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -138,6 +158,15 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerialzer
     permission_classes = (IsAdminOrReadOnly,)
 
+    @http_cache_policy('reference')
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @http_cache_policy('reference')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class IngredientViewSet(viewsets.ModelViewSet):
     """Вьюсет для работы с запросами к модели Ingredient."""
@@ -148,9 +177,24 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilterSet
 
+    @http_cache_policy('reference')
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @http_cache_policy('reference')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
-    """Вьюсет для работы с запросами к модели Recipe."""
+    """Вьюсет для работы с запросами к модели Recipe.
+
+    Списки и страница рецепта поддерживают параметры fields и expand:
+    '?fields=id,name,image,cooking_time&expand=' выводит только
+    перечисленные поля, а невыведенные связи не загружаются из базы.
+
+    """
 
     queryset = Recipe.objects.all().order_by('-id')
     serializer_class = RecipeCerateSerializer
@@ -158,6 +202,243 @@ class RecipeViewSet(viewsets.ModelViewSet):
     pagination_class = MyPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilterSet
+    read_actions = (
+        'list', 'retrieve', 'popular', 'pantry', 'related', 'similar',
+        'favorite_list', 'shopping_cart_list'
+    )
+
+    def get_fieldset(self):
+        return RecipeFieldset.from_request(
+            self.request, RecipeReadSerializer.Meta.fields
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve') and not settings.RECIPE_CARDS:
+            return self.get_fieldset().prepare_queryset(
+                queryset, self.request.user
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in self.read_actions:
+            return RecipeReadSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.read_actions:
+            context['fieldset'] = self.get_fieldset()
+        return context
+
+    @http_cache_policy('public')
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        """Возвращает список рецептов, собранный из готовых карточек."""
+        if not settings.RECIPE_CARDS:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.only('id', 'author_id'))
+        return self.get_paginated_response(
+            get_recipe_cards(page, request, self.get_fieldset())
+        )
+
+    @http_cache_policy('public')
+    def retrieve(self, request, *args, **kwargs):
+        """Возвращает рецепт, собранный из готовой карточки."""
+        if not settings.RECIPE_CARDS:
+            return super().retrieve(request, *args, **kwargs)
+        cards = get_recipe_cards(
+            (self.get_object(),), request, self.get_fieldset()
+        )
+        if not cards:
+            # Рецепт удален после выборки.
+            raise Http404
+        return Response(cards[0])
+
+    @action(detail=False)
+    @cache_anonymous_response
+    def popular(self, request):
+        """Возвращает самые популярные рецепты за период.
+
+        Период задается параметром window: 7d, 30d или all (по умолчанию).
+        Рецепты берутся из готового рейтинга, который пересчитывает
+        команда update_popular_recipes.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            Response: Пагинированный список рецептов по местам в рейтинге.
+
+        Raises:
+            ValidationError: Если передан неизвестный период.
+
+        """
+        window = request.query_params.get('window', 'all')
+        if window not in WINDOWS:
+            raise ValidationError(
+                {'window': f'Допустимые значения: {", ".join(WINDOWS)}.'}
+            )
+        queryset = Recipe.objects.filter(
+            rankings__window=window
+        ).order_by('rankings__rank')
+        if settings.RECIPE_CARDS:
+            page = self.paginate_queryset(queryset.only('id', 'author_id'))
+            data = get_recipe_cards(page, request, self.get_fieldset())
+        else:
+            page = self.paginate_queryset(
+                self.get_fieldset().prepare_queryset(queryset, request.user)
+            )
+            data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data)
+
+    @action(detail=False)
+    @cache_anonymous_response
+    def pantry(self, request):
+        """Возвращает рецепты, которые можно приготовить из ингредиентов.
+
+        Параметр ingredients перечисляет id имеющихся ингредиентов
+        (повторяется или через запятую), параметр missing - сколько
+        ингредиентов рецепта может не хватать (по умолчанию 0).
+        Рецепты подбираются по обратному индексу ингредиентов в памяти
+        и сортируются по доле имеющихся ингредиентов.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            Response: Пагинированный список рецептов с числом недостающих
+                ингредиентов в поле missing.
+
+        Raises:
+            ValidationError: Если параметры не целые неотрицательные числа.
+
+        """
+        values = [
+            value.strip()
+            for param in request.query_params.getlist('ingredients')
+            for value in param.split(',') if value.strip()
+        ]
+        missing = request.query_params.get('missing', '0')
+        if not all(value.isdecimal() for value in values):
+            raise ValidationError(
+                {'ingredients': 'Укажите id ингредиентов через запятую.'}
+            )
+        if not missing.isdecimal():
+            raise ValidationError(
+                {'missing': 'Укажите целое неотрицательное число.'}
+            )
+        found = dict(self.paginate_queryset(pantry_index.search(
+            map(int, values), int(missing)
+        )))
+        order = {
+            recipe_id: position for position, recipe_id in enumerate(found)
+        }
+        queryset = Recipe.objects.filter(id__in=list(found))
+        if not settings.RECIPE_CARDS:
+            recipes = sorted(
+                self.get_fieldset().prepare_queryset(queryset, request.user),
+                key=lambda item: order[item.id]
+            )
+            data = self.get_serializer(recipes, many=True).data
+            for item, recipe in zip(data, recipes):
+                item['missing'] = found[recipe.id]
+            return self.get_paginated_response(data)
+        # Карточки удаленных после поиска рецептов пропускаются, поэтому
+        # недостающие ингредиенты сопоставляются по id рецепта.
+        fieldset = self.get_fieldset()
+        data = get_recipe_cards(
+            sorted(
+                queryset.only('id', 'author_id'),
+                key=lambda item: order[item.id]
+            ),
+            request,
+            fieldset.including('id')
+        )
+        for item in data:
+            item['missing'] = found[item['id']]
+            if not fieldset.includes('id'):
+                del item['id']
+        return self.get_paginated_response(data)
+
+    @action(detail=True)
+    @cache_anonymous_response
+    def related(self, request, pk=None):
+        """Возвращает рецепты, которые добавляют вместе с выбранным.
+
+        Связи берутся из таблицы, которую пересчитывает команда
+        update_related_recipes по избранному и спискам покупок.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+            pk (int): id рецепта.
+
+        Returns:
+            Response: Список связанных рецептов по убыванию сходства.
+
+        """
+        queryset = Recipe.objects.filter(
+            related_to__recipe_id=pk
+        ).order_by('related_to__rank')
+        if settings.RECIPE_CARDS:
+            data = get_recipe_cards(
+                queryset.only('id', 'author_id'), request, self.get_fieldset()
+            )
+        else:
+            data = self.get_serializer(
+                self.get_fieldset().prepare_queryset(queryset, request.user),
+                many=True
+            ).data
+        if not data:
+            get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        return Response(data)
+
+    @action(detail=True)
+    @cache_anonymous_response
+    def similar(self, request, pk=None):
+        """Возвращает рецепты с похожим набором ингредиентов.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+            pk (int): id рецепта.
+
+        Returns:
+            Response: Список похожих рецептов по убыванию сходства.
+
+        """
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        order = {
+            recipe_id: position for position, (recipe_id, _) in enumerate(
+                get_similar_recipes(recipe.id, settings.SIMILAR_RECIPES_LIMIT)
+            )
+        }
+        queryset = Recipe.objects.filter(id__in=list(order))
+        if settings.RECIPE_CARDS:
+            return Response(get_recipe_cards(
+                sorted(queryset.only('id', 'author_id'),
+                       key=lambda item: order[item.id]),
+                request,
+                self.get_fieldset()
+            ))
+        recipes = self.get_fieldset().prepare_queryset(queryset, request.user)
+        return Response(self.get_serializer(
+            sorted(recipes, key=lambda item: order[item.id]), many=True
+        ).data)
+
+    # Рецепт сохраняется вместе с ингредиентами и тэгами в одной
+    # транзакции, и после её фиксации карточка перестраивается один раз
+    # обработчиком сигнала recipes_changed.
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        delete_recipes((instance.pk,))
 
     @action(
         methods=['post', 'delete'],
@@ -192,7 +473,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
             Response : Ответ, содержащий рецепты из списка избранного.
 
         """
-        favorites = Recipe.objects.filter(favorite__user=request.user)
+        favorites = self.get_fieldset().prepare_queryset(
+            Recipe.objects.filter(favorite__user=request.user), request.user
+        )
         filtered_queryset = self.filter_queryset(favorites)
         return get_paginated_queryset(
             self, RecipeReadSerializer, filtered_queryset, request
@@ -231,7 +514,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             Response : Ответ, содержащий рецепты из списка покупок.
 
         """
-        shopping_cart = Recipe.objects.filter(shopping_cart__user=request.user)
+        shopping_cart = self.get_fieldset().prepare_queryset(
+            Recipe.objects.filter(shopping_cart__user=request.user),
+            request.user
+        )
         return get_paginated_queryset(
             self, RecipeReadSerializer, shopping_cart, request
         )
@@ -256,3 +542,70 @@ class RecipeViewSet(viewsets.ModelViewSet):
         page = canvas.Canvas(response)
         create_and_download_file(user, page)
         return response
+
+
+class JWTLoginView(TokenCreateView):
+    """Выдает токены JWT по адресу электронной почты и паролю.
+
+    Ответ совместим с 'auth/token/login/' djoser: токен доступа
+    передается в поле 'auth_token', токен обновления - в поле 'refresh'.
+
+    """
+
+    def _action(self, serializer):
+        user = serializer.user
+        user_logged_in.send(
+            sender=user.__class__, request=self.request, user=user
+        )
+        refresh, access = get_tokens(user)
+        return Response(
+            {'auth_token': str(access), 'refresh': str(refresh)},
+            status=status.HTTP_200_OK
+        )
+
+
+class JWTRefreshView(generics.GenericAPIView):
+    """Выдает новый токен доступа по токену обновления."""
+
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = JWTRefreshSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class JWTLogoutView(APIView):
+    """Отзывает токены текущего пользователя."""
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        """Отзывает токен запроса и переданный токен обновления.
+
+        Токены из базы, выданные до включения JWT, удаляются, как при
+        обычном выходе.
+
+        Args:
+            request (HttpRequest): Объект запроса.
+
+        Returns:
+            Response: Пустой ответ со статусом 204.
+
+        """
+        if isinstance(request.auth, AccessToken):
+            revoke_token(request.auth)
+        else:
+            logout_user(request)
+        try:
+            refresh = RefreshToken(request.data.get('refresh', ''))
+        except TokenError:
+            refresh = None
+        if (
+            refresh is not None
+            and refresh[jwt_settings.USER_ID_CLAIM] == request.user.pk
+        ):
+            revoke_token(refresh)
+        return Response(status=status.HTTP_204_NO_CONTENT)
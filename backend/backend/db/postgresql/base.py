@@ -0,0 +1,61 @@
+from functools import partial
+from time import monotonic
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from .creation import DatabaseCreation
+from .pool import get_pool, ping
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд PostgreSQL с пулом соединений и проверкой их состояния.
+
+    Если POOL_SIZE больше нуля, соединения берутся из пула процесса
+    и возвращаются в него вместо закрытия. Постоянные соединения
+    (CONN_MAX_AGE) без пула проверяются запросом 'SELECT 1' в начале
+    запроса, если не использовались дольше HEALTH_CHECK_INTERVAL секунд.
+
+    """
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        settings_dict.setdefault('POOL_SIZE', 0)
+        settings_dict.setdefault('POOL_TIMEOUT', 10)
+        settings_dict.setdefault('HEALTH_CHECK_INTERVAL', 30)
+        super().__init__(settings_dict, alias)
+        self.health_checked_at = None
+
+    @property
+    def pool(self):
+        if not self.settings_dict['POOL_SIZE']:
+            return None
+        return get_pool(self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        self.health_checked_at = monotonic()
+        connect = partial(super().get_new_connection, conn_params)
+        if self.pool is None:
+            return connect()
+        return self.pool.acquire(connect)
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            super()._close()
+            return
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if (
+            self.connection is None
+            or self.in_atomic_block
+            or monotonic() - self.health_checked_at
+            < self.settings_dict['HEALTH_CHECK_INTERVAL']
+        ):
+            return
+        self.health_checked_at = monotonic()
+        if not ping(self.connection):
+            self.close()
@@ -0,0 +1,132 @@
+import threading
+from collections import deque
+from time import monotonic
+
+from django.db import OperationalError
+from psycopg2 import extensions
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Пул соединений с PostgreSQL одного процесса.
+
+    Ограничивает число открытых соединений, выдает свободные соединения
+    повторно и проверяет те из них, что простаивали дольше
+    'health_check_interval' секунд.
+
+    """
+
+    def __init__(self, size, timeout, health_check_interval):
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self, connect):
+        """Выдает соединение из пула или открывает новое.
+
+        Args:
+            connect (function): Открывает новое соединение.
+
+        Returns:
+            connection: Соединение psycopg2.
+
+        Raises:
+            OperationalError: Если свободное место в пуле не появилось
+                за 'timeout' секунд.
+
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                'Пул соединений с базой исчерпан.'
+            )
+        try:
+            while True:
+                with self.lock:
+                    if not self.idle:
+                        break
+                    connection, released_at = self.idle.pop()
+                if self.is_healthy(connection, released_at):
+                    return connection
+                connection.close()
+            return connect()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self, connection):
+        """Возвращает соединение в пул.
+
+        Соединение с незавершенной транзакцией откатывается,
+        сломанное соединение закрывается.
+
+        """
+        try:
+            if connection.closed:
+                return
+            status = connection.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                connection.close()
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self.lock:
+                self.idle.append((connection, monotonic()))
+        except Exception:
+            connection.close()
+        finally:
+            self.slots.release()
+
+    def is_healthy(self, connection, released_at):
+        if connection.closed:
+            return False
+        if monotonic() - released_at < self.health_check_interval:
+            return True
+        return ping(connection)
+
+    def close_idle(self):
+        """Закрывает все простаивающие соединения."""
+        with self.lock:
+            while self.idle:
+                self.idle.pop()[0].close()
+
+
+def close_idle_connections():
+    """Закрывает простаивающие соединения во всех пулах процесса."""
+    for pool in list(_pools.values()):
+        pool.close_idle()
+
+
+def ping(connection):
+    """Проверяет, что соединение с базой работает."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except Exception:
+        return False
+
+
+def get_pool(settings_dict):
+    """Возвращает пул соединений для базы, создавая его при первом вызове.
+
+    Пул создается лениво, поэтому под gunicorn у каждого воркера свой пул.
+    Пулы различаются по параметрам подключения, а не по имени базы
+    в настройках: тестовая и служебная базы получают собственные пулы.
+
+    """
+    key = tuple(
+        settings_dict[name] for name in ('HOST', 'PORT', 'NAME', 'USER')
+    )
+    if key not in _pools:
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    settings_dict['POOL_SIZE'],
+                    settings_dict['POOL_TIMEOUT'],
+                    settings_dict['HEALTH_CHECK_INTERVAL']
+                )
+    return _pools[key]
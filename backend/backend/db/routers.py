@@ -0,0 +1,73 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# app_label модели записей DatabaseCache.
+CACHE_APP_LABEL = 'django_cache'
+_current_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+class ReplicaRouting:
+    """Состояние маршрутизации запросов к базе в рамках одного запроса.
+
+    Атрибуты:
+        use_replicas (bool): Можно ли читать из реплик.
+        wrote (bool): Были ли в запросе операции записи.
+
+    """
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+def get_current_routing():
+    return _current_routing.get()
+
+
+def set_current_routing(routing):
+    return _current_routing.set(routing)
+
+
+def reset_current_routing(token):
+    _current_routing.reset(token)
+
+
+class ReplicaRouter:
+    """Направляет чтение в реплики, а запись - в основную базу.
+
+    Реплики (настройка DATABASE_REPLICAS) используются только внутри
+    запроса, для которого это разрешено ('ReplicaMiddleware'), и только
+    до первой записи: после неё и внутри транзакции все запросы идут
+    в основную базу, чтобы пользователь видел свои изменения. Таблица
+    общего кэша всегда читается из основной базы, и запись в нее
+    не считается изменением данных.
+
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = get_current_routing()
+        if (
+            model._meta.app_label == CACHE_APP_LABEL
+            or routing is None
+            or not routing.use_replicas
+            or not settings.DATABASE_REPLICAS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        routing = get_current_routing()
+        if routing is not None and model._meta.app_label != CACHE_APP_LABEL:
+            routing.use_replicas = False
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -34,12 +35,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -61,19 +66,77 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+ASYNC_ORM_THREADS = int(os.getenv('ASYNC_ORM_THREADS', 8))
+
+
+DB_ENGINE = os.getenv('DB_ENGINE')
+if DB_ENGINE == 'django.db.backends.postgresql':
+    # Бэкенд Django с пулом соединений и проверкой их состояния.
+    DB_ENGINE = 'backend.db.postgresql'
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', 10)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'HEALTH_CHECK_INTERVAL': float(
+            os.getenv('DB_HEALTH_CHECK_INTERVAL', 30)
+        ),
     }
 }
 
+# Реплики для чтения через запятую: 'хост[:порт]' для PostgreSQL
+# или путь к файлу базы для SQLite.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if (DB_ENGINE or '').endswith('sqlite3'):
+        DATABASES[alias]['NAME'] = replica
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES['default']['PORT']
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['backend.db.routers.ReplicaRouter']
+
+PRIMARY_STICKINESS_WINDOW = int(os.getenv('PRIMARY_STICKINESS_WINDOW', 10))
+# Алиас общего кэша из CACHES, где запросы без cookie (по токену)
+# закрепляются за основной базой.
+PRIMARY_STICKINESS_CACHE = os.getenv('PRIMARY_STICKINESS_CACHE', 'shared')
+
+# 'default' - кэш в памяти процесса, 'shared' - общий для всех процессов
+# (по умолчанию таблица в базе, которую создает migrate; можно указать
+# Memcached или Redis). Данные, которые должны видеть все воркеры
+# (отозванные токены и т.п.), хранятся только в общем кэше.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'django_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 100000)),
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -111,10 +174,157 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.ORJSONParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.ActionRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'RecipeViewSet.download_shopping_cart': '10/min',
+        'RecipeViewSet.create': '20/min',
+        'RecipeViewSet.update': '30/min',
+        'RecipeViewSet.partial_update': '30/min',
+        'TokenCreateView.post': '20/min',
+        'JWTLoginView.post': '20/min',
+        'deep_pagination': '60/min',
+    },
+    # Перед бэкендом стоит nginx, адрес клиента - в X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('API_NUM_PROXIES', 1)),
 }
 
+# Страницы списков дальше этой считаются глубокой пагинацией.
+API_DEEP_PAGE = int(os.getenv('API_DEEP_PAGE', 20))
+# Алиас общего кэша из CACHES для лимитов запросов. Кэш должен быть общим
+# для всех процессов, иначе лимит умножается на число воркеров. Пустая
+# строка - лимиты в памяти процесса, только для запуска в одном процессе.
+API_THROTTLE_CACHE = os.getenv('API_THROTTLE_CACHE', 'shared')
+
+# Кэш ответов списков рецептов, тэгов и ингредиентов для анонимных
+# пользователей: алиас общего кэша из CACHES (с кэшем в памяти процесса
+# проект не запустится: изменение данных сбросило бы кэш только
+# у одного воркера), время жизни свежей записи и сколько еще секунд можно отдавать
+# устаревшую запись, пока она пересчитывается. 0 отключает кэш.
+API_RESPONSE_CACHE = os.getenv('API_RESPONSE_CACHE', 'shared')
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 30))
+API_RESPONSE_CACHE_STALE = int(os.getenv('API_RESPONSE_CACHE_STALE', 300))
+
+# Заголовки HTTP-кэширования: сколько секунд браузеры и nginx могут
+# не перепроверять справочные данные (тэги, ингредиенты) и ответы
+# анонимным пользователям. ETag строится по версии данных в кэше
+# API_RESPONSE_CACHE.
+API_REFERENCE_MAX_AGE = int(os.getenv('API_REFERENCE_MAX_AGE', 300))
+API_PUBLIC_MAX_AGE = int(os.getenv('API_PUBLIC_MAX_AGE', 10))
+API_ETAG = os.getenv('API_ETAG', 'False') == 'True'
+
+# Токены JWT вместо токенов в базе.
+AUTH_JWT = os.getenv('AUTH_JWT', 'False') == 'True'
+if AUTH_JWT:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
+        'api.authentication.JWTAuthentication',
+    ) + REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_MINUTES', 5))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_DAYS', 14))
+    ),
+    'AUTH_HEADER_TYPES': ('Bearer', 'Token'),
+}
+# Алиас кэша из CACHES для списка отозванных токенов. Должен быть общим
+# для всех процессов: с кэшем в памяти процесса проект не запустится.
+JWT_DENY_LIST_CACHE = os.getenv('JWT_DENY_LIST_CACHE', 'shared')
+# Сколько секунд процесс помнит, что токен не отозван, не обращаясь
+# к JWT_DENY_LIST_CACHE. Токен, отозванный в другом процессе, работает
+# в этом до истечения срока. 0 отключает кэш.
+JWT_DENY_LIST_LOCAL_TIMEOUT = int(
+    os.getenv('JWT_DENY_LIST_LOCAL_TIMEOUT', 5)
+)
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', 5))
+# Алиас общего для всех процессов кэша из CACHES или пустая строка.
+TOKEN_SHARED_CACHE = os.getenv('TOKEN_SHARED_CACHE', '')
+TOKEN_SHARED_CACHE_TIMEOUT = int(os.getenv('TOKEN_SHARED_CACHE_TIMEOUT', 60))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
 }
+
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', 'russian')
+
+# Соответствие слагов тэгов их id: алиас общего кэша из CACHES (с кэшем
+# в памяти процесса проект не запустится: переименование или удаление
+# тэга заметил бы только один воркер) и время жизни записи.
+TAG_IDS_CACHE = os.getenv('TAG_IDS_CACHE', 'shared')
+TAG_IDS_CACHE_TIMEOUT = int(os.getenv('TAG_IDS_CACHE_TIMEOUT', 300))
+
+RECIPE_TAGS_BITMASK = os.getenv('RECIPE_TAGS_BITMASK', 'False') == 'True'
+
+# Списки и страницы рецептов собираются из готовых карточек.
+RECIPE_CARDS = os.getenv('RECIPE_CARDS', 'True') == 'True'
+
+# Сколько рецептов попадает в рейтинг популярных за каждый период.
+POPULAR_RECIPES_LIMIT = int(os.getenv('POPULAR_RECIPES_LIMIT', 100))
+
+# Сколько связанных рецептов сохраняет команда update_related_recipes.
+RELATED_RECIPES_LIMIT = int(os.getenv('RELATED_RECIPES_LIMIT', 10))
+
+# Похожие по ингредиентам рецепты: минимальное сходство Жаккара, сколько
+# рецептов выводить, сколько кандидатов из индекса MinHash проверять
+# и сколько рецептов брать из одной полосы индекса.
+SIMILAR_RECIPES_THRESHOLD = float(os.getenv('SIMILAR_RECIPES_THRESHOLD', 0.5))
+SIMILAR_RECIPES_LIMIT = int(os.getenv('SIMILAR_RECIPES_LIMIT', 10))
+SIMILAR_RECIPES_CANDIDATES = int(os.getenv('SIMILAR_RECIPES_CANDIDATES', 500))
+SIMILAR_RECIPES_BUCKET_LIMIT = int(os.getenv('SIMILAR_RECIPES_BUCKET_LIMIT', 200))
+
+# Обратный индекс ингредиентов для поиска по имеющимся продуктам: алиас
+# общего кэша из CACHES для журнала изменений (с кэшем в памяти процесса
+# проект не запустится: процесс видел бы только свои изменения) и через
+# сколько секунд индекс перестраивается целиком.
+PANTRY_INDEX_CACHE = os.getenv('PANTRY_INDEX_CACHE', 'shared')
+PANTRY_INDEX_TIMEOUT = int(os.getenv('PANTRY_INDEX_TIMEOUT', 600))
+
+# Удаление рецептов и пользователей: сколько объектов удаляется в одной
+# транзакции, сколько рецептов и пользователей админка удаляет сразу,
+# а не в фоновой задаче, и через сколько секунд без обновлений задача
+# считается брошенной.
+DELETION_BATCH_SIZE = int(os.getenv('DELETION_BATCH_SIZE', 500))
+DELETION_SYNC_LIMIT = int(os.getenv('DELETION_SYNC_LIMIT', 100))
+DELETION_JOB_STALE = int(os.getenv('DELETION_JOB_STALE', 600))
+
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', 1.0))
+
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
+        },
+        'recipes': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -0,0 +1,21 @@
+import os
+import shutil
+
+bind = '0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+
+
+def on_starting(server):
+    """Очищает файлы метрик, оставшиеся от предыдущего запуска."""
+    metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    """Убирает завершившийся воркер из метрик текущих запросов."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,7 +1,82 @@
-from django.contrib import admin
-
-from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                     ShoppingCart, Tag, TagRecipe)
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+from .deletion import count_deleted_objects, delete_or_schedule
+from .models import (DeletionJob, Favorite, Ingredient, IngredientRecipe,
+                     Recipe, ShoppingCart, Tag, TagRecipe)
+
+# Сколько удаляемых объектов перечисляется на странице подтверждения.
+DELETED_OBJECTS_SHOWN = 100
+
+
+class PkCountPaginator(Paginator):
+    """Пагинатор, который считает объекты только по id.
+
+    Аннотации списка (например, подзапросы количества) вычисляются
+    только для строк страницы, а не для всех строк при подсчете.
+
+    """
+
+    @cached_property
+    def count(self):
+        return self.object_list.values('pk').order_by().count()
+
+
+class BulkDeleteMixin:
+    """Удаление рецептов и пользователей без сборщика Django.
+
+    Страница подтверждения показывает количество связанных объектов
+    вместо их полного списка и, как обычно, запрещает удаление, если
+    у пользователя нет прав на удаление каких-то из них. Удаление
+    выполняется запросами по множествам или, если объектов много,
+    фоновой задачей (см. recipes.deletion).
+
+    """
+
+    def _get_queryset(self, objs):
+        if isinstance(objs, list):
+            return self.model._base_manager.filter(
+                pk__in=[obj.pk for obj in objs]
+            )
+        return objs
+
+    def _can_delete(self, request, model):
+        # Как и в сборщике Django, права проверяются только у моделей,
+        # зарегистрированных в админке.
+        model_admin = self.admin_site._registry.get(model)
+        return model_admin is None or model_admin.has_delete_permission(
+            request
+        )
+
+    def get_deleted_objects(self, objs, request):
+        queryset = self._get_queryset(objs)
+        model_count, perms_needed = count_deleted_objects(
+            queryset, lambda model: self._can_delete(request, model)
+        )
+        deleted_objects = [
+            str(obj) for obj in queryset[:DELETED_OBJECTS_SHOWN]
+        ]
+        hidden = model_count[self.model._meta.verbose_name_plural] - len(
+            deleted_objects
+        )
+        if hidden > 0:
+            deleted_objects.append(f'... и еще {hidden}')
+        return deleted_objects, model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self._get_queryset([obj]))
+
+    def delete_queryset(self, request, queryset):
+        job = delete_or_schedule(queryset)
+        if job is not None:
+            self.message_user(
+                request,
+                f'Объектов много, удаление выполнит фоновая задача {job.pk}.',
+                messages.WARNING
+            )
 
 
 @admin.register(Tag)
@@ -14,22 +89,43 @@ class TagAdmin(admin.ModelAdmin):
 class IngridientAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'measurement_unit')
     search_fields = ('name',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
+    ordering = ('name',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(BulkDeleteMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'author',
         'name',
         'favorites_count'
     )
-    list_filter = ('name', 'author__username', 'tags__name')
-    search_fields = ('name',)
-
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('name', '=author__username')
+    autocomplete_fields = ('author',)
+    ordering = ('-pk',)
+    paginator = PkCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Подзапрос, а не Count('favorite'): при фильтре по тэгам
+        # соединение с тэгами умножило бы количество.
+        favorites = Favorite.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            count=Count('id')
+        ).values('count')
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(
+                Subquery(favorites, output_field=IntegerField()), 0
+            )
+        )
+
+    @admin.display(description='В избранном', ordering='favorites_count')
     def favorites_count(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
 
 @admin.register(IngredientRecipe)
@@ -40,7 +136,10 @@ class IngredientRecipeAdmin(admin.ModelAdmin):
         'recipe',
         'amount'
     )
+    list_select_related = ('ingredient', 'recipe')
     search_fields = ('ingredient__name', 'recipe__name')
+    autocomplete_fields = ('ingredient', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(TagRecipe)
@@ -50,7 +149,11 @@ class TagRecipeAdmin(admin.ModelAdmin):
         'tag',
         'recipe',
     )
+    list_select_related = ('tag', 'recipe')
+    list_filter = ('tag',)
     search_fields = ('tag__name', 'recipe__name')
+    autocomplete_fields = ('recipe',)
+    show_full_result_count = False
 
 
 @admin.register(Favorite)
@@ -60,7 +163,10 @@ class FavoriteAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
@@ -70,4 +176,44 @@ class ShopingCartAdmin(admin.ModelAdmin):
         'user',
         'recipe',
     )
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'target',
+        'status',
+        'progress',
+        'created',
+        'finished'
+    )
+    list_filter = ('status', 'target')
+    exclude = ('object_ids',)
+    readonly_fields = (
+        'target',
+        'status',
+        'total',
+        'processed',
+        'error',
+        'created',
+        'updated',
+        'finished'
+    )
+    actions = ('retry',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def progress(self, obj):
+        return f'{obj.processed} / {obj.total}'
+
+    @admin.action(description='Повторить задачи с ошибкой')
+    def retry(self, request, queryset):
+        queryset.filter(status=DeletionJob.FAILED).update(
+            status=DeletionJob.PENDING, error=''
+        )
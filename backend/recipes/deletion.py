@@ -0,0 +1,290 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import F, Q
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.signals import post_delete, pre_delete
+from django.utils import timezone
+from users.models import CustomUser
+
+from .models import (DeletionJob, Favorite, IngredientRecipe, Recipe,
+                     ShoppingCart, TagRecipe)
+from .popularity import uncount
+from .signals import mark_recipes_changed
+
+# Модели, записи которых удаляются одним запросом, несмотря
+# на обработчики сигналов удаления: их работу (отметку измененных
+# рецептов и счетчики популярности) выполняет этот модуль.
+SILENT_MODELS = {Favorite, ShoppingCart, IngredientRecipe, TagRecipe}
+
+
+def _can_raw_delete(model):
+    """Проверяет, можно ли удалить записи модели одним запросом."""
+    if model in SILENT_MODELS:
+        return True
+    return not (
+        post_delete.has_listeners(model)
+        or pre_delete.has_listeners(model)
+        or any(get_candidate_relations_to_delete(model._meta))
+    )
+
+
+def _delete_rows(model, pks, using):
+    """Удаляет объекты вместе со ссылающимися на них записями.
+
+    В отличие от сборщика Django записи не загружаются в память:
+    для каждой связи выполняется один запрос DELETE (или UPDATE для
+    SET_NULL) по id объектов. Обычным удалением Django удаляются
+    только записи моделей со своими зависимостями или обработчиками
+    сигналов, например токены пользователей.
+
+    Args:
+        model (ModelBase): Модель объектов.
+        pks (list[int]): id объектов.
+        using (str): Алиас базы.
+
+    Returns:
+        int: Количество удаленных объектов.
+
+    Raises:
+        ValueError: Если связь требует другого поведения при удалении.
+
+    """
+    for relation in get_candidate_relations_to_delete(model._meta):
+        field = relation.field
+        related = relation.related_model._base_manager.using(using).filter(
+            **{f'{field.name}__in': pks}
+        )
+        cascade = relation.on_delete is models.CASCADE
+        if relation.on_delete is models.SET_NULL:
+            related.update(**{field.name: None})
+        elif cascade and _can_raw_delete(relation.related_model):
+            related._raw_delete(using)
+        elif cascade:
+            related.delete()
+        elif relation.on_delete is not models.DO_NOTHING:
+            raise ValueError(f'Поле {field} не поддерживает быстрое удаление.')
+    return model._base_manager.using(using).filter(
+        pk__in=pks
+    )._raw_delete(using)
+
+
+def _batches(ids):
+    size = settings.DELETION_BATCH_SIZE
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def delete_recipes(recipe_ids, progress=None):
+    """Удаляет рецепты вместе с ингредиентами, тэгами, избранным и т.д.
+
+    Рецепты удаляются пачками по DELETION_BATCH_SIZE, каждая в своей
+    транзакции, поэтому долгое удаление не держит блокировки и его
+    можно повторить после сбоя.
+
+    Args:
+        recipe_ids (Iterable[int]): id рецептов.
+        progress (function): Вызывается после каждой пачки с числом
+            обработанных в ней рецептов.
+
+    Returns:
+        int: Количество удаленных рецептов.
+
+    """
+    using = router.db_for_write(Recipe)
+    deleted = 0
+    for batch in _batches(list(recipe_ids)):
+        with transaction.atomic(using=using):
+            deleted += _delete_rows(Recipe, batch, using)
+            mark_recipes_changed(batch)
+        if progress is not None:
+            progress(len(batch))
+    return deleted
+
+
+def delete_users(user_ids, progress=None):
+    """Удаляет пользователей вместе с их рецептами, подписками и т.д.
+
+    Для каждой пачки пользователей сначала удаляются их рецепты
+    (см. 'delete_recipes'), затем счетчики популярности уменьшаются
+    на их добавления в избранное и списки покупок, и удаляются сами
+    пользователи со ссылающимися на них записями.
+
+    Args:
+        user_ids (Iterable[int]): id пользователей.
+        progress (function): Вызывается после каждой пачки рецептов
+            и пользователей с числом обработанных в ней объектов.
+
+    Returns:
+        int: Количество удаленных пользователей.
+
+    """
+    using = router.db_for_write(CustomUser)
+    deleted = 0
+    for batch in _batches(list(user_ids)):
+        delete_recipes(
+            Recipe.objects.filter(author_id__in=batch).values_list(
+                'id', flat=True
+            ).order_by('id'),
+            progress
+        )
+        with transaction.atomic(using=using):
+            for model in (Favorite, ShoppingCart):
+                uncount(model.objects.using(using).filter(user_id__in=batch))
+            deleted += _delete_rows(CustomUser, batch, using)
+        if progress is not None:
+            progress(len(batch))
+    return deleted
+
+
+TARGETS = {Recipe: DeletionJob.RECIPES, CustomUser: DeletionJob.USERS}
+DELETERS = {
+    DeletionJob.RECIPES: delete_recipes,
+    DeletionJob.USERS: delete_users,
+}
+
+
+def _count_related(queryset, counts, perms_needed, can_delete, path):
+    for relation in get_candidate_relations_to_delete(queryset.model._meta):
+        model = relation.related_model
+        if (
+            relation.on_delete is not models.CASCADE
+            or model._meta.auto_created
+            or model in path
+        ):
+            continue
+        related = model._base_manager.filter(
+            **{f'{relation.field.name}__in': queryset.values('pk')}
+        )
+        number = related.count()
+        if not number:
+            continue
+        name = str(model._meta.verbose_name_plural)
+        counts[name] = counts.get(name, 0) + number
+        if can_delete is not None and not can_delete(model):
+            perms_needed.add(str(model._meta.verbose_name))
+        _count_related(
+            related, counts, perms_needed, can_delete, path | {model}
+        )
+
+
+def count_deleted_objects(queryset, can_delete=None):
+    """Считает объекты, которые удалятся вместе с объектами queryset.
+
+    Связи CASCADE обходятся рекурсивно (у пользователя - его рецепты,
+    у рецептов - их избранное и т.д.), каждая считается одним запросом
+    COUNT. Связи без удаляемых объектов дальше не обходятся.
+
+    Args:
+        queryset (QuerySet): Рецепты или пользователи.
+        can_delete (function): Принимает модель и возвращает, можно ли
+            удалять её объекты. Если не передана, разрешено все.
+
+    Returns:
+        tuple[dict[str, int], set[str]]: Количество объектов
+            по названиям моделей и названия моделей, объекты которых
+            удалять нельзя.
+
+    """
+    counts = {
+        str(queryset.model._meta.verbose_name_plural): queryset.count()
+    }
+    perms_needed = set()
+    _count_related(
+        queryset, counts, perms_needed, can_delete, {queryset.model}
+    )
+    return counts, perms_needed
+
+
+def delete_or_schedule(queryset):
+    """Удаляет рецепты или пользователей сразу или в фоновой задаче.
+
+    Если вместе с рецептами пользователей набирается больше
+    DELETION_SYNC_LIMIT объектов, создается задача DeletionJob.
+
+    Args:
+        queryset (QuerySet): Рецепты или пользователи.
+
+    Returns:
+        DeletionJob: Созданная задача или None, если объекты удалены.
+
+    """
+    target = TARGETS[queryset.model]
+    ids = list(queryset.values_list('pk', flat=True).order_by('pk'))
+    total = len(ids)
+    if target == DeletionJob.USERS:
+        total += Recipe.objects.filter(
+            author_id__in=queryset.values('pk')
+        ).count()
+    if total <= settings.DELETION_SYNC_LIMIT:
+        DELETERS[target](ids)
+        return None
+    return DeletionJob.objects.create(
+        target=target, object_ids=ids, total=total
+    )
+
+
+def _claim_job():
+    """Берет задачу из очереди.
+
+    Задача, которая не обновлялась DELETION_JOB_STALE секунд,
+    считается брошенной и выполняется заново: удаление можно
+    повторять.
+
+    """
+    stale = timezone.now() - timedelta(seconds=settings.DELETION_JOB_STALE)
+    jobs = DeletionJob.objects.filter(
+        Q(status=DeletionJob.PENDING)
+        | Q(status=DeletionJob.RUNNING, updated__lt=stale)
+    ).order_by('id')
+    for job in jobs:
+        claimed = DeletionJob.objects.filter(
+            pk=job.pk, status=job.status, updated=job.updated
+        ).update(
+            status=DeletionJob.RUNNING, processed=0, updated=timezone.now()
+        )
+        if claimed:
+            return job
+    return None
+
+
+def run_job(job):
+    """Выполняет задачу удаления и сохраняет её результат.
+
+    Прогресс записывается в задачу после каждой пачки.
+
+    Args:
+        job (DeletionJob): Задача.
+
+    Returns:
+        str: Итоговое состояние задачи.
+
+    """
+    jobs = DeletionJob.objects.filter(pk=job.pk)
+
+    def progress(number):
+        jobs.update(processed=F('processed') + number, updated=timezone.now())
+
+    result = {'status': DeletionJob.DONE, 'processed': F('total')}
+    try:
+        DELETERS[job.target](job.object_ids, progress)
+    except Exception as error:
+        result = {'status': DeletionJob.FAILED, 'error': repr(error)}
+    jobs.update(finished=timezone.now(), updated=timezone.now(), **result)
+    return result['status']
+
+
+def run_deletion_jobs():
+    """Выполняет задачи удаления из очереди, пока она не опустеет.
+
+    Returns:
+        list[tuple[DeletionJob, str]]: Задачи и их итоговые состояния.
+
+    """
+    results = []
+    job = _claim_job()
+    while job is not None:
+        results.append((job, run_job(job)))
+        job = _claim_job()
+    return results
@@ -0,0 +1,416 @@
+import io
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from time import monotonic
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, models, router, transaction
+from django.utils import timezone as django_timezone
+from PIL import Image
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from recipes.popularity import rebuild_buckets, update_ranking
+from recipes.search import update_search_index
+from recipes.similarity import update_similarity_index
+from recipes.tags import get_tags_mask
+from users.models import CustomUser, Subscribe
+
+# Тэги, которые создаются, если в базе их еще нет.
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+# Отсчет дат регистрации пользователей: от него набор не зависит
+# от времени запуска команды.
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'
+})
+
+
+class Zipf:
+    """Выбор элементов с вероятностью, обратной степени их ранга.
+
+    Первый элемент списка самый популярный: k-й выбирается
+    с вероятностью, пропорциональной 1 / k ** exponent.
+
+    """
+
+    def __init__(self, items, exponent, rng):
+        self.items = items
+        self.rng = rng
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(items) + 1)
+        ))
+
+    def sample(self, count, exclude=None):
+        """Выбирает до count разных элементов.
+
+        Args:
+            count (int): Количество элементов.
+            exclude: Элемент, который нельзя выбирать.
+
+        Returns:
+            list: Выбранные элементы в порядке выбора.
+
+        """
+        count = min(count, len(self.items) - (exclude is not None))
+        chosen = {}
+        for _ in range(10):
+            if len(chosen) >= count:
+                break
+            for item in self.rng.choices(
+                self.items, cum_weights=self.cum_weights, k=count * 2
+            ):
+                if item != exclude:
+                    chosen.setdefault(item, None)
+        return list(chosen)[:count]
+
+
+def around(rng, mean, minimum=0):
+    """Случайное целое с экспоненциальным распределением и средним mean.
+
+    Большинство значений небольшие, но встречаются и крупные: так
+    распределены число рецептов у авторов, избранное, подписки.
+
+    """
+    return max(minimum, round(rng.expovariate(1 / mean))) if mean else 0
+
+
+def insert_rows(connection, model, columns, rows, batch_size):
+    """Вставляет строки в таблицу модели пачками.
+
+    На PostgreSQL строки загружаются через COPY, на остальных базах -
+    через executemany. Сигналы моделей не отправляются.
+
+    Args:
+        connection (BaseDatabaseWrapper): Подключение к базе.
+        model (Model): Модель таблицы.
+        columns (Sequence[str]): Имена полей модели.
+        rows (Iterable[tuple]): Значения полей.
+        batch_size (int): Количество строк в одной пачке.
+
+    Returns:
+        int: Количество вставленных строк.
+
+    """
+    fields = [model._meta.get_field(column) for column in columns]
+    # Целые числа и ключи подходят базе как есть, остальные значения
+    # (даты, булевы) приводятся полем модели.
+    converters = [
+        None if isinstance(field, (models.IntegerField, models.ForeignKey))
+        else field for field in fields
+    ]
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields
+    )
+    rows = iter(rows)
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = [
+                tuple(
+                    value if converter is None
+                    else converter.get_db_prep_save(value, connection)
+                    for converter, value in zip(converters, row)
+                )
+                for row in islice(rows, batch_size)
+            ]
+            if not batch:
+                return total
+            if connection.vendor == 'postgresql':
+                cursor.copy_expert(
+                    f'COPY {table} ({names}) FROM STDIN',
+                    io.StringIO(''.join(
+                        '\t'.join(
+                            '\\N' if value is None
+                            else str(value).translate(COPY_ESCAPES)
+                            for value in row
+                        ) + '\n'
+                        for row in batch
+                    ))
+                )
+            else:
+                cursor.executemany(
+                    f'INSERT INTO {table} ({names}) '
+                    f'VALUES ({", ".join(["%s"] * len(fields))})',
+                    batch
+                )
+            total += len(batch)
+
+
+def next_id(model):
+    return (model.objects.aggregate(
+        last=models.Max('id')
+    )['last'] or 0) + 1
+
+
+def make_images(count, size, rng):
+    """Сохраняет картинки рецептов в хранилище медиафайлов.
+
+    Returns:
+        list[str]: Пути сохраненных картинок.
+
+    """
+    paths = []
+    for number in range(count):
+        image = Image.frombytes(
+            'RGB', (size, size), rng.randbytes(size * size * 3)
+        )
+        content = io.BytesIO()
+        image.save(content, 'JPEG', quality=85)
+        paths.append(default_storage.save(
+            f'recipes/images/dataset-{number}.jpg',
+            ContentFile(content.getvalue())
+        ))
+    return paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает синтетический набор данных: пользователей, рецепты, '
+        'избранное, списки покупок и подписки. При одинаковых параметрах '
+        'и --seed набор получается одинаковым, а даты добавления '
+        'в избранное отсчитываются от начала текущего дня.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help='Количество пользователей.'
+        )
+        parser.add_argument(
+            '--authors', type=float, default=0.2,
+            help='Доля пользователей, которые публикуют рецепты.'
+        )
+        parser.add_argument(
+            '--recipes-per-author', type=float, default=10,
+            help='Среднее количество рецептов у автора.'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=float, default=8,
+            help='Среднее количество ингредиентов в рецепте.'
+        )
+        parser.add_argument(
+            '--favorites-per-user', type=float, default=15,
+            help='Среднее количество рецептов в избранном.'
+        )
+        parser.add_argument(
+            '--cart-per-user', type=float, default=3,
+            help='Среднее количество рецептов в списке покупок.'
+        )
+        parser.add_argument(
+            '--activity-days', type=int, default=60,
+            help='За сколько последних дней распределяются даты добавления '
+                 'в избранное и списки покупок.'
+        )
+        parser.add_argument(
+            '--follows-per-user', type=float, default=5,
+            help='Среднее количество подписок пользователя.'
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель степени распределения Ципфа для популярности '
+                 'ингредиентов, тэгов, рецептов и авторов.'
+        )
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Количество сгенерированных картинок для рецептов '
+                 '(по умолчанию рецепты без картинок).'
+        )
+        parser.add_argument(
+            '--image-size', type=int, default=256,
+            help='Размер стороны картинки в пикселях.'
+        )
+        parser.add_argument(
+            '--prefix', default='dataset',
+            help='Префикс имен создаваемых пользователей.'
+        )
+        parser.add_argument(
+            '--password', default='dataset-password',
+            help='Пароль создаваемых пользователей.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Количество строк в одной вставке.'
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if CustomUser.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).exists():
+            raise CommandError(
+                f'Пользователи с префиксом "{prefix}" уже есть в базе: '
+                'задайте другой --prefix.'
+            )
+        ingredients = list(
+            Ingredient.objects.order_by('id').values_list('id', 'name')
+        )
+        if not ingredients:
+            raise CommandError(
+                'В базе нет ингредиентов: загрузите fixtures.json.'
+            )
+        started = monotonic()
+        connection = connections[router.db_for_write(Recipe)]
+        self.counts = {}
+        with transaction.atomic(using=connection.alias):
+            self.generate(connection, ingredients, options)
+            # Значения id вставлялись явно: последовательности нужно
+            # сдвинуть за них.
+            connection.ops.execute_sql_flush(
+                connection.ops.sequence_reset_sql(no_style(), [
+                    CustomUser, Recipe, IngredientRecipe, TagRecipe,
+                    Favorite, ShoppingCart, Subscribe,
+                ])
+            )
+        call_command('rebuild_recipe_cards', stdout=self.stdout)
+        update_search_index()
+        update_similarity_index()
+        rebuild_buckets()
+        update_ranking()
+        for model, count in self.counts.items():
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Набор данных создан за {monotonic() - started:.1f} с.'
+        ))
+
+    def generate(self, connection, ingredients, options):
+        rng = random.Random(options['seed'])
+
+        def insert(model, columns, rows):
+            self.counts[model] = self.counts.get(model, 0) + insert_rows(
+                connection, model, columns, rows, options['batch_size']
+            )
+
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        tags = Zipf(
+            list(Tag.objects.order_by('id').values_list('id', flat=True)),
+            options['zipf'],
+            rng
+        )
+        # Популярность ингредиентов задается случайной перестановкой.
+        rng.shuffle(ingredients)
+        ingredients = Zipf(ingredients, options['zipf'], rng)
+        images = make_images(options['images'], options['image_size'], rng)
+
+        first_user = next_id(CustomUser)
+        user_ids = list(range(first_user, first_user + options['users']))
+        password = make_password(
+            options['password'], salt=f'{rng.getrandbits(64):016x}'
+        )
+        insert(CustomUser, (
+            'id', 'username', 'email', 'first_name', 'last_name',
+            'password', 'is_superuser', 'is_staff', 'is_active',
+            'date_joined',
+        ), (
+            (
+                user_id,
+                f'{options["prefix"]}_{number}',
+                f'{options["prefix"]}_{number}@example.com',
+                'Пользователь',
+                str(number),
+                password,
+                False,
+                False,
+                True,
+                EPOCH + timedelta(minutes=number),
+            )
+            for number, user_id in enumerate(user_ids)
+        ))
+
+        authors = rng.sample(
+            user_ids, round(len(user_ids) * options['authors'])
+        )
+        recipe_authors = [
+            author
+            for author in authors
+            for _ in range(around(rng, options['recipes_per_author'], 1))
+        ]
+        first_recipe = next_id(Recipe)
+        recipe_ids = list(
+            range(first_recipe, first_recipe + len(recipe_authors))
+        )
+        recipe_ingredients = [
+            ingredients.sample(
+                around(rng, options['ingredients_per_recipe'], 1)
+            )
+            for _ in recipe_ids
+        ]
+        recipe_tags = [
+            tags.sample(rng.randint(1, 3)) for _ in recipe_ids
+        ]
+        insert(Recipe, (
+            'id', 'author', 'name', 'text', 'image', 'cooking_time',
+            'tags_mask',
+        ), (
+            (
+                recipe_id,
+                author,
+                f'{chosen[0][1].capitalize()} №{recipe_id}',
+                'Возьмите: {}. Смешайте и готовьте до готовности.'.format(
+                    ', '.join(name for _, name in chosen)
+                ),
+                rng.choice(images) if images else '',
+                min(600, max(1, round(rng.lognormvariate(3.3, 0.6)))),
+                get_tags_mask(tag_ids) or 0,
+            )
+            for recipe_id, author, chosen, tag_ids in zip(
+                recipe_ids, recipe_authors, recipe_ingredients, recipe_tags
+            )
+        ))
+        insert(IngredientRecipe, ('recipe', 'ingredient', 'amount'), (
+            (recipe_id, ingredient_id, rng.randint(1, 500))
+            for recipe_id, chosen in zip(recipe_ids, recipe_ingredients)
+            for ingredient_id, _ in chosen
+        ))
+        insert(TagRecipe, ('recipe', 'tag'), (
+            (recipe_id, tag_id)
+            for recipe_id, tag_ids in zip(recipe_ids, recipe_tags)
+            for tag_id in tag_ids
+        ))
+
+        # Популярность рецептов и авторов тоже задается перестановкой.
+        rng.shuffle(recipe_ids)
+        rng.shuffle(authors)
+        recipes = Zipf(recipe_ids, options['zipf'], rng)
+        authors = Zipf(authors, options['zipf'], rng)
+        # Даты добавления отсчитываются назад от начала текущего дня,
+        # чтобы в рейтингах популярных за 7 и 30 дней были данные.
+        today = datetime.combine(
+            django_timezone.localdate(), datetime.min.time(), timezone.utc
+        )
+        activity = options['activity_days'] * 24 * 60 * 60
+        for model, mean in (
+            (Favorite, options['favorites_per_user']),
+            (ShoppingCart, options['cart_per_user']),
+        ):
+            insert(model, ('user', 'recipe', 'created'), (
+                (
+                    user_id,
+                    recipe_id,
+                    today - timedelta(seconds=rng.randrange(activity or 1)),
+                )
+                for user_id in user_ids
+                for recipe_id in recipes.sample(around(rng, mean))
+            ))
+        insert(Subscribe, ('user', 'subscribing'), (
+            (user_id, author)
+            for user_id in user_ids
+            for author in authors.sample(
+                around(rng, options['follows_per_user']), exclude=user_id
+            )
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс рецептов.'
+
+    def handle(self, *args, **options):
+        update_search_index()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен.'))
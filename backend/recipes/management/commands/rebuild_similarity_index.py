@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from recipes.similarity import update_similarity_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс MinHash похожих по ингредиентам рецептов.'
+
+    def handle(self, *args, **options):
+        update_similarity_index()
+        self.stdout.write(
+            self.style.SUCCESS('Индекс похожих рецептов перестроен.')
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from recipes.deletion import run_deletion_jobs
+from recipes.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи фонового удаления рецептов и пользователей. '
+        'Запускается периодически, например из cron.'
+    )
+
+    def handle(self, *args, **options):
+        results = run_deletion_jobs()
+        for job, status in results:
+            message = f'{job}: {dict(DeletionJob.STATUSES)[status]}'
+            if status == DeletionJob.FAILED:
+                self.stderr.write(self.style.ERROR(message))
+            else:
+                self.stdout.write(message)
+        self.stdout.write(
+            self.style.SUCCESS(f'Выполнено задач: {len(results)}')
+        )
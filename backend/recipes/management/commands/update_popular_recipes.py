@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from recipes.popularity import compact_buckets, rebuild_buckets, update_ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Сворачивает старые счетчики популярности и пересчитывает рейтинги '
+        'популярных рецептов. Запускается периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать счетчики заново по избранному и спискам '
+                 'покупок.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_buckets()
+        else:
+            compacted = compact_buckets()
+            self.stdout.write(f'Свернуто дневных счетчиков: {compacted}')
+        update_ranking()
+        self.stdout.write(self.style.SUCCESS('Рейтинги рецептов обновлены.'))
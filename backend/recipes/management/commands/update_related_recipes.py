@@ -0,0 +1,36 @@
+from time import monotonic
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.related import build_related_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает связанные рецепты ("добавившие этот рецепт '
+        'добавляли также") по избранному и спискам покупок. '
+        'Запускается периодически, например раз в сутки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.RELATED_RECIPES_LIMIT,
+            help='Сколько связанных рецептов сохранять для рецепта.'
+        )
+        parser.add_argument(
+            '--min-common', type=int, default=2,
+            help='Минимальное число пользователей, добавивших оба рецепта.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Количество рецептов, обрабатываемых за один шаг.'
+        )
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        count = build_related_recipes(
+            options['top_k'], options['min_common'], options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено связей: {count} за {monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    'CREATE TABLE recipes_recipe_search ('
+    'recipe_id bigint PRIMARY KEY, document tsvector NOT NULL)',
+    'CREATE INDEX recipes_recipe_search_document_gin '
+    'ON recipes_recipe_search USING gin (document)',
+    'INSERT INTO recipes_recipe_search (recipe_id, document) '
+    "SELECT r.id, setweight(to_tsvector(%s::regconfig, r.name), 'A') "
+    '|| setweight(to_tsvector(%s::regconfig, '
+    "coalesce(string_agg(i.name, ' '), '')), 'B') "
+    "|| setweight(to_tsvector(%s::regconfig, r.text), 'C') "
+    'FROM recipes_recipe r '
+    'LEFT JOIN recipes_ingredientrecipe ir ON ir.recipe_id = r.id '
+    'LEFT JOIN recipes_ingredient i ON i.id = ir.ingredient_id '
+    'GROUP BY r.id',
+)
+SQLITE_FORWARD = (
+    'CREATE VIRTUAL TABLE recipes_recipe_search USING fts5('
+    "name, ingredients, text, tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO recipes_recipe_search (rowid, name, ingredients, text) '
+    "SELECT r.id, r.name, coalesce(group_concat(i.name, ' '), ''), r.text "
+    'FROM recipes_recipe r '
+    'LEFT JOIN recipes_ingredientrecipe ir ON ir.recipe_id = r.id '
+    'LEFT JOIN recipes_ingredient i ON i.id = ir.ingredient_id '
+    'GROUP BY r.id',
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    config = getattr(settings, 'RECIPE_SEARCH_CONFIG', 'russian')
+    if vendor == 'postgresql':
+        for sql in POSTGRESQL_FORWARD:
+            schema_editor.execute(sql, [config] * sql.count('%s'))
+    elif vendor == 'sqlite':
+        for sql in SQLITE_FORWARD:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute('DROP TABLE recipes_recipe_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0029_auto_20230630_1845'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
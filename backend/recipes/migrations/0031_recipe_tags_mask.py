@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-19 07:35
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+TAGS_MASK_BITS = 63
+
+
+def fill_tags_masks(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    TagRecipe = apps.get_model('recipes', 'TagRecipe')
+    masks = defaultdict(int)
+    tag_recipes = TagRecipe.objects.filter(
+        tag_id__lt=TAGS_MASK_BITS
+    ).values_list('recipe_id', 'tag_id')
+    for recipe_id, tag_id in tag_recipes.iterator():
+        masks[recipe_id] |= 1 << tag_id
+    Recipe.objects.bulk_update(
+        [
+            Recipe(id=recipe_id, tags_mask=mask)
+            for recipe_id, mask in masks.items()
+        ],
+        ('tags_mask',),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0030_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Битовая маска тэгов'),
+        ),
+        migrations.RunPython(fill_tags_masks, migrations.RunPython.noop),
+    ]
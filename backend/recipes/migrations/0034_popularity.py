@@ -0,0 +1,98 @@
+# Generated by Django 3.2 on 2026-10-19 08:21
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_popularity_buckets(apps, schema_editor):
+    # Дата добавления существующих записей - время миграции, поэтому
+    # все они попадают в счетчики текущего дня.
+    PopularityBucket = apps.get_model('recipes', 'PopularityBucket')
+    counts = defaultdict(dict)
+    for model_name, field in (
+        ('Favorite', 'favorites'),
+        ('ShoppingCart', 'carts'),
+    ):
+        model = apps.get_model('recipes', model_name)
+        rows = model.objects.values('recipe_id').annotate(
+            count=models.Count('id')
+        ).values_list('recipe_id', 'count')
+        for recipe_id, count in rows.iterator():
+            counts[recipe_id][field] = count
+    day = django.utils.timezone.localdate()
+    PopularityBucket.objects.bulk_create(
+        (
+            PopularityBucket(recipe_id=recipe_id, day=day, **fields)
+            for recipe_id, fields in counts.items()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0033_recipe_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='PopularRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=8, verbose_name='Период')),
+                ('rank', models.PositiveIntegerField(verbose_name='Место')),
+                ('favorites', models.IntegerField(verbose_name='Добавления в избранное')),
+                ('carts', models.IntegerField(verbose_name='Добавления в список покупок')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Популярный рецепт',
+                'verbose_name_plural': 'Популярные рецепты',
+            },
+        ),
+        migrations.CreateModel(
+            name='PopularityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('favorites', models.IntegerField(default=0, verbose_name='Добавления в избранное')),
+                ('carts', models.IntegerField(default=0, verbose_name='Добавления в список покупок')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity_buckets', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Счетчик популярности',
+                'verbose_name_plural': 'Счетчики популярности',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='popularrecipe',
+            constraint=models.UniqueConstraint(fields=('window', 'rank'), name='unique_popular_recipe_rank'),
+        ),
+        migrations.AddIndex(
+            model_name='popularitybucket',
+            index=models.Index(fields=['day'], name='popularity_bucket_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='popularitybucket',
+            constraint=models.UniqueConstraint(fields=('recipe', 'day'), name='unique_popularity_bucket'),
+        ),
+        migrations.RunPython(
+            fill_popularity_buckets, migrations.RunPython.noop
+        ),
+    ]
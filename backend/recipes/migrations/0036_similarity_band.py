@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-19 08:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0035_related_recipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(verbose_name='Ключ полосы')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_bands', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Полоса подписи рецепта',
+                'verbose_name_plural': 'Полосы подписей рецептов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='similarityband',
+            index=models.Index(fields=['key', 'recipe'], name='similarity_band_key_idx'),
+        ),
+    ]
@@ -57,7 +57,8 @@ class Recipe(models.Model):
         CustomUser,
         verbose_name='Автор рецепта',
         related_name='recipes',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     name = models.CharField(
         verbose_name='Название',
@@ -85,10 +86,21 @@ class Recipe(models.Model):
         verbose_name='Время приготовления (в минутах)',
         validators=(MinValueValidator(1),)
     )
+    tags_mask = models.BigIntegerField(
+        verbose_name='Битовая маска тэгов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_desc_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -107,7 +119,8 @@ class IngredientRecipe(models.Model):
         Recipe,
         verbose_name='Рецепт',
         related_name='ingredient_recipe',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     amount = models.PositiveSmallIntegerField(
         verbose_name='Количество ингредиента в рецепте',
@@ -123,6 +136,12 @@ class IngredientRecipe(models.Model):
                 name='uniqe_ingredient_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient', 'amount'],
+                name='ingredientrecipe_covering_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.ingredient} {self.recipe}'
@@ -173,6 +192,10 @@ class Favorite(models.Model):
         related_name='favorite',
         on_delete=models.CASCADE
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -203,6 +226,10 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         on_delete=models.CASCADE
     )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -216,3 +243,238 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} {self.recipe}'
+
+
+class RecipeCard(models.Model):
+    """Готовое представление рецепта для API в формате JSON.
+
+    Содержит все поля рецепта, кроме зависящих от пользователя,
+    и перестраивается при изменении рецепта или связанных объектов.
+
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        related_name='card',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    document = models.TextField(verbose_name='Документ JSON')
+
+    class Meta:
+        verbose_name = 'Карточка рецепта'
+        verbose_name_plural = 'Карточки рецептов'
+
+    def __str__(self):
+        return f'{self.recipe}'
+
+
+class PopularityBucket(models.Model):
+    """Добавления рецепта в избранное и списки покупок за день.
+
+    Счетчики старше самого длинного периода рейтинга сворачиваются
+    в одну запись с днем ARCHIVE_DAY (см. recipes.popularity).
+
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        related_name='popularity_buckets',
+        on_delete=models.CASCADE
+    )
+    day = models.DateField(verbose_name='День')
+    favorites = models.IntegerField(
+        verbose_name='Добавления в избранное',
+        default=0
+    )
+    carts = models.IntegerField(
+        verbose_name='Добавления в список покупок',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Счетчик популярности'
+        verbose_name_plural = 'Счетчики популярности'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'day'],
+                name='unique_popularity_bucket'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='popularity_bucket_day_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.day}'
+
+
+class PopularRecipe(models.Model):
+    """Место рецепта в рейтинге популярности за период."""
+
+    window = models.CharField(
+        verbose_name='Период',
+        max_length=8
+    )
+    rank = models.PositiveIntegerField(verbose_name='Место')
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        related_name='rankings',
+        on_delete=models.CASCADE
+    )
+    favorites = models.IntegerField(verbose_name='Добавления в избранное')
+    carts = models.IntegerField(verbose_name='Добавления в список покупок')
+
+    class Meta:
+        verbose_name = 'Популярный рецепт'
+        verbose_name_plural = 'Популярные рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['window', 'rank'],
+                name='unique_popular_recipe_rank'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.window} {self.rank} {self.recipe}'
+
+
+class RelatedRecipe(models.Model):
+    """Рецепт, который часто добавляют вместе с данным.
+
+    Таблица заполняется командой update_related_recipes по совместным
+    добавлениям в избранное и списки покупок.
+
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        related_name='related_recipes',
+        on_delete=models.CASCADE
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    related = models.ForeignKey(
+        Recipe,
+        verbose_name='Похожий рецепт',
+        related_name='related_to',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Связанный рецепт'
+        verbose_name_plural = 'Связанные рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'rank'],
+                name='unique_related_recipe_rank'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.related}'
+
+
+class SimilarityBand(models.Model):
+    """Ключ полосы MinHash-подписи набора ингредиентов рецепта.
+
+    Рецепты с общим ключом - кандидаты в похожие (см. recipes.similarity).
+
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        related_name='similarity_bands',
+        on_delete=models.CASCADE
+    )
+    key = models.BigIntegerField(verbose_name='Ключ полосы')
+
+    class Meta:
+        verbose_name = 'Полоса подписи рецепта'
+        verbose_name_plural = 'Полосы подписей рецептов'
+        indexes = [
+            models.Index(
+                fields=['key', 'recipe'],
+                name='similarity_band_key_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.key}'
+
+
+class DeletionJob(models.Model):
+    """Фоновое удаление рецептов или пользователей.
+
+    Задачи выполняет команда run_deletion_jobs (см. recipes.deletion).
+    Поле processed показывает, сколько рецептов и пользователей
+    из total уже обработано.
+
+    """
+
+    RECIPES = 'recipes'
+    USERS = 'users'
+    TARGETS = (
+        (RECIPES, 'Рецепты'),
+        (USERS, 'Пользователи'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    target = models.CharField(
+        verbose_name='Что удаляется',
+        max_length=16,
+        choices=TARGETS
+    )
+    object_ids = models.JSONField(verbose_name='id объектов')
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    total = models.PositiveIntegerField(
+        verbose_name='Всего объектов',
+        default=0
+    )
+    processed = models.PositiveIntegerField(
+        verbose_name='Обработано',
+        default=0
+    )
+    error = models.TextField(
+        verbose_name='Ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+    updated = models.DateTimeField(
+        verbose_name='Обновлена',
+        auto_now=True
+    )
+    finished = models.DateTimeField(
+        verbose_name='Завершена',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    def __str__(self):
+        return f'{self.get_target_display()} {self.pk}'
@@ -0,0 +1,215 @@
+import threading
+from array import array
+from collections import defaultdict
+from time import monotonic, time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import receiver
+
+from .models import IngredientRecipe
+from .signals import recipes_changed
+
+VERSION_KEY = 'recipes:pantry:version'
+CHANGE_KEY = 'recipes:pantry:change:{}'
+# Сколько секунд хранятся записи журнала изменений и при каком отставании
+# индекс процесса перестраивается целиком, а не по журналу.
+CHANGE_TIMEOUT = 24 * 60 * 60
+MAX_CHANGES = 100
+
+
+def _get_cache():
+    return caches[settings.PANTRY_INDEX_CACHE]
+
+
+def _get_version(cache):
+    version = cache.get(VERSION_KEY)
+    if version is not None:
+        return version
+    cache.add(VERSION_KEY, int(time() * 1000), None)
+    return cache.get(VERSION_KEY)
+
+
+@receiver(recipes_changed)
+def recipes_changed_handler(sender, recipe_ids, **kwargs):
+    """Записывает измененные рецепты в журнал для индексов всех процессов.
+
+    В кэше в таблице базы incr не атомарен, и два процесса могут
+    получить один номер записи. Запись добавляется через add, и
+    проигравший процесс берет следующий номер; если записи с номером
+    версии в журнале нет, индексы перестраиваются целиком.
+
+    """
+    cache = _get_cache()
+    _get_version(cache)
+    for _ in range(MAX_CHANGES):
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            return
+        if cache.add(
+            CHANGE_KEY.format(version), list(recipe_ids), CHANGE_TIMEOUT
+        ):
+            return
+
+
+def _load_recipes(recipe_ids=None):
+    relations = IngredientRecipe.objects.all()
+    if recipe_ids is not None:
+        relations = relations.filter(recipe_id__in=recipe_ids)
+    recipes = defaultdict(list)
+    for recipe_id, ingredient_id in relations.values_list(
+        'recipe_id', 'ingredient_id'
+    ).order_by().iterator():
+        recipes[recipe_id].append(ingredient_id)
+    return recipes
+
+
+class PantryIndex:
+    """Обратный индекс ингредиентов рецептов в памяти процесса.
+
+    Рецептам присваиваются номера по порядку; для каждого ингредиента
+    хранится отсортированный массив номеров рецептов, для каждого
+    рецепта - его id, число ингредиентов и сами ингредиенты. Индекс
+    строится при первом поиске, а затем догоняет изменения по журналу
+    в кэше PANTRY_INDEX_CACHE, поэтому видит изменения из других
+    процессов. Если журнал недоступен, индекс перестраивается целиком
+    не реже чем раз в PANTRY_INDEX_TIMEOUT секунд.
+
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = 0
+        self.postings = {}
+        self.positions = {}
+        self.recipes = {}
+        self.ids = array('q')
+        self.sizes = array('i')
+
+    def build(self, version):
+        recipes = _load_recipes()
+        self.ids = array('q', recipes)
+        self.sizes = array('i', map(len, recipes.values()))
+        self.positions = {
+            recipe_id: position for position, recipe_id in enumerate(recipes)
+        }
+        self.recipes = {
+            recipe_id: tuple(ingredient_ids)
+            for recipe_id, ingredient_ids in recipes.items()
+        }
+        postings = defaultdict(list)
+        for position, ingredient_ids in enumerate(recipes.values()):
+            for ingredient_id in ingredient_ids:
+                postings[ingredient_id].append(position)
+        self.postings = {
+            ingredient_id: np.array(positions, dtype=np.int32)
+            for ingredient_id, positions in postings.items()
+        }
+        self.version = version
+        self.built_at = monotonic()
+
+    def apply(self, recipe_ids, version):
+        """Обновляет записи указанных рецептов по данным из базы.
+
+        Номер удаленного рецепта не используется до перестроения.
+
+        """
+        recipes = _load_recipes(recipe_ids)
+        for recipe_id in recipe_ids:
+            position = self.positions.get(recipe_id)
+            for ingredient_id in self.recipes.pop(recipe_id, ()):
+                posting = self.postings[ingredient_id]
+                self.postings[ingredient_id] = np.delete(
+                    posting, np.searchsorted(posting, position)
+                )
+            if recipe_id not in recipes:
+                if position is not None:
+                    self.sizes[position] = 0
+                continue
+            if position is None:
+                position = self.positions[recipe_id] = len(self.ids)
+                self.ids.append(recipe_id)
+                self.sizes.append(0)
+            self.recipes[recipe_id] = tuple(recipes[recipe_id])
+            self.sizes[position] = len(recipes[recipe_id])
+            for ingredient_id in recipes[recipe_id]:
+                posting = self.postings.get(
+                    ingredient_id, np.empty(0, dtype=np.int32)
+                )
+                self.postings[ingredient_id] = np.insert(
+                    posting, np.searchsorted(posting, position), position
+                )
+        self.version = version
+
+    def refresh(self):
+        cache = _get_cache()
+        version = _get_version(cache)
+        if version == self.version and (
+            monotonic() - self.built_at < settings.PANTRY_INDEX_TIMEOUT
+        ):
+            return
+        if (
+            self.version is None or version < self.version
+            or version - self.version > MAX_CHANGES
+            or monotonic() - self.built_at >= settings.PANTRY_INDEX_TIMEOUT
+        ):
+            self.build(version)
+            return
+        keys = [
+            CHANGE_KEY.format(number)
+            for number in range(self.version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            self.build(version)
+            return
+        self.apply(
+            {recipe_id for ids in changes.values() for recipe_id in ids},
+            version
+        )
+
+    def search(self, ingredient_ids, max_missing=0):
+        """Находит рецепты, которые можно приготовить из ингредиентов.
+
+        Массивы рецептов переданных ингредиентов объединяются, и для
+        каждого рецепта подсчитывается, сколько его ингредиентов есть
+        среди переданных.
+
+        Args:
+            ingredient_ids (Iterable[int]): id имеющихся ингредиентов.
+            max_missing (int): Сколько ингредиентов рецепта может
+                не хватать.
+
+        Returns:
+            list[tuple[int, int]]: id рецептов и число недостающих
+                ингредиентов, сначала рецепты с большей долей имеющихся
+                ингредиентов.
+
+        """
+        with self.lock:
+            self.refresh()
+            postings = [
+                self.postings[ingredient_id]
+                for ingredient_id in set(ingredient_ids)
+                if ingredient_id in self.postings
+            ]
+            if not postings:
+                return []
+            counts = np.bincount(
+                np.concatenate(postings), minlength=len(self.ids)
+            )
+            matched = np.flatnonzero(counts)
+            sizes = np.array(self.sizes, dtype=np.int32)[matched]
+            ids = np.array(self.ids, dtype=np.int64)[matched]
+        counts = counts[matched]
+        missing = sizes - counts
+        keep = missing <= max_missing
+        ids, missing = ids[keep], missing[keep]
+        order = np.lexsort((-ids, missing, -counts[keep] / sizes[keep]))
+        return list(zip(ids[order].tolist(), missing[order].tolist()))
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,206 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Favorite, PopularityBucket, PopularRecipe, ShoppingCart
+
+# Периоды рейтинга и их длина в днях, None - за все время.
+WINDOWS = {'7d': 7, '30d': 30, 'all': None}
+# Счетчики за дни раньше самого длинного периода сворачиваются
+# в одну запись рецепта с этим днем.
+ARCHIVE_DAY = date(1970, 1, 1)
+BUCKET_DAYS = max(days for days in WINDOWS.values() if days)
+COUNTERS = {Favorite: 'favorites', ShoppingCart: 'carts'}
+
+
+def _get_limit():
+    return getattr(settings, 'POPULAR_RECIPES_LIMIT', 100)
+
+
+def count(model, recipe_id, day, delta):
+    """Изменяет счетчик добавлений рецепта за день.
+
+    Удаление уменьшает счетчик того дня, когда рецепт был добавлен,
+    а если этот счетчик уже свернут - архивную запись рецепта.
+    Записи для удаления не создаются: рецепт может удаляться вместе
+    с ними.
+
+    Args:
+        model (ModelBase): Favorite или ShoppingCart.
+        recipe_id (int): id рецепта.
+        day (date): День добавления.
+        delta (int): 1 при добавлении, -1 при удалении.
+
+    """
+    field = COUNTERS[model]
+    buckets = PopularityBucket.objects.filter(recipe_id=recipe_id)
+    increment = {field: F(field) + delta}
+    if buckets.filter(day=day).update(**increment):
+        return
+    if delta < 0:
+        buckets.filter(day=ARCHIVE_DAY).update(**increment)
+        return
+    try:
+        with transaction.atomic(using=router.db_for_write(PopularityBucket)):
+            PopularityBucket.objects.create(
+                recipe_id=recipe_id, day=day, **{field: delta}
+            )
+    except IntegrityError:
+        buckets.filter(day=day).update(**increment)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def popularity_added(sender, instance, created, **kwargs):
+    if created:
+        count(
+            sender, instance.recipe_id, timezone.localdate(instance.created), 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def popularity_removed(sender, instance, **kwargs):
+    count(sender, instance.recipe_id, timezone.localdate(instance.created), -1)
+
+
+def uncount(queryset):
+    """Уменьшает счетчики на добавления, которые удаляются без сигналов.
+
+    Добавления группируются по рецептам и дням, и каждый счетчик
+    изменяется одним запросом.
+
+    Args:
+        queryset (QuerySet): Удаляемые записи Favorite или ShoppingCart.
+
+    """
+    rows = queryset.annotate(
+        day=TruncDate('created')
+    ).values('recipe_id', 'day').annotate(
+        count=Count('id')
+    ).values_list('recipe_id', 'day', 'count').order_by()
+    for recipe_id, day, number in rows:
+        count(queryset.model, recipe_id, day, -number)
+
+
+def _store_archive(totals):
+    archive = {
+        bucket.recipe_id: bucket
+        for bucket in PopularityBucket.objects.select_for_update().filter(
+            day=ARCHIVE_DAY, recipe_id__in=list(totals)
+        )
+    }
+    for bucket in archive.values():
+        bucket.favorites += totals[bucket.recipe_id]['favorites']
+        bucket.carts += totals[bucket.recipe_id]['carts']
+    PopularityBucket.objects.bulk_update(
+        archive.values(), ('favorites', 'carts'), batch_size=1000
+    )
+    PopularityBucket.objects.bulk_create(
+        (
+            PopularityBucket(recipe_id=recipe_id, day=ARCHIVE_DAY, **fields)
+            for recipe_id, fields in totals.items()
+            if recipe_id not in archive
+        ),
+        batch_size=1000
+    )
+
+
+def compact_buckets(today=None):
+    """Сворачивает дневные счетчики старше BUCKET_DAYS дней в архивные.
+
+    Args:
+        today (date): Текущий день, по умолчанию - сегодня.
+
+    Returns:
+        int: Количество свернутых дневных записей.
+
+    """
+    cutoff = (today or timezone.localdate()) - timedelta(days=BUCKET_DAYS)
+    with transaction.atomic(using=router.db_for_write(PopularityBucket)):
+        old = PopularityBucket.objects.filter(
+            day__gt=ARCHIVE_DAY, day__lte=cutoff
+        )
+        # Блокировка не дает параллельным удалениям из избранного
+        # изменить счетчики между подсчетом и удалением.
+        compacted = len(old.select_for_update().values_list('id'))
+        if not compacted:
+            return 0
+        totals = {
+            row.pop('recipe_id'): row
+            for row in old.values('recipe_id').annotate(
+                favorites=Sum('favorites'), carts=Sum('carts')
+            ).order_by()
+        }
+        _store_archive(totals)
+        old.delete()
+    return compacted
+
+
+def rebuild_buckets():
+    """Пересчитывает все счетчики по избранному и спискам покупок.
+
+    Нужен после загрузки данных в обход моделей, например командой
+    generate_dataset.
+
+    """
+    counts = defaultdict(dict)
+    for model, field in COUNTERS.items():
+        rows = model.objects.annotate(
+            day=TruncDate('created')
+        ).values('recipe_id', 'day').annotate(
+            count=Count('id')
+        ).values_list('recipe_id', 'day', 'count').order_by()
+        for recipe_id, day, number in rows.iterator():
+            counts[recipe_id, day][field] = number
+    with transaction.atomic(using=router.db_for_write(PopularityBucket)):
+        PopularityBucket.objects.all().delete()
+        PopularityBucket.objects.bulk_create(
+            (
+                PopularityBucket(recipe_id=recipe_id, day=day, **fields)
+                for (recipe_id, day), fields in counts.items()
+            ),
+            batch_size=1000
+        )
+    compact_buckets()
+
+
+def update_ranking(today=None):
+    """Пересчитывает рейтинги популярных рецептов за все периоды.
+
+    В рейтинг попадают POPULAR_RECIPES_LIMIT рецептов с наибольшей
+    суммой добавлений в избранное и списки покупок за период.
+
+    Args:
+        today (date): Текущий день, по умолчанию - сегодня.
+
+    """
+    today = today or timezone.localdate()
+    with transaction.atomic(using=router.db_for_write(PopularRecipe)):
+        for window, days in WINDOWS.items():
+            buckets = PopularityBucket.objects.all()
+            if days:
+                buckets = buckets.filter(day__gt=today - timedelta(days=days))
+            top = buckets.values('recipe_id').annotate(
+                total_favorites=Sum('favorites'),
+                total_carts=Sum('carts'),
+                score=Sum('favorites') + Sum('carts'),
+            ).filter(score__gt=0).order_by('-score', '-recipe_id')
+            PopularRecipe.objects.filter(window=window).delete()
+            PopularRecipe.objects.bulk_create(
+                PopularRecipe(
+                    window=window,
+                    rank=rank,
+                    recipe_id=row['recipe_id'],
+                    favorites=row['total_favorites'],
+                    carts=row['total_carts'],
+                )
+                for rank, row in enumerate(top[:_get_limit()], 1)
+            )
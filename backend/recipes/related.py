@@ -0,0 +1,118 @@
+import numpy as np
+from django.db import router, transaction
+from scipy import sparse
+
+from .models import Favorite, Recipe, RelatedRecipe, ShoppingCart
+
+
+def _load_pairs():
+    """Загружает пары пользователь - рецепт из избранного и списков покупок.
+
+    Returns:
+        tuple[ndarray, ndarray]: id пользователей и id рецептов.
+
+    """
+    users, recipes = [], []
+    for model in (Favorite, ShoppingCart):
+        pairs = model.objects.values_list('user_id', 'recipe_id').order_by()
+        flat = np.fromiter(
+            (value for pair in pairs.iterator() for value in pair),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        users.append(flat[:, 0])
+        recipes.append(flat[:, 1])
+    return np.concatenate(users), np.concatenate(recipes)
+
+
+def _top_neighbours(block, start, counts, top_k, min_common):
+    """Выбирает top_k соседей для каждой строки блока совместных добавлений.
+
+    Args:
+        block (csr_matrix): Строки матрицы совместных добавлений
+            рецептов с номерами от start.
+        start (int): Номер первой строки блока.
+        counts (ndarray): Количество пользователей у каждого рецепта.
+        top_k (int): Количество соседей.
+        min_common (int): Минимальное число общих пользователей.
+
+    Returns:
+        tuple[ndarray, ndarray, ndarray, ndarray]: Номера рецептов,
+            места, номера соседей и их сходство.
+
+    """
+    block = block.tocoo()
+    rows = block.row + start
+    keep = (block.col != rows) & (block.data >= min_common)
+    rows, cols, common = rows[keep], block.col[keep], block.data[keep]
+    # Косинусное сходство: иначе соседями любого рецепта были бы
+    # просто самые популярные рецепты.
+    scores = common / np.sqrt(counts[rows] * counts[cols])
+    order = np.lexsort((-cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    first = np.searchsorted(rows, rows, side='left')
+    ranks = np.arange(len(rows)) - first
+    keep = ranks < top_k
+    return rows[keep], ranks[keep] + 1, cols[keep], scores[keep]
+
+
+def build_related_recipes(top_k=10, min_common=2, chunk_size=2000):
+    """Пересчитывает связанные рецепты по совместным добавлениям.
+
+    Строит разреженную матрицу пользователи x рецепты, где единица
+    означает, что рецепт есть в избранном или списке покупок
+    пользователя. Произведение транспонированной матрицы на саму себя
+    дает число общих пользователей у каждой пары рецептов; оно
+    считается блоками по chunk_size рецептов, чтобы не держать в памяти
+    всю матрицу пар.
+
+    Args:
+        top_k (int): Сколько связанных рецептов сохранять для рецепта.
+        min_common (int): Минимальное число общих пользователей пары.
+        chunk_size (int): Количество рецептов в одном блоке.
+
+    Returns:
+        int: Количество сохраненных связей.
+
+    """
+    user_ids, recipe_ids = _load_pairs()
+    recipe_keys, recipe_index = np.unique(recipe_ids, return_inverse=True)
+    _, user_index = np.unique(user_ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (
+            np.ones(len(user_index), dtype=np.int32),
+            (user_index, recipe_index)
+        ),
+        shape=(user_index.max(initial=-1) + 1, len(recipe_keys))
+    )
+    # Рецепт в избранном и в списке покупок считается один раз.
+    matrix.data[:] = 1
+    counts = np.asarray(matrix.sum(axis=0)).ravel()
+    transposed = matrix.T.tocsr()
+    results = [
+        _top_neighbours(
+            transposed[start:start + chunk_size] @ matrix,
+            start, counts, top_k, min_common
+        )
+        for start in range(0, len(recipe_keys), chunk_size)
+    ]
+    keys = recipe_keys.tolist()
+    with transaction.atomic(using=router.db_for_write(RelatedRecipe)):
+        existing = set(Recipe.objects.values_list('id', flat=True))
+        RelatedRecipe.objects.all().delete()
+        return len(RelatedRecipe.objects.bulk_create(
+            (
+                RelatedRecipe(
+                    recipe_id=keys[row],
+                    rank=rank,
+                    related_id=keys[col],
+                    score=score,
+                )
+                for rows, ranks, cols, scores in results
+                for row, rank, col, score in zip(
+                    rows.tolist(), ranks.tolist(), cols.tolist(),
+                    scores.tolist()
+                )
+                if keys[row] in existing and keys[col] in existing
+            ),
+            batch_size=5000
+        ))
@@ -0,0 +1,159 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.dispatch import receiver
+
+from .models import Recipe
+from .signals import recipes_changed
+
+SEARCH_TABLE = 'recipes_recipe_search'
+
+# Документ рецепта: название, названия ингредиентов и описание.
+# Веса колонок задают их значимость при ранжировании.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector(%s::regconfig, r.name), 'A')"
+    " || setweight(to_tsvector(%s::regconfig,"
+    " coalesce(string_agg(i.name, ' '), '')), 'B')"
+    " || setweight(to_tsvector(%s::regconfig, r.text), 'C')"
+)
+SQLITE_BM25_WEIGHTS = '10.0, 5.0, 1.0'
+
+
+def _get_config():
+    return getattr(settings, 'RECIPE_SEARCH_CONFIG', 'russian')
+
+
+def _get_terms(query):
+    """Разбивает поисковую строку на слова без служебных символов."""
+    return re.findall(r'\w+', query)
+
+
+def _update_postgresql(cursor, recipe_ids):
+    condition, params = '', [_get_config()] * 3
+    if recipe_ids is not None:
+        condition = 'WHERE r.id = ANY(%s)'
+        params.append(recipe_ids)
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE recipe_id = ANY(%s)',
+            [recipe_ids]
+        )
+    else:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (recipe_id, document) '
+        f'SELECT r.id, {POSTGRES_DOCUMENT} FROM recipes_recipe r '
+        'LEFT JOIN recipes_ingredientrecipe ir ON ir.recipe_id = r.id '
+        'LEFT JOIN recipes_ingredient i ON i.id = ir.ingredient_id '
+        f'{condition} GROUP BY r.id',
+        params
+    )
+
+
+def _update_sqlite(cursor, recipe_ids):
+    condition, params = '', []
+    if recipe_ids is not None:
+        condition = 'WHERE r.id IN ({})'.format(
+            ', '.join(['%s'] * len(recipe_ids))
+        )
+        params = recipe_ids
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} '
+            f'{condition.replace("r.id", "rowid")}',
+            params
+        )
+    else:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, name, ingredients, text) '
+        "SELECT r.id, r.name, coalesce(group_concat(i.name, ' '), ''), "
+        'r.text FROM recipes_recipe r '
+        'LEFT JOIN recipes_ingredientrecipe ir ON ir.recipe_id = r.id '
+        'LEFT JOIN recipes_ingredient i ON i.id = ir.ingredient_id '
+        f'{condition} GROUP BY r.id',
+        params
+    )
+
+
+def update_search_index(recipe_ids=None):
+    """Перестраивает поисковый индекс для указанных рецептов.
+
+    Записи удаленных рецептов убираются из индекса.
+
+    Args:
+        recipe_ids (Iterable[int]): id рецептов. Если не переданы,
+            индекс перестраивается целиком.
+
+    """
+    connection = connections[router.db_for_write(Recipe)]
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            _update_postgresql(cursor, recipe_ids)
+        elif connection.vendor == 'sqlite':
+            _update_sqlite(cursor, recipe_ids)
+
+
+@receiver(recipes_changed)
+def recipes_changed_handler(sender, recipe_ids, **kwargs):
+    update_search_index(recipe_ids)
+
+
+def search_recipes(queryset, query):
+    """Отбирает рецепты, подходящие под поисковый запрос.
+
+    Каждое слово запроса ищется как префикс, найденные рецепты
+    сортируются по релевантности.
+
+    Args:
+        queryset (QuerySet[Recipe]): Список рецептов.
+        query (str): Поисковая строка.
+
+    Returns:
+        queryset (QuerySet[Recipe]): Рецепты, содержащие все слова запроса,
+            с аннотацией 'search_rank'.
+
+    """
+    terms = _get_terms(query)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        params = [_get_config(), ' & '.join(f'{term}:*' for term in terms)]
+        matched = RawSQL(
+            f'SELECT recipe_id FROM {SEARCH_TABLE} '
+            'WHERE document @@ to_tsquery(%s::regconfig, %s)',
+            params
+        )
+        rank = RawSQL(
+            'SELECT ts_rank(document, to_tsquery(%s::regconfig, %s)) '
+            f'FROM {SEARCH_TABLE} '
+            'WHERE recipe_id = recipes_recipe.id',
+            params
+        )
+    elif vendor == 'sqlite':
+        params = [' '.join(f'"{term}"*' for term in terms)]
+        matched = RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            params
+        )
+        rank = RawSQL(
+            f'SELECT -bm25({SEARCH_TABLE}, {SQLITE_BM25_WEIGHTS}) '
+            f'FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = recipes_recipe.id',
+            params
+        )
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(text__icontains=term)
+        return queryset.filter(condition)
+    return queryset.filter(id__in=matched).annotate(
+        search_rank=rank
+    ).order_by('-search_rank', '-id')
@@ -0,0 +1,142 @@
+import logging
+
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from users.models import CustomUser
+
+from .models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+
+# Отправляется после фиксации транзакции, в которой изменились рецепты
+# или связанные с ними объекты. Аргумент recipe_ids - множество id
+# затронутых рецептов, в том числе удаленных.
+recipes_changed = Signal()
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingChanges:
+    """Рецепты, измененные в текущей транзакции.
+
+    Объект регистрируется через on_commit при первом изменении
+    в транзакции и рассылает сигнал после её фиксации. При откате
+    Django отбрасывает его вместе с накопленными id.
+
+    """
+
+    def __init__(self):
+        self.recipe_ids = set()
+        self.sent = False
+
+    def __call__(self):
+        self.sent = True
+        results = recipes_changed.send_robust(
+            sender=Recipe, recipe_ids=self.recipe_ids
+        )
+        for handler, result in results:
+            if isinstance(result, Exception):
+                # Изменения уже зафиксированы: ошибка обработчика
+                # не должна мешать остальным и ответу на запрос.
+                logger.error(
+                    'Обработчик recipes_changed %s завершился ошибкой.',
+                    getattr(handler, '__qualname__', handler),
+                    exc_info=result
+                )
+
+
+def _get_pending(connection):
+    # Уже выполненный обработчик может остаться в списке, например
+    # при captureOnCommitCallbacks в тестах: новые id в него не попадут.
+    for _, callback in connection.run_on_commit:
+        if isinstance(callback, _PendingChanges) and not callback.sent:
+            return callback
+    return None
+
+
+def mark_recipes_changed(recipe_ids):
+    """Отмечает рецепты как измененные.
+
+    Изменения внутри одной транзакции собираются вместе, и сигнал
+    'recipes_changed' отправляется один раз после её фиксации
+    (вне транзакции - сразу). Ошибки обработчиков записываются в лог.
+
+    Args:
+        recipe_ids (Iterable[int]): id измененных рецептов.
+
+    """
+    using = router.db_for_write(Recipe)
+    connection = transaction.get_connection(using)
+    pending = _get_pending(connection) if connection.in_atomic_block else None
+    if pending is not None:
+        pending.recipe_ids.update(recipe_ids)
+        return
+    pending = _PendingChanges()
+    pending.recipe_ids.update(recipe_ids)
+    transaction.on_commit(pending, using=using)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    mark_recipes_changed((instance.pk,))
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_delete, sender=TagRecipe)
+def recipe_relation_changed(sender, instance, **kwargs):
+    mark_recipes_changed((instance.recipe_id,))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    mark_recipes_changed(
+        IngredientRecipe.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Tag)
+def tag_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    mark_recipes_changed(
+        TagRecipe.objects.filter(
+            tag=instance
+        ).values_list('recipe_id', flat=True)
+    )
+
+
+# Поля автора, которые выводятся вместе с рецептом.
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=CustomUser)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and not AUTHOR_FIELDS & set(update_fields)):
+        return
+    mark_recipes_changed(
+        Recipe.objects.filter(author=instance).values_list('id', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=IngredientRecipe)
+@receiver(m2m_changed, sender=TagRecipe)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            mark_recipes_changed((instance.pk,))
+    elif action in ('post_add', 'post_remove'):
+        mark_recipes_changed(pk_set)
+    elif action == 'pre_clear':
+        field_name = 'tag' if sender is TagRecipe else 'ingredient'
+        mark_recipes_changed(
+            sender.objects.filter(
+                **{field_name: instance}
+            ).values_list('recipe_id', flat=True)
+        )
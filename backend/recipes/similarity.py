@@ -0,0 +1,198 @@
+import hashlib
+import random
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.dispatch import receiver
+
+from .models import IngredientRecipe, SimilarityBand
+from .signals import recipes_changed
+
+# MinHash-подпись набора ингредиентов делится на BANDS полос
+# по BAND_ROWS значений. Рецепты с одинаковой хотя бы одной полосой
+# становятся кандидатами: пара со сходством Жаккара 0.5 попадает
+# в кандидаты с вероятностью 0.93, со сходством 0.2 - 0.15.
+BANDS = 20
+BAND_ROWS = 3
+SIGNATURE_SIZE = BANDS * BAND_ROWS
+MERSENNE_PRIME = (1 << 61) - 1
+# Подписи в базе зависят от параметров хэш-функций: при изменении
+# SEED или размеров подписи индекс нужно перестроить.
+SEED = 20231
+
+
+def _make_hash_params():
+    rng = random.Random(SEED)
+    return tuple(
+        (rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+        for _ in range(SIGNATURE_SIZE)
+    )
+
+
+HASH_PARAMS = _make_hash_params()
+
+
+def get_signature(ingredient_ids):
+    """Вычисляет MinHash-подпись набора ингредиентов.
+
+    Доля совпадающих значений подписей двух наборов оценивает
+    их сходство Жаккара.
+
+    Args:
+        ingredient_ids (Collection[int]): Непустой набор id ингредиентов.
+
+    Returns:
+        list[int]: SIGNATURE_SIZE минимальных значений хэш-функций.
+
+    """
+    return [
+        min((a * value + b) % MERSENNE_PRIME for value in ingredient_ids)
+        for a, b in HASH_PARAMS
+    ]
+
+
+def get_band_keys(signature):
+    """Вычисляет ключи полос подписи.
+
+    Номер полосы входит в ключ, поэтому ключи всех полос хранятся
+    в одной колонке с одним индексом.
+
+    """
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                repr((band, signature[start:start + BAND_ROWS])).encode(),
+                digest_size=8
+            ).digest(),
+            'big',
+            signed=True
+        )
+        for band, start in enumerate(range(0, SIGNATURE_SIZE, BAND_ROWS))
+    ]
+
+
+def _get_ingredient_sets(recipe_ids=None):
+    relations = IngredientRecipe.objects.all()
+    if recipe_ids is not None:
+        relations = relations.filter(recipe_id__in=recipe_ids)
+    ingredients = defaultdict(set)
+    for recipe_id, ingredient_id in relations.values_list(
+        'recipe_id', 'ingredient_id'
+    ).iterator():
+        ingredients[recipe_id].add(ingredient_id)
+    return ingredients
+
+
+def update_similarity_index(recipe_ids=None):
+    """Пересчитывает ключи полос для указанных рецептов.
+
+    Ключи удаленных рецептов и рецептов без ингредиентов убираются.
+
+    Args:
+        recipe_ids (Iterable[int]): id рецептов. Если не переданы,
+            индекс перестраивается целиком.
+
+    """
+    bands = SimilarityBand.objects.all()
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+        if not recipe_ids:
+            return
+        bands = bands.filter(recipe_id__in=recipe_ids)
+    ingredients = _get_ingredient_sets(recipe_ids)
+    with transaction.atomic(using=router.db_for_write(SimilarityBand)):
+        bands.delete()
+        SimilarityBand.objects.bulk_create(
+            (
+                SimilarityBand(recipe_id=recipe_id, key=key)
+                for recipe_id, ingredient_ids in ingredients.items()
+                for key in get_band_keys(get_signature(ingredient_ids))
+            ),
+            batch_size=5000
+        )
+
+
+@receiver(recipes_changed)
+def recipes_changed_handler(sender, recipe_ids, **kwargs):
+    update_similarity_index(recipe_ids)
+
+
+def _get_candidates(recipe_id):
+    """Отбирает кандидатов в похожие рецепты по общим ключам полос.
+
+    Из каждой полосы берется не больше SIMILAR_RECIPES_BUCKET_LIMIT
+    новых рецептов: огромные полосы (например, у рецептов из одного
+    популярного ингредиента) почти ничего не говорят о сходстве.
+    Все полосы читаются одним запросом по индексу (key, recipe).
+
+    """
+    keys = list(SimilarityBand.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('key', flat=True))
+    if not keys:
+        return []
+    connection = connections[router.db_for_read(SimilarityBand)]
+    table = connection.ops.quote_name(SimilarityBand._meta.db_table)
+    key = connection.ops.quote_name('key')
+    bucket = (
+        'SELECT recipe_id FROM (SELECT recipe_id FROM {} WHERE {} = %s '
+        'ORDER BY recipe_id DESC LIMIT %s) AS b{}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ' UNION ALL '.join(
+                bucket.format(table, key, number)
+                for number in range(len(keys))
+            ),
+            [
+                value for band_key in keys
+                for value in (band_key, settings.SIMILAR_RECIPES_BUCKET_LIMIT)
+            ]
+        )
+        matched = Counter(row[0] for row in cursor.fetchall())
+    matched.pop(recipe_id, None)
+    return [
+        candidate for candidate, _ in sorted(
+            matched.items(),
+            key=lambda item: (item[1], item[0]),
+            reverse=True
+        )[:settings.SIMILAR_RECIPES_CANDIDATES]
+    ]
+
+
+def get_similar_recipes(recipe_id, limit=None):
+    """Находит рецепты с похожим набором ингредиентов.
+
+    Кандидаты - рецепты с общими ключами полос, не больше
+    SIMILAR_RECIPES_CANDIDATES с наибольшим числом общих полос.
+    Для них считается точное сходство Жаккара, и остаются рецепты
+    со сходством не ниже SIMILAR_RECIPES_THRESHOLD.
+
+    Args:
+        recipe_id (int): id рецепта.
+        limit (int): Сколько рецептов вернуть, по умолчанию - все.
+
+    Returns:
+        list[tuple[int, float]]: id рецептов и сходство по убыванию
+            сходства.
+
+    """
+    candidates = _get_candidates(recipe_id)
+    if not candidates:
+        return []
+    ingredients = _get_ingredient_sets(candidates + [recipe_id])
+    target = ingredients.pop(recipe_id, set())
+    scores = {
+        candidate: len(target & ingredient_ids) / len(target | ingredient_ids)
+        for candidate, ingredient_ids in ingredients.items()
+    }
+    similar = sorted(
+        (
+            (candidate, score) for candidate, score in scores.items()
+            if score >= settings.SIMILAR_RECIPES_THRESHOLD
+        ),
+        key=lambda item: (item[1], item[0]),
+        reverse=True
+    )
+    return similar[:limit]
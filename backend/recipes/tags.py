@@ -0,0 +1,124 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Recipe, Tag, TagRecipe
+from .signals import recipes_changed
+
+TAG_IDS_CACHE_KEY = 'recipes:tag_ids'
+# Размер маски тэгов рецепта: знаковый bigint вмещает 63 бита.
+TAGS_MASK_BITS = 63
+
+
+def _get_cache():
+    return caches[settings.TAG_IDS_CACHE]
+
+
+def get_tag_ids():
+    """Возвращает соответствие слагов тэгов их id.
+
+    Тэги меняются редко, поэтому соответствие хранится в общем кэше
+    TAG_IDS_CACHE и сбрасывается после фиксации изменения любого тэга.
+
+    Returns:
+        dict: Словарь вида {slug: id}.
+
+    """
+    cache = _get_cache()
+    tag_ids = cache.get(TAG_IDS_CACHE_KEY)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(
+            TAG_IDS_CACHE_KEY,
+            tag_ids,
+            getattr(settings, 'TAG_IDS_CACHE_TIMEOUT', 300)
+        )
+    return tag_ids
+
+
+def find_tag_ids(slugs):
+    """Переводит слаги тэгов в id.
+
+    Слаги, которых нет в кэше (например, соответствие закэшировано
+    параллельным запросом до фиксации нового тэга), ищутся в базе.
+    Неизвестные слаги пропускаются.
+
+    Args:
+        slugs (Iterable[str]): Слаги тэгов.
+
+    Returns:
+        list[int]: id найденных тэгов.
+
+    """
+    tag_ids = get_tag_ids()
+    missing = [slug for slug in slugs if slug not in tag_ids]
+    found = [tag_ids[slug] for slug in slugs if slug in tag_ids]
+    if missing:
+        found.extend(
+            Tag.objects.filter(slug__in=missing).values_list('id', flat=True)
+        )
+    return found
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    transaction.on_commit(
+        lambda: _get_cache().delete(TAG_IDS_CACHE_KEY),
+        using=router.db_for_write(Tag)
+    )
+
+
+def get_tags_mask(tag_ids):
+    """Вычисляет битовую маску для набора тэгов.
+
+    Args:
+        tag_ids (Iterable[int]): id тэгов.
+
+    Returns:
+        int: Маска, в которой выставлен бит с номером id каждого тэга,
+            или None, если хотя бы один id не помещается в маску.
+
+    """
+    mask = 0
+    for tag_id in tag_ids:
+        if tag_id >= TAGS_MASK_BITS:
+            return None
+        mask |= 1 << tag_id
+    return mask
+
+
+def update_tags_masks(recipe_ids=None):
+    """Пересчитывает маски тэгов у рецептов.
+
+    Args:
+        recipe_ids (Iterable[int]): id рецептов. Если не переданы,
+            пересчитываются маски всех рецептов.
+
+    """
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(id__in=list(recipe_ids))
+    masks = defaultdict(int)
+    tag_recipes = TagRecipe.objects.filter(
+        recipe__in=recipes, tag_id__lt=TAGS_MASK_BITS
+    ).values_list('recipe_id', 'tag_id')
+    for recipe_id, tag_id in tag_recipes:
+        masks[recipe_id] |= 1 << tag_id
+    Recipe.objects.bulk_update(
+        [
+            Recipe(id=recipe_id, tags_mask=masks[recipe_id])
+            for recipe_id in recipes.values_list('id', flat=True)
+        ],
+        ('tags_mask',),
+        batch_size=1000
+    )
+
+
+@receiver(recipes_changed)
+def recipes_changed_handler(sender, recipe_ids, **kwargs):
+    update_tags_masks(recipe_ids)
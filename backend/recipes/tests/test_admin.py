@@ -0,0 +1,130 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from recipes.models import (DeletionJob, Favorite, Ingredient,
+                            IngredientRecipe, Recipe, ShoppingCart, Tag,
+                            TagRecipe)
+from users.models import CustomUser
+
+
+class AdminQueriesTestCase(TestCase):
+    """Количество запросов страниц админки не зависит от объема таблиц.
+
+    Каждая страница загружается при двух объемах данных, и на большем
+    объеме должно выполниться столько же запросов, сколько на меньшем.
+
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.created = 0
+
+    def add_recipes(self, number):
+        """Добавляет авторов с рецептами, избранным и списками покупок."""
+        for index in range(self.created, self.created + number):
+            author = CustomUser.objects.create(
+                username=f'author{index}', email=f'author{index}@example.com'
+            )
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {index}',
+                text='Описание',
+                cooking_time=10
+            )
+            TagRecipe.objects.create(tag=self.tag, recipe=recipe)
+            for ingredient in self.ingredients:
+                IngredientRecipe.objects.create(
+                    ingredient=ingredient, recipe=recipe, amount=100
+                )
+            Favorite.objects.create(user=author, recipe=recipe)
+            ShoppingCart.objects.create(user=author, recipe=recipe)
+            DeletionJob.objects.create(
+                target=DeletionJob.RECIPES, object_ids=[recipe.id], total=1
+            )
+        self.created += number
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_constant_queries(self, url):
+        self.add_recipes(2)
+        # Первый запрос заполняет кэши процесса (типы содержимого и т.п.).
+        self.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.get(url)
+        self.add_recipes(30)
+        with self.assertNumQueries(len(queries)):
+            self.get(url)
+
+    def test_recipe_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_recipe_changelist')
+        )
+
+    def test_recipe_changelist_filtered_by_tag(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_recipe_changelist')
+            + f'?tags__id__exact={self.tag.pk}'
+        )
+
+    def test_recipe_changelist_search(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_recipe_changelist') + '?q=Рецепт'
+        )
+
+    def test_tag_changelist(self):
+        self.assert_constant_queries(reverse('admin:recipes_tag_changelist'))
+
+    def test_ingredient_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_ingredient_changelist')
+        )
+
+    def test_ingredientrecipe_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_ingredientrecipe_changelist')
+        )
+
+    def test_tagrecipe_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_tagrecipe_changelist')
+        )
+
+    def test_favorite_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_favorite_changelist')
+        )
+
+    def test_shoppingcart_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_shoppingcart_changelist')
+        )
+
+    def test_deletionjob_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:recipes_deletionjob_changelist')
+        )
+
+    def test_recipe_add_form(self):
+        self.assert_constant_queries(reverse('admin:recipes_recipe_add'))
+
+    def test_favorite_add_form(self):
+        self.assert_constant_queries(reverse('admin:recipes_favorite_add'))
@@ -0,0 +1,160 @@
+from django.test import TestCase, override_settings
+from recipes.deletion import (count_deleted_objects, delete_or_schedule,
+                              delete_recipes, delete_users)
+from recipes.models import (DeletionJob, Favorite, Ingredient,
+                            IngredientRecipe, PopularityBucket, Recipe,
+                            RecipeCard, ShoppingCart, Tag, TagRecipe)
+from rest_framework.authtoken.models import Token
+from users.models import CustomUser, Subscribe
+
+
+@override_settings(DELETION_BATCH_SIZE=2)
+class DeletionTestCase(TestCase):
+    """Пакетное удаление рецептов и пользователей.
+
+    Пачки по два объекта, чтобы удаление шло в несколько транзакций.
+
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create(
+                username=f'user{number}', email=f'user{number}@example.com'
+            )
+            for number in range(3)
+        ]
+        tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.recipes = []
+            for number in range(6):
+                recipe = Recipe.objects.create(
+                    author=cls.users[number % 3],
+                    name=f'Рецепт {number}',
+                    text='Описание',
+                    cooking_time=10
+                )
+                TagRecipe.objects.create(tag=tag, recipe=recipe)
+                IngredientRecipe.objects.create(
+                    ingredient=ingredient, recipe=recipe, amount=100
+                )
+                cls.recipes.append(recipe)
+            for user in cls.users:
+                for recipe in cls.recipes:
+                    Favorite.objects.create(user=user, recipe=recipe)
+                ShoppingCart.objects.create(user=user, recipe=cls.recipes[0])
+        Subscribe.objects.create(
+            user=cls.users[1], subscribing=cls.users[0]
+        )
+        Subscribe.objects.create(
+            user=cls.users[0], subscribing=cls.users[2]
+        )
+        Token.objects.create(user=cls.users[0])
+
+    def get_counts(self, recipe):
+        """Возвращает число добавлений рецепта в избранное и покупки."""
+        buckets = PopularityBucket.objects.filter(recipe=recipe)
+        return (
+            sum(buckets.values_list('favorites', flat=True)),
+            sum(buckets.values_list('carts', flat=True))
+        )
+
+    def assert_recipes_deleted(self, recipe_ids):
+        self.assertFalse(Recipe.objects.filter(id__in=recipe_ids))
+        for model in (
+            IngredientRecipe, TagRecipe, Favorite, ShoppingCart,
+            RecipeCard, PopularityBucket
+        ):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(
+                    model.objects.filter(recipe_id__in=recipe_ids)
+                )
+
+    def test_delete_recipes(self):
+        deleted_ids = [recipe.id for recipe in self.recipes[:3]]
+        processed = []
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = delete_recipes(deleted_ids, processed.append)
+        self.assertEqual(deleted, 3)
+        self.assertEqual(processed, [2, 1])
+        self.assert_recipes_deleted(deleted_ids)
+        for recipe in self.recipes[3:]:
+            with self.subTest(recipe=recipe.id):
+                self.assertTrue(RecipeCard.objects.filter(recipe=recipe))
+                self.assertEqual(self.get_counts(recipe), (3, 0))
+                self.assertEqual(recipe.ingredients.count(), 1)
+                self.assertEqual(recipe.tags.count(), 1)
+
+    def test_delete_users(self):
+        deleted_users = self.users[:2]
+        user_ids = [user.id for user in deleted_users]
+        recipe_ids = list(
+            Recipe.objects.filter(author_id__in=user_ids).values_list(
+                'id', flat=True
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = delete_users(user_ids)
+        self.assertEqual(deleted, 2)
+        self.assertFalse(CustomUser.objects.filter(id__in=user_ids))
+        self.assert_recipes_deleted(recipe_ids)
+        self.assertFalse(Favorite.objects.filter(user_id__in=user_ids))
+        self.assertFalse(ShoppingCart.objects.filter(user_id__in=user_ids))
+        self.assertFalse(Subscribe.objects.all())
+        self.assertFalse(Token.objects.all())
+        # У оставшихся рецептов учтены только добавления третьего
+        # пользователя.
+        for recipe in Recipe.objects.all():
+            with self.subTest(recipe=recipe.id):
+                self.assertEqual(recipe.author, self.users[2])
+                self.assertEqual(self.get_counts(recipe), (1, 0))
+                self.assertEqual(
+                    Favorite.objects.filter(recipe=recipe).count(), 1
+                )
+
+    def test_delete_users_keeps_cart_counts(self):
+        recipe = self.recipes[0]
+        self.assertEqual(self.get_counts(recipe), (3, 3))
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_users([self.users[1].id, self.users[2].id])
+        self.assertEqual(self.get_counts(recipe), (1, 1))
+
+    def test_count_deleted_objects(self):
+        counts, perms_needed = count_deleted_objects(
+            CustomUser.objects.filter(id=self.users[0].id),
+            lambda model: model is not Favorite
+        )
+        for model, number in (
+            (CustomUser, 1),
+            (Recipe, 2),
+            # Избранное пользователя и избранное его рецептов
+            # считаются по отдельности.
+            (Favorite, 6 + 6),
+            (ShoppingCart, 1 + 3),
+            (Subscribe, 2),
+        ):
+            name = str(model._meta.verbose_name_plural)
+            with self.subTest(model=name):
+                self.assertEqual(counts[name], number)
+        self.assertEqual(
+            perms_needed, {str(Favorite._meta.verbose_name)}
+        )
+
+    @override_settings(DELETION_SYNC_LIMIT=2)
+    def test_delete_or_schedule(self):
+        self.assertIsNone(
+            delete_or_schedule(Recipe.objects.filter(pk=self.recipes[0].pk))
+        )
+        self.assertFalse(Recipe.objects.filter(pk=self.recipes[0].pk))
+        users = CustomUser.objects.filter(pk=self.users[1].pk)
+        job = delete_or_schedule(users)
+        self.assertEqual(job.target, DeletionJob.USERS)
+        self.assertEqual(job.object_ids, [self.users[1].pk])
+        self.assertEqual(job.total, 3)
+        self.assertEqual(job.status, DeletionJob.PENDING)
+        self.assertTrue(users.exists())
@@ -0,0 +1,95 @@
+from django.test import TestCase
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.pantry import CHANGE_KEY, PantryIndex, _get_cache
+from users.models import CustomUser
+
+
+class PantryIndexTestCase(TestCase):
+    """Поиск рецептов по имеющимся ингредиентам.
+
+    Каждый индекс изображает отдельный процесс: изменения рецептов
+    доходят до него через журнал в общем кэше.
+
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUser.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        cls.flour, cls.egg, cls.milk, cls.salt = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'яйцо', 'молоко', 'соль')
+        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.dough = cls.create_recipe('Тесто', cls.flour, cls.egg)
+            cls.pancakes = cls.create_recipe(
+                'Блины', cls.flour, cls.egg, cls.milk
+            )
+            cls.brine = cls.create_recipe('Рассол', cls.salt)
+
+    @classmethod
+    def create_recipe(cls, name, *ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Описание', cooking_time=10
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def setUp(self):
+        self.index = PantryIndex()
+
+    def search(self, *ingredients, max_missing=0):
+        return self.index.search(
+            [ingredient.id for ingredient in ingredients], max_missing
+        )
+
+    def test_search(self):
+        self.assertEqual(
+            self.search(self.flour, self.egg), [(self.dough.id, 0)]
+        )
+        self.assertEqual(
+            self.search(self.flour, self.egg, max_missing=1),
+            [(self.dough.id, 0), (self.pancakes.id, 1)]
+        )
+        self.assertEqual(
+            self.search(self.milk, self.salt), [(self.brine.id, 0)]
+        )
+        self.assertEqual(self.search(), [])
+
+    def test_changes_applied_from_journal(self):
+        self.search(self.flour)
+        built_at = self.index.built_at
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientRecipe.objects.create(
+                recipe=self.dough, ingredient=self.milk, amount=1
+            )
+            IngredientRecipe.objects.filter(
+                recipe=self.pancakes, ingredient=self.milk
+            ).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            salty = self.create_recipe('Соленое тесто', self.flour, self.salt)
+            self.brine.delete()
+        self.assertEqual(
+            self.search(self.flour, self.egg, self.salt, max_missing=1),
+            [(salty.id, 0), (self.pancakes.id, 0), (self.dough.id, 1)]
+        )
+        self.assertEqual(self.search(self.salt), [])
+        self.assertEqual(self.index.built_at, built_at)
+
+    def test_missing_journal_entry_rebuilds(self):
+        self.search(self.flour)
+        built_at = self.index.built_at
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientRecipe.objects.filter(
+                recipe=self.pancakes, ingredient=self.milk
+            ).delete()
+        _get_cache().delete(CHANGE_KEY.format(self.index.version + 1))
+        self.assertEqual(
+            self.search(self.flour, self.egg),
+            [(self.pancakes.id, 0), (self.dough.id, 0)]
+        )
+        self.assertNotEqual(self.index.built_at, built_at)
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import (Favorite, PopularityBucket, PopularRecipe, Recipe,
+                            ShoppingCart)
+from recipes.popularity import (ARCHIVE_DAY, compact_buckets, count,
+                                rebuild_buckets, uncount, update_ranking)
+from users.models import CustomUser
+
+
+class PopularityTestCase(TestCase):
+    """Счетчики добавлений по дням и рейтинг популярных рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            CustomUser.objects.create(
+                username=f'user{number}', email=f'user{number}@example.com'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.users[0],
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10
+            )
+            for number in range(4)
+        ]
+
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def days_ago(self, days):
+        return self.today - timedelta(days=days)
+
+    def add(self, model, user, recipe, days_ago=0):
+        """Добавляет рецепт и переносит добавление на days_ago дней назад."""
+        instance = model.objects.create(user=user, recipe=recipe)
+        if days_ago:
+            model.objects.filter(pk=instance.pk).update(
+                created=timezone.now() - timedelta(days=days_ago)
+            )
+            instance.refresh_from_db()
+        return instance
+
+    def get_buckets(self, recipe):
+        return {
+            day: (favorites, carts)
+            for day, favorites, carts in PopularityBucket.objects.filter(
+                recipe=recipe
+            ).values_list('day', 'favorites', 'carts')
+        }
+
+    def get_ranking(self, window):
+        return list(
+            PopularRecipe.objects.filter(window=window).order_by(
+                'rank'
+            ).values_list('recipe_id', flat=True)
+        )
+
+    def test_add_and_remove(self):
+        recipe = self.recipes[0]
+        favorite = self.add(Favorite, self.users[0], recipe)
+        self.add(Favorite, self.users[1], recipe)
+        self.add(ShoppingCart, self.users[0], recipe)
+        self.assertEqual(self.get_buckets(recipe), {self.today: (2, 1)})
+        favorite.delete()
+        self.assertEqual(self.get_buckets(recipe), {self.today: (1, 1)})
+
+    def test_rebuild_compacts_old_days(self):
+        first, second = self.recipes[:2]
+        self.add(Favorite, self.users[0], first)
+        self.add(Favorite, self.users[1], first, days_ago=10)
+        old = self.add(Favorite, self.users[2], first, days_ago=40)
+        self.add(ShoppingCart, self.users[2], first, days_ago=50)
+        self.add(ShoppingCart, self.users[0], second, days_ago=40)
+        rebuild_buckets()
+        self.assertEqual(self.get_buckets(first), {
+            self.today: (1, 0),
+            self.days_ago(10): (1, 0),
+            ARCHIVE_DAY: (1, 1),
+        })
+        self.assertEqual(self.get_buckets(second), {ARCHIVE_DAY: (0, 1)})
+        # Удаление свернутого добавления уменьшает архивный счетчик.
+        old.delete()
+        self.assertEqual(self.get_buckets(first)[ARCHIVE_DAY], (0, 1))
+
+    def test_compact_adds_to_archive(self):
+        recipe = self.recipes[0]
+        count(Favorite, recipe.id, ARCHIVE_DAY, 2)
+        # День ровно 30 дней назад уже вне самого длинного периода.
+        count(Favorite, recipe.id, self.days_ago(30), 1)
+        count(ShoppingCart, recipe.id, self.days_ago(45), 3)
+        count(Favorite, recipe.id, self.days_ago(29), 1)
+        self.assertEqual(compact_buckets(self.today), 2)
+        self.assertEqual(self.get_buckets(recipe), {
+            self.days_ago(29): (1, 0),
+            ARCHIVE_DAY: (3, 3),
+        })
+        self.assertEqual(compact_buckets(self.today), 0)
+
+    def test_ranking(self):
+        first, second, third, fourth = self.recipes
+        count(Favorite, first.id, ARCHIVE_DAY, 3)
+        count(Favorite, second.id, self.today, 2)
+        count(ShoppingCart, third.id, self.days_ago(10), 1)
+        count(Favorite, fourth.id, self.days_ago(10), 1)
+        count(Favorite, fourth.id, self.days_ago(10), -1)
+        update_ranking(self.today)
+        self.assertEqual(self.get_ranking('7d'), [second.id])
+        self.assertEqual(self.get_ranking('30d'), [second.id, third.id])
+        self.assertEqual(
+            self.get_ranking('all'), [first.id, second.id, third.id]
+        )
+        ranked = PopularRecipe.objects.get(window='all', recipe=first)
+        self.assertEqual(
+            (ranked.rank, ranked.favorites, ranked.carts), (1, 3, 0)
+        )
+
+    def test_ranking_ties_and_limit(self):
+        for recipe in self.recipes:
+            count(Favorite, recipe.id, self.today, 1)
+        with self.settings(POPULAR_RECIPES_LIMIT=3):
+            update_ranking(self.today)
+        self.assertEqual(
+            self.get_ranking('7d'),
+            [recipe.id for recipe in reversed(self.recipes)][:3]
+        )
+
+    def test_uncount(self):
+        first, second = self.recipes[:2]
+        for user in self.users[:3]:
+            self.add(Favorite, user, first)
+        self.add(Favorite, self.users[0], second, days_ago=3)
+        rebuild_buckets()
+        uncount(Favorite.objects.filter(user__in=self.users[:2]))
+        self.assertEqual(self.get_buckets(first), {self.today: (1, 0)})
+        self.assertEqual(
+            self.get_buckets(second), {self.days_ago(3): (0, 0)}
+        )
@@ -0,0 +1,197 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            Tag, TagRecipe)
+from recipes.search import update_search_index
+from rest_framework.test import APIClient
+from users.models import CustomUser
+
+RECIPES = 2000
+# Таблицы, которые читаются целиком намеренно: словарь слагов тэгов.
+FULL_SCAN_ALLOWED = {'recipes_tag'}
+SQLITE_SCAN = re.compile(
+    r'\bSCAN (?:TABLE )?(\w+)\b'
+    r'(?! USING (?:COVERING )?INDEX| VIRTUAL TABLE INDEX)'
+)
+INDEX_SCANS = ('Index Scan', 'Index Only Scan')
+# Узлы, которые читают все строки потомков, прежде чем отдать первую.
+BLOCKING_NODES = ('Aggregate', 'Hash', 'Sort', 'WindowAgg')
+
+
+class QueryPlansTestCase(TestCase):
+    """Горячие запросы списка рецептов не сканируют таблицы целиком.
+
+    Каждый SELECT, выполненный при запросе к API, проверяется через
+    EXPLAIN. В PostgreSQL последовательное сканирование запрещается
+    настройкой enable_seqscan, и оставшееся полное чтение таблицы
+    значит, что подходящего индекса нет. В SQLite таблица без индекса
+    видна в плане как "SCAN"; допускается только чтение таблицы
+    в порядке первичного ключа для страницы с LIMIT, которое
+    останавливается на первых строках.
+
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            username='cook', email='cook@example.com'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'Тэг {number}', color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'мука {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        # На сотнях строк планировщик выбирает обход всей таблицы как
+        # самый дешевый, поэтому строк тысячи.
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                id=number,
+                author=cls.user,
+                name='Пирог' if number % 100 == 0 else f'Суп {number}',
+                text='Описание',
+                cooking_time=10
+            )
+            for number in range(1, RECIPES + 1)
+        )
+        TagRecipe.objects.bulk_create(
+            TagRecipe(tag=tags[recipe.id % 3], recipe=recipe)
+            for recipe in recipes
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                ingredient=ingredients[recipe.id % 5],
+                recipe=recipe,
+                amount=100
+            )
+            for recipe in recipes
+        )
+        # Избранное другого пользователя делает условие по user_id
+        # избирательным: иначе оно совпадает со всей таблицей.
+        reader = CustomUser.objects.create(
+            username='reader', email='reader@example.com'
+        )
+        Favorite.objects.bulk_create(
+            [
+                Favorite(user=cls.user, recipe=recipe)
+                for recipe in recipes[::10]
+            ]
+            + [Favorite(user=reader, recipe=recipe) for recipe in recipes]
+        )
+        update_search_index()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Новые строки лежат в списке ожидания индекса GIN,
+                # и его чтение планировщик считает дорогим.
+                cursor.execute(
+                    "SELECT gin_clean_pending_list("
+                    "'recipes_recipe_search_document_gin')"
+                )
+                cursor.execute('ANALYZE')
+                # SET LOCAL действует до отката транзакции теста.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def get_leading_column(self, index):
+        """Возвращает первую колонку индекса PostgreSQL."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT a.attname FROM pg_index i '
+                'JOIN pg_class c ON c.oid = i.indexrelid '
+                'JOIN pg_attribute a ON a.attrelid = i.indrelid '
+                'AND a.attnum = i.indkey[0] '
+                'WHERE c.relname = %s',
+                [index]
+            )
+            return cursor.fetchone()[0]
+
+    def is_full_index_scan(self, node):
+        """Проверяет, что узел отбирает строки обходом всего индекса.
+
+        Условие без первой колонки индекса или одно только "Filter"
+        не сужают диапазон индекса: так PostgreSQL читает таблицу,
+        когда последовательное сканирование запрещено.
+
+        """
+        if 'Filter' not in node and 'Index Cond' not in node:
+            return False
+        column = self.get_leading_column(node['Index Name'])
+        return not re.search(
+            rf'\b{column}\b', node.get('Index Cond', '')
+        )
+
+    def get_postgresql_scans(self, node, limited=False):
+        """Собирает таблицы, которые узел плана и его потомки читают целиком.
+
+        Обход индекса под узлом Limit допустим: он останавливается
+        на первых строках.
+
+        """
+        if node['Node Type'] == 'Limit':
+            limited = True
+        elif node['Node Type'] in BLOCKING_NODES:
+            limited = False
+        scanned = set()
+        if node['Node Type'] == 'Seq Scan' or (
+            node['Node Type'] in INDEX_SCANS
+            and not limited
+            and self.is_full_index_scan(node)
+        ):
+            scanned.add(node['Relation Name'])
+        for child in node.get('Plans', ()):
+            scanned |= self.get_postgresql_scans(child, limited)
+        return scanned
+
+    def get_full_scans(self, sql):
+        """Возвращает таблицы, которые запрос сканирует целиком."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0][0]['Plan']
+                return self.get_postgresql_scans(plan) - FULL_SCAN_ALLOWED
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        scanned = set(SQLITE_SCAN.findall(plan))
+        if (
+            re.search(r'\bLIMIT \d+(?: OFFSET \d+)?$', sql)
+            and 'USE TEMP B-TREE FOR ORDER BY' not in plan
+        ):
+            # Страница читается в порядке первичного ключа.
+            scanned.discard(Recipe._meta.db_table)
+        return scanned - FULL_SCAN_ALLOWED
+
+    def assert_no_full_scans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            with self.subTest(url=url, sql=query['sql']):
+                self.assertFalse(self.get_full_scans(query['sql']))
+
+    def test_list(self):
+        self.assert_no_full_scans('/api/recipes/?page=2&limit=6')
+
+    def test_search(self):
+        self.assert_no_full_scans('/api/recipes/?search=пирог')
+
+    def test_tags(self):
+        self.assert_no_full_scans('/api/recipes/?tags=tag1&tags=tag2')
+
+    def test_favorited(self):
+        self.assert_no_full_scans('/api/recipes/?is_favorited=1')
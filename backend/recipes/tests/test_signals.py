@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.test import TestCase
+from recipes.signals import mark_recipes_changed, recipes_changed
+
+
+class RecipesChangedTestCase(TestCase):
+    """Сигнал recipes_changed после фиксации транзакции."""
+
+    def setUp(self):
+        self.received = []
+
+    def connect(self, handler):
+        recipes_changed.connect(handler)
+        self.addCleanup(recipes_changed.disconnect, handler)
+
+    def record(self, sender, recipe_ids, **kwargs):
+        self.received.append(set(recipe_ids))
+
+    def test_changes_of_transaction_are_sent_once(self):
+        self.connect(self.record)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_recipes_changed((1, 2))
+            mark_recipes_changed((2, 3))
+        self.assertEqual(self.received, [{1, 2, 3}])
+
+    def test_changes_after_sent_batch_are_sent_again(self):
+        self.connect(self.record)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_recipes_changed((1,))
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_recipes_changed((2,))
+        self.assertEqual(self.received, [{1}, {2}])
+
+    def test_failing_handler_does_not_stop_others(self):
+        def fail(sender, **kwargs):
+            raise RuntimeError('сбой')
+
+        self.connect(fail)
+        self.connect(self.record)
+        with self.assertLogs('recipes.signals', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                mark_recipes_changed((1,))
+        self.assertEqual(self.received, [{1}])
+
+    def test_rolled_back_changes_are_dropped(self):
+        self.connect(self.record)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    mark_recipes_changed((1,))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            mark_recipes_changed((2,))
+        self.assertEqual(self.received, [{2}])
@@ -1,10 +1,11 @@
 from django.contrib import admin
+from recipes.admin import BulkDeleteMixin
 
 from .models import CustomUser, Subscribe
 
 
 @admin.register(CustomUser)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BulkDeleteMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'email',
@@ -12,9 +13,16 @@ class UserAdmin(admin.ModelAdmin):
         'first_name',
         'last_name',
     )
-    list_filter = ('email', 'username')
+    list_filter = ('is_staff', 'is_active')
+    search_fields = ('username', 'email')
+    ordering = ('-pk',)
+    show_full_result_count = False
 
 
 @admin.register(Subscribe)
 class SubscribeAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'subscribing')
+    list_select_related = ('user', 'subscribing')
+    search_fields = ('user__username', 'subscribing__username')
+    autocomplete_fields = ('user', 'subscribing')
+    show_full_result_count = False
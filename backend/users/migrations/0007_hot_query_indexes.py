@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-19 07:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_subscribe_uniqe_user_subscribing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscribe',
+            index=models.Index(fields=['subscribing', 'user'], name='subscribe_subscribing_user_idx'),
+        ),
+        migrations.AlterField(
+            model_name='subscribe',
+            name='subscribing',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='subscribing', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+    ]
@@ -46,7 +46,8 @@ class Subscribe(models.Model):
         CustomUser,
         verbose_name='Автор',
         related_name='subscribing',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta:
@@ -58,3 +59,9 @@ class Subscribe(models.Model):
                 name='uniqe_user_subscribing'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['subscribing', 'user'],
+                name='subscribe_subscribing_user_idx'
+            )
+        ]
@@ -0,0 +1,66 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from users.models import CustomUser, Subscribe
+
+
+class AdminQueriesTestCase(TestCase):
+    """Количество запросов страниц админки не зависит от объема таблиц.
+
+    Каждая страница загружается при двух объемах данных, и на большем
+    объеме должно выполниться столько же запросов, сколько на меньшем.
+
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.created = 0
+
+    def add_users(self, number):
+        """Добавляет пользователей, подписанных на администратора."""
+        for index in range(self.created, self.created + number):
+            user = CustomUser.objects.create(
+                username=f'user{index}', email=f'user{index}@example.com'
+            )
+            Subscribe.objects.create(user=user, subscribing=self.admin)
+        self.created += number
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_constant_queries(self, url):
+        self.add_users(2)
+        # Первый запрос заполняет кэши процесса (типы содержимого и т.п.).
+        self.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.get(url)
+        self.add_users(30)
+        with self.assertNumQueries(len(queries)):
+            self.get(url)
+
+    def test_user_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:users_customuser_changelist')
+        )
+
+    def test_user_changelist_filtered(self):
+        self.assert_constant_queries(
+            reverse('admin:users_customuser_changelist') + '?is_staff__exact=0'
+        )
+
+    def test_subscribe_changelist(self):
+        self.assert_constant_queries(
+            reverse('admin:users_subscribe_changelist')
+        )
+
+    def test_subscribe_add_form(self):
+        self.assert_constant_queries(reverse('admin:users_subscribe_add'))
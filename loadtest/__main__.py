@@ -0,0 +1,213 @@
+"""Нагрузочное тестирование API.
+
+Запускается из корня репозитория против работающего сервера:
+
+    python -m loadtest --base-url http://127.0.0.1:8000 --users 20
+
+Создает виртуальных пользователей, которые выполняют сценарии
+с заданными долями, и сохраняет отчет в формате JSON.
+
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from time import monotonic, sleep
+
+from .client import Client, Stats
+from .scenarios import SCENARIOS, Context, make_png
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m loadtest',
+        description='Нагрузочное тестирование API.'
+    )
+    parser.add_argument(
+        '--base-url', default='http://127.0.0.1:8000',
+        help='Адрес сервера.'
+    )
+    parser.add_argument(
+        '--users', type=int, default=10,
+        help='Количество одновременных виртуальных пользователей.'
+    )
+    parser.add_argument(
+        '--duration', type=float, default=30,
+        help='Длительность прогона в секундах.'
+    )
+    parser.add_argument(
+        '--scenarios', default=','.join(SCENARIOS),
+        help='Сценарии через запятую, по умолчанию - все.'
+    )
+    parser.add_argument(
+        '--think-time', type=float, default=0,
+        help='Пауза между сценариями одного пользователя в секундах.'
+    )
+    parser.add_argument(
+        '--image-size', type=int, default=256,
+        help='Размер стороны картинки создаваемых рецептов в пикселях.'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Начальное значение генератора случайных чисел.'
+    )
+    parser.add_argument(
+        '--output', default='loadtest-report.json',
+        help='Файл отчета.'
+    )
+    parser.add_argument(
+        '--baseline',
+        help='Отчет предыдущего прогона для сравнения.'
+    )
+    args = parser.parse_args()
+    args.scenarios = args.scenarios.split(',')
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'неизвестные сценарии: {", ".join(sorted(unknown))}')
+    return args
+
+
+def prepare(args, run_id):
+    """Создает пользователей и собирает данные для сценариев.
+
+    Returns:
+        tuple[Context, list[str]]: Данные прогона и токены пользователей.
+
+    """
+    client = Client(args.base_url, Stats())
+    data = []
+    for path, params in (
+        ('/api/tags/', None),
+        ('/api/ingredients/', None),
+        ('/api/recipes/', {'limit': 100}),
+    ):
+        response = client.get(path, 'setup', params)
+        if response.status != 200:
+            sys.exit(f'{path}: сервер ответил {response.status}.')
+        data.append(response.json())
+    tags, ingredients, recipes = data
+    if not (tags and ingredients and recipes['results']):
+        sys.exit(
+            'В базе нет тэгов, ингредиентов или рецептов: '
+            'наполните её перед прогоном.'
+        )
+    context = Context(
+        tags, ingredients, make_png(args.image_size, args.seed), recipes
+    )
+    rng = random.Random(args.seed)
+    tokens = []
+    for number in range(args.users):
+        email = f'loadtest-{run_id}-{number}@example.com'
+        password = f'{rng.getrandbits(64):016x}Qz!'
+        response = client.post_patiently('/api/users/', 'setup', {
+            'email': email,
+            'username': f'loadtest_{run_id}_{number}',
+            'first_name': 'Нагрузка',
+            'last_name': str(number),
+            'password': password,
+        })
+        if response.status != 201:
+            sys.exit(
+                'Не удалось создать пользователя: '
+                + response.body.decode(errors='replace')
+            )
+        client.token = client.post_patiently(
+            '/api/auth/token/login/',
+            'setup',
+            {'email': email, 'password': password}
+        ).json()['auth_token']
+        for recipe_id in context.cart_ids:
+            client.post(f'/api/recipes/{recipe_id}/shopping_cart/', 'setup')
+        tokens.append(client.token)
+        client.token = None
+    client.close()
+    return context, tokens
+
+
+def run_user(args, context, stats, token, seed, deadline):
+    rng = random.Random(seed)
+    client = Client(args.base_url, stats)
+    client.token = token
+    scenarios = [SCENARIOS[name][0] for name in args.scenarios]
+    weights = [SCENARIOS[name][1] for name in args.scenarios]
+    while monotonic() < deadline:
+        rng.choices(scenarios, weights)[0](client, context, rng)
+        if args.think_time:
+            sleep(args.think_time)
+    client.close()
+
+
+def print_report(report, baseline=None):
+    baseline = (baseline or {}).get('endpoints', {})
+    print(
+        f'{"эндпоинт":<48} {"запросов":>9} {"rps":>8} {"ошибки":>7} '
+        f'{"429":>5} {"p50":>8} {"p95":>8} {"p99":>8}'
+    )
+    for endpoint, result in report['endpoints'].items():
+        latency = result['latency_ms']
+        line = (
+            f'{endpoint:<48} {result["requests"]:>9} {result["rps"]:>8} '
+            f'{result["errors"]:>7} {result["throttled"]:>5} '
+            f'{latency["p50"]:>8} {latency["p95"]:>8} {latency["p99"]:>8}'
+        )
+        previous = baseline.get(endpoint)
+        if previous and previous['latency_ms']['p95']:
+            line += ' (rps {:+.1%}, p95 {:+.1%})'.format(
+                result['rps'] / previous['rps'] - 1,
+                latency['p95'] / previous['latency_ms']['p95'] - 1
+            )
+        print(line)
+
+
+def main():
+    args = parse_args()
+    run_id = f'{random.Random().getrandbits(32):08x}'
+    context, tokens = prepare(args, run_id)
+    stats = Stats()
+    started_at = datetime.now(timezone.utc)
+    started = monotonic()
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(
+                args, context, stats, token,
+                args.seed + number, started + args.duration
+            )
+        )
+        for number, token in enumerate(tokens)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = monotonic() - started
+    report = {
+        'meta': {
+            'run_id': run_id,
+            'base_url': args.base_url,
+            'started_at': started_at.isoformat(),
+            'duration_s': round(duration, 2),
+            'users': args.users,
+            'think_time_s': args.think_time,
+            'image_size': args.image_size,
+            'seed': args.seed,
+            'scenarios': {
+                name: SCENARIOS[name][1] for name in args.scenarios
+            },
+        },
+        'endpoints': stats.report(duration),
+    }
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as previous:
+            baseline = json.load(previous)
+    print_report(report, baseline)
+    print(f'\nОтчет сохранен в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+import http.client
+import json
+import threading
+from collections import defaultdict
+from time import perf_counter, sleep
+from urllib.parse import urlencode, urlsplit
+
+THROTTLED = 429
+
+
+class Stats:
+    """Результаты запросов, сгруппированные по эндпоинтам."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint, status, latency):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+
+    def report(self, duration):
+        """Формирует отчет по эндпоинтам.
+
+        Args:
+            duration (float): Длительность прогона в секундах.
+
+        Returns:
+            dict: Отчет вида {эндпоинт: показатели} с ключом 'total'
+                для всех запросов вместе.
+
+        """
+        with self.lock:
+            endpoints = {
+                endpoint: summarize(
+                    self.latencies[endpoint], statuses, duration
+                )
+                for endpoint, statuses in sorted(self.statuses.items())
+            }
+            total_statuses = defaultdict(int)
+            for statuses in self.statuses.values():
+                for status, count in statuses.items():
+                    total_statuses[status] += count
+            endpoints['total'] = summarize(
+                [
+                    latency
+                    for latencies in self.latencies.values()
+                    for latency in latencies
+                ],
+                total_statuses,
+                duration
+            )
+        return endpoints
+
+
+def percentile(values, share):
+    """Вычисляет перцентиль отсортированного списка (ближайший ранг)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def summarize(latencies, statuses, duration):
+    latencies = sorted(latencies)
+    requests = sum(statuses.values())
+    throttled = statuses.get(THROTTLED, 0)
+    errors = sum(
+        count for status, count in statuses.items()
+        if status == 0 or (status >= 400 and status != THROTTLED)
+    )
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'requests': requests,
+        'rps': round(requests / duration, 2),
+        'errors': errors,
+        'error_rate': round(errors / requests, 4) if requests else 0,
+        'throttled': throttled,
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'latency_ms': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 0.50)),
+            'p90': ms(percentile(latencies, 0.90)),
+            'p95': ms(percentile(latencies, 0.95)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+
+class Response:
+
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class Client:
+    """HTTP-клиент виртуального пользователя.
+
+    Держит одно keep-alive соединение с сервером и записывает время
+    и статус каждого запроса в общую статистику. Сетевые ошибки
+    записываются со статусом 0.
+
+    """
+
+    def __init__(self, base_url, stats, timeout=30):
+        url = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection if url.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(url.netloc, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.stats = stats
+        self.token = None
+
+    def request(self, method, path, endpoint, params=None, data=None):
+        """Выполняет запрос к API.
+
+        Args:
+            method (str): HTTP-метод.
+            path (str): Путь запроса.
+            endpoint (str): Имя эндпоинта в отчете.
+            params (dict): Параметры строки запроса.
+            data (dict): Тело запроса в формате JSON.
+
+        Returns:
+            Response: Ответ сервера.
+
+        """
+        url = self.prefix + path
+        if params:
+            url += '?' + urlencode(params, doseq=True)
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        started = perf_counter()
+        try:
+            self.connection.request(method, url, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.stats.add(endpoint, 0, perf_counter() - started)
+            return Response(0, b'')
+        self.stats.add(endpoint, response.status, perf_counter() - started)
+        return Response(response.status, content, dict(response.getheaders()))
+
+    def get(self, path, endpoint, params=None):
+        return self.request('GET', path, endpoint, params=params)
+
+    def post(self, path, endpoint, data=None):
+        return self.request('POST', path, endpoint, data=data)
+
+    def post_patiently(self, path, endpoint, data=None):
+        """Выполняет POST-запрос, дожидаясь снятия ограничения частоты."""
+        response = self.post(path, endpoint, data)
+        while response.status == THROTTLED:
+            # Ожидание может быть дольше keep-alive сервера: соединение
+            # переоткрывается при следующем запросе.
+            self.connection.close()
+            sleep(float(response.headers.get('Retry-After', 1)))
+            response = self.post(path, endpoint, data)
+        return response
+
+    def delete(self, path, endpoint):
+        return self.request('DELETE', path, endpoint)
+
+    def close(self):
+        self.connection.close()
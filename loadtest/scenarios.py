@@ -0,0 +1,162 @@
+import base64
+import random
+import struct
+import zlib
+
+
+def make_png(size, seed=0):
+    """Создает PNG со случайным шумом, который плохо сжимается.
+
+    Args:
+        size (int): Ширина и высота картинки в пикселях.
+        seed (int): Начальное значение генератора.
+
+    Returns:
+        str: Картинка в формате data URI, как её отправляет фронтенд.
+
+    """
+    rng = random.Random(seed)
+    rows = b''.join(
+        b'\x00' + bytes(rng.getrandbits(8) for _ in range(size * 3))
+        for _ in range(size)
+    )
+
+    def chunk(kind, data):
+        return (
+            struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data))
+        )
+
+    png = (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(rows))
+        + chunk(b'IEND', b'')
+    )
+    return 'data:image/png;base64,' + base64.b64encode(png).decode()
+
+
+# Размер страницы ленты, как у фронтенда.
+FEED_PAGE_SIZE = 6
+
+
+class Context:
+    """Общие для всех виртуальных пользователей данные прогона.
+
+    Сценарии работают только с рецептами, существовавшими до начала
+    прогона: рецепты, которые создают и удаляют сами виртуальные
+    пользователи, давали бы ложные ответы 404.
+
+    Атрибуты:
+        tags (list[dict]): Тэги из /api/tags/.
+        ingredients (list[dict]): Ингредиенты из /api/ingredients/.
+        image (str): Картинка для создаваемых рецептов.
+        recipe_ids (list[int]): id рецептов для просмотра и избранного.
+        cart_ids (list[int]): id рецептов, которые при подготовке
+            добавлены в список покупок каждого пользователя.
+        pages (int): Количество страниц ленты без фильтров.
+
+    """
+
+    def __init__(self, tags, ingredients, image, recipes):
+        self.tags = tags
+        self.ingredients = ingredients
+        self.image = image
+        ids = [recipe['id'] for recipe in recipes['results']]
+        self.cart_ids = ids[:3] if len(ids) > 3 else []
+        self.recipe_ids = ids[len(self.cart_ids):]
+        self.pages = max(1, -(-recipes['count'] // FEED_PAGE_SIZE))
+
+
+def browse_feed(client, context, rng):
+    """Листает ленту рецептов, иногда с фильтром по тэгам."""
+    params = {'limit': FEED_PAGE_SIZE}
+    if context.tags and rng.random() < 0.5:
+        params['tags'] = [
+            tag['slug'] for tag in rng.sample(
+                context.tags, rng.randint(1, min(2, len(context.tags)))
+            )
+        ]
+    else:
+        params['page'] = rng.randint(1, min(5, context.pages))
+    client.get('/api/recipes/', 'GET /api/recipes/', params)
+
+
+def recipe_detail(client, context, rng):
+    """Открывает страницу рецепта."""
+    recipe_id = rng.choice(context.recipe_ids)
+    client.get(f'/api/recipes/{recipe_id}/', 'GET /api/recipes/{id}/')
+
+
+def autocomplete_ingredients(client, context, rng):
+    """Набирает название ингредиента, запрашивая подсказки."""
+    name = rng.choice(context.ingredients)['name']
+    for length in range(1, min(4, len(name)) + 1):
+        client.get(
+            '/api/ingredients/',
+            'GET /api/ingredients/?name=',
+            {'name': name[:length]}
+        )
+
+
+def _toggle(client, context, rng, action):
+    recipe_id = rng.choice(context.recipe_ids)
+    path = f'/api/recipes/{recipe_id}/{action}/'
+    client.post(path, f'POST /api/recipes/{{id}}/{action}/')
+    client.delete(path, f'DELETE /api/recipes/{{id}}/{action}/')
+
+
+def toggle_favorite(client, context, rng):
+    """Добавляет рецепт в избранное и убирает его оттуда."""
+    _toggle(client, context, rng, 'favorite')
+
+
+def toggle_shopping_cart(client, context, rng):
+    """Добавляет рецепт в список покупок и убирает его оттуда."""
+    _toggle(client, context, rng, 'shopping_cart')
+
+
+def create_recipe(client, context, rng):
+    """Создает рецепт с картинкой и удаляет его."""
+    response = client.post(
+        '/api/recipes/',
+        'POST /api/recipes/',
+        {
+            'name': f'Нагрузочный рецепт {rng.getrandbits(32)}',
+            'text': 'Рецепт создан нагрузочным тестом.',
+            'cooking_time': rng.randint(5, 120),
+            'image': context.image,
+            'tags': [rng.choice(context.tags)['id']],
+            'ingredients': [
+                {'id': ingredient['id'], 'amount': rng.randint(1, 500)}
+                for ingredient in rng.sample(
+                    context.ingredients, min(5, len(context.ingredients))
+                )
+            ],
+        }
+    )
+    if response.status == 201:
+        client.delete(
+            f'/api/recipes/{response.json()["id"]}/',
+            'DELETE /api/recipes/{id}/'
+        )
+
+
+def download_shopping_cart(client, context, rng):
+    """Скачивает список покупок."""
+    client.get(
+        '/api/recipes/download_shopping_cart/',
+        'GET /api/recipes/download_shopping_cart/'
+    )
+
+
+# Сценарии и их доли в нагрузке.
+SCENARIOS = {
+    'browse_feed': (browse_feed, 40),
+    'recipe_detail': (recipe_detail, 25),
+    'autocomplete_ingredients': (autocomplete_ingredients, 15),
+    'toggle_favorite': (toggle_favorite, 8),
+    'toggle_shopping_cart': (toggle_shopping_cart, 6),
+    'create_recipe': (create_recipe, 3),
+    'download_shopping_cart': (download_shopping_cart, 3),
+}